@@ -1,11 +1,45 @@
 # __init__.py
+import config
 from agents.mycore.LLMclient import LLMClient
+from agents.mycore.transport import shared_transport_pool
+from agents.mycore.cache import build_response_cache
+from agents.mycore.near_duplicate import NearDuplicateIndex
+from agents.mycore.scheduler import build_scheduler
+from agents.mycore.singleflight import build_singleflight
+from agents.mycore.tokens import build_token_budget
+from agents.mycore.ledger import build_ledger
+from agents.mycore.hedging import build_hedger
+from agents.mycore.breaker import build_circuit_breaker
+from agents.mycore.endpoint_pool import build_endpoint_pool
+from agents.mycore.micro_batch import build_micro_batcher
+from agents.mycore.cassette import build_cassette
+from agents.mycore.profiles import build_profiles
+from agents.mycore.speculation import build_speculator
 from api import UnifyAPI
 from config import OPENAI_APIKEY,DEFLAUT_CONFIG
 
 llm_client = LLMClient(
     api_key = OPENAI_APIKEY,
-    default_config = DEFLAUT_CONFIG
+    default_config = DEFLAUT_CONFIG,
+    transport = shared_transport_pool(getattr(config, "LLM_TRANSPORT", None)),
+    cache = build_response_cache(getattr(config, "LLM_CACHE", None)),
+    scheduler = build_scheduler(getattr(config, "LLM_SCHEDULER", None)),
+    singleflight = build_singleflight(getattr(config, "LLM_SINGLEFLIGHT", None)),
+    budget = build_token_budget(getattr(config, "LLM_TOKEN_BUDGET", None)),
+    base_url = getattr(config, "LLM_BASE_URL", None),
+    ledger = build_ledger(getattr(config, "LLM_LEDGER", None)),
+    hedger = build_hedger(getattr(config, "LLM_HEDGING", None)),
+    breaker = build_circuit_breaker(getattr(config, "LLM_CIRCUIT_BREAKER", None)),
+    pool = build_endpoint_pool(getattr(config, "LLM_POOL", None)),
+    batcher = build_micro_batcher(getattr(config, "LLM_MICRO_BATCH", None)),
+    cassette = build_cassette(getattr(config, "LLM_CASSETTE", None)),
+    profiles = build_profiles(getattr(config, "LLM_PROFILES", None)),
+    synthetic = getattr(config, "LLM_SYNTHETIC", False),
 )
 
-app = UnifyAPI(llm_client)
\ No newline at end of file
+NEAR_DUPLICATE = getattr(config, "NEAR_DUPLICATE", None)
+dedup_index = NearDuplicateIndex(**NEAR_DUPLICATE) if NEAR_DUPLICATE else None
+
+speculator = build_speculator(getattr(config, "SPECULATION", None))
+
+app = UnifyAPI(llm_client, dedup_index=dedup_index, speculator=speculator)
\ No newline at end of file
@@ -27,7 +27,13 @@ class IntentAgent(BaseGraph):
     
     def check_input_intent(self, state: dict) -> dict:
         """Placeholder node for invoking subgraph at runtime.(Implement in controller)"""
-        result = self.tools.classify(state.get("input_text"))
+        result = self.tools.classify(state.get("input_text"), state.get("input_pages"))
+        state["task_type_candidate"] = result["task_type"]
+        return state
+
+    async def acheck_input_intent(self, state: dict) -> dict:
+        """Async twin of check_input_intent, used by graph.ainvoke()."""
+        result = await self.tools.aclassify(state.get("input_text"), state.get("input_pages"))
         state["task_type_candidate"] = result["task_type"]
         return state
     def compile(self):
@@ -0,0 +1,112 @@
+# agents/intent_agent/eval_rules.py
+"""
+Offline evaluation of the rule-based intent fast path against the LLM
+classifier.
+
+The corpus is JSONL, one {"text": ..., "label": "KEYPOINT" | "SYNTHESIS"}
+per line. The bundled eval_corpus.jsonl is labelled by hand following the
+classifier prompt's rules - the same rules RuleClassifier encodes - so its
+agreement is circular: it checks the regexes, not the deployed model, and
+the "rules" threshold in config.json has not been validated against the
+LLM. --relabel replaces the labels with the LLM classifier's answers (needs
+config.py and an API key / LLM_BASE_URL), so the report measures agreement
+with the model actually deployed.
+
+For each threshold the report shows coverage (share of inputs decided
+locally, i.e. LLM calls saved), agreement of the local decisions with the
+labels, and the end-to-end agreement when the rest goes to the LLM.
+
+Usage (from the repository root):
+    python -m agents.intent_agent.eval_rules
+    python -m agents.intent_agent.eval_rules corpus.jsonl --thresholds 0.8,0.9,0.95 --show-misses
+    python -m agents.intent_agent.eval_rules corpus.jsonl --relabel temp/corpus_llm.jsonl
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from agents.intent_agent.rules import RuleClassifier
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_corpus.jsonl")
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def relabel(corpus: List[Dict[str, Any]], output: str) -> List[Dict[str, Any]]:
+    """Label every text with the LLM classifier (rules bypassed) and write the corpus to output."""
+    from __init__ import llm_client
+    from agents.intent_agent.tool import IntentAgentTool
+
+    tool = IntentAgentTool(llm_client)
+    labelled = []
+    for row in corpus:
+        answer = llm_client.invoke_json(*tool.classify_request(row["text"]))
+        labelled.append({**row, "label": answer["task_type"]})
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        for row in labelled:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+    return labelled
+
+
+def evaluate(corpus: List[Dict[str, Any]], thresholds: List[float], classifier: RuleClassifier = None) -> Dict[str, Any]:
+    """Per threshold: coverage, agreement of the local decisions and end-to-end agreement; plus scoring latency."""
+    classifier = classifier or RuleClassifier()
+    started = time.perf_counter()
+    scored = [classifier.score(row["text"]) for row in corpus]
+    elapsed = time.perf_counter() - started
+
+    report = {"documents": len(corpus), "mean_score_us": elapsed / max(1, len(corpus)) * 1e6, "thresholds": {}}
+    for threshold in thresholds:
+        decided = [
+            (row, score) for row, score in zip(corpus, scored)
+            if score["task_type"] is not None and score["confidence"] >= threshold
+        ]
+        misses = [
+            {"text": row["text"], "label": row["label"], "rules": score["task_type"], "matched": score["rules"], "confidence": score["confidence"]}
+            for row, score in decided if score["task_type"] != row["label"]
+        ]
+        report["thresholds"][threshold] = {
+            "decided": len(decided),
+            "coverage": len(decided) / max(1, len(corpus)),
+            "agreement": 1 - len(misses) / len(decided) if decided else None,
+            # Undecided inputs go to the LLM, which agrees with its own labels
+            "end_to_end_agreement": 1 - len(misses) / max(1, len(corpus)),
+            "misses": misses,
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agreement of the intent rules with the LLM classifier")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS)
+    parser.add_argument("--thresholds", default="0.7,0.8,0.9,0.95")
+    parser.add_argument("--relabel", help="label the corpus with the LLM classifier first and write it here")
+    parser.add_argument("--show-misses", action="store_true")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    if args.relabel:
+        corpus = relabel(corpus, args.relabel)
+
+    thresholds = [float(t) for t in args.thresholds.split(",")]
+    report = evaluate(corpus, thresholds)
+    if not args.relabel and os.path.abspath(args.corpus) == DEFAULT_CORPUS:
+        print("note: hand-labelled from the prompt rules, agreement is an upper bound; use --relabel to compare with the LLM")
+    print(f"{report['documents']} documents, {report['mean_score_us']:.0f} µs per rule scoring")
+    print(f"{'threshold':>9} {'decided':>8} {'coverage':>9} {'agreement':>10} {'end-to-end':>11}")
+    for threshold, row in report["thresholds"].items():
+        agreement = f"{row['agreement']:.1%}" if row["agreement"] is not None else "-"
+        print(f"{threshold:>9} {row['decided']:>8} {row['coverage']:>9.1%} {agreement:>10} {row['end_to_end_agreement']:>11.1%}")
+        if args.show_misses:
+            for miss in row["misses"]:
+                print(f"    {miss['label']} != {miss['rules']} ({miss['confidence']}, {','.join(miss['matched'])}): {miss['text'][:60]}")
+
+
+if __name__ == "__main__":
+    main()
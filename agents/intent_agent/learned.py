@@ -0,0 +1,307 @@
+# agents/intent_agent/learned.py
+"""
+Local intent model learned from logged LLM decisions.
+
+Every intent the LLM classifier decides is logged (config.json
+"learned": {"log_path": "temp/intent_decisions.jsonl"}) as a text
+fingerprint, the text's hashed character n-gram features and the chosen
+task_type; the text itself is not stored. Answers of a synthetic client
+(LLMClient.synthetic: stub server, cassette replay, LLM_SYNTHETIC) are not
+logged, as they are not the model's decisions. A small logistic regression
+over those features is trained from the log on CPU in seconds:
+
+    python -m agents.intent_agent.learned train --log temp/intent_decisions.jsonl --model temp/intent_model.json
+    python -m agents.intent_agent.learned evaluate --model temp/intent_model.json --test temp/corpus_llm.jsonl
+
+train holds out a share of the log (by fingerprint, so it is stable across
+retrains) and reports accuracy and coverage (share of inputs at or above the
+threshold) on it; evaluate does the same on any labelled set, e.g. the LLM
+labelled corpus written by `python -m agents.intent_agent.eval_rules --relabel`.
+
+IntentAgentTool runs the model after the rules and before the LLM: inputs
+it scores at or above "threshold" are classified locally. The model file is
+reloaded when a retrain replaces it; a file that fails to load is counted
+in stats()["load_errors"] and the LLM classifies until it is replaced.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+NGRAM_RANGE = (1, 3)
+MAX_CHARS = 1000        # the opening of a document carries its intent
+BUCKETS = 2 ** 18
+
+
+# =========================================================
+# Features
+# =========================================================
+def fingerprint(text: str) -> str:
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()[:16]
+
+
+def extract_features(text: str, max_chars: int = MAX_CHARS, buckets: int = BUCKETS) -> Dict[str, int]:
+    """Hashed character n-gram counts of the text's opening ({bucket: count}, bucket as str for JSON)."""
+    head = " ".join((text or "").split())[:max_chars].lower()
+    features: Dict[str, int] = {}
+    for n in range(NGRAM_RANGE[0], NGRAM_RANGE[1] + 1):
+        for i in range(len(head) - n + 1):
+            bucket = str(zlib.crc32(head[i:i + n].encode("utf-8")) % buckets)
+            features[bucket] = features.get(bucket, 0) + 1
+    return features
+
+
+def _vector(features: Dict[str, int]) -> Dict[str, float]:
+    """Binary features scaled to unit length."""
+    if not features:
+        return {}
+    value = 1.0 / math.sqrt(len(features))
+    return {bucket: value for bucket in features}
+
+
+def _sigmoid(z: float) -> float:
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+# =========================================================
+# Decision log
+# =========================================================
+_log_lock = threading.Lock()
+
+
+def log_decision(path: str, text: str, task_type: str, source: str = "llm") -> None:
+    """Append one classifier decision (fingerprint, features, task_type) to the JSONL log."""
+    row = {"fingerprint": fingerprint(text), "task_type": task_type, "source": source, "t": time.time(), "features": extract_features(text)}
+    line = json.dumps(row, ensure_ascii=False) + "\n"
+    with _log_lock:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def read_examples(path: str) -> List[Dict[str, Any]]:
+    """
+    Labelled examples {"fingerprint", "features", "label"} from a decision log
+    (latest decision per fingerprint) or from a {"text", "label"} corpus.
+    """
+    examples: Dict[str, Dict[str, Any]] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if "text" in row:
+                key = fingerprint(row["text"])
+                examples[key] = {"fingerprint": key, "features": extract_features(row["text"]), "label": row["label"]}
+            else:
+                examples[row["fingerprint"]] = {"fingerprint": row["fingerprint"], "features": row["features"], "label": row["task_type"]}
+    return list(examples.values())
+
+
+def split_holdout(examples: List[Dict[str, Any]], holdout: float) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(train, held out); membership depends only on the fingerprint."""
+    train, test = [], []
+    for example in examples:
+        share = int(example["fingerprint"][:8], 16) / 0xFFFFFFFF
+        (test if share < holdout else train).append(example)
+    return train, test
+
+
+# =========================================================
+# Model
+# =========================================================
+class LogisticIntentModel:
+    """Binary logistic regression on hashed n-gram features (scikit-style fit / predict_proba)."""
+
+    def __init__(self, epochs: int = 15, learning_rate: float = 0.5, l2: float = 1e-4, seed: int = 0):
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.classes: List[str] = []
+        self.bias = 0.0
+        self.weights: Dict[str, float] = {}
+        self.info: Dict[str, Any] = {}
+
+    def fit(self, features: List[Dict[str, int]], labels: List[str]) -> "LogisticIntentModel":
+        self.classes = sorted(set(labels))
+        if len(self.classes) != 2:
+            raise ValueError(f"[LogisticIntentModel.fit] need examples of exactly 2 task types, got {self.classes}")
+        rows = [(_vector(x), 1.0 if y == self.classes[1] else 0.0) for x, y in zip(features, labels)]
+        rng = random.Random(self.seed)
+        weights: Dict[str, float] = {}
+        bias = 0.0
+        for epoch in range(self.epochs):
+            rng.shuffle(rows)
+            rate = self.learning_rate / (1 + epoch)
+            for x, y in rows:
+                z = bias + sum(weights.get(f, 0.0) * v for f, v in x.items())
+                gradient = _sigmoid(z) - y
+                bias -= rate * gradient
+                for f, v in x.items():
+                    w = weights.get(f, 0.0)
+                    weights[f] = w - rate * (gradient * v + self.l2 * w)
+        self.bias = bias
+        self.weights = {f: w for f, w in weights.items() if abs(w) > 1e-6}
+        self.info = {"documents": len(rows), "features": len(self.weights)}
+        return self
+
+    def predict_proba(self, features: Dict[str, int]) -> Dict[str, float]:
+        z = self.bias + sum(self.weights.get(f, 0.0) * v for f, v in _vector(features).items())
+        p = _sigmoid(z)
+        return {self.classes[0]: 1 - p, self.classes[1]: p}
+
+    def predict(self, features: Dict[str, int]) -> Tuple[str, float]:
+        """(task_type, confidence)"""
+        proba = self.predict_proba(features)
+        task_type = max(proba, key=proba.get)
+        return task_type, proba[task_type]
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": 1, "classes": self.classes, "bias": self.bias, "weights": self.weights,
+                "ngram_range": list(NGRAM_RANGE), "max_chars": MAX_CHARS, "buckets": BUCKETS, "info": self.info,
+            }, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LogisticIntentModel":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        saved = (data.get("ngram_range"), data.get("max_chars"), data.get("buckets"))
+        if saved != (list(NGRAM_RANGE), MAX_CHARS, BUCKETS):
+            raise ValueError(
+                f"[LogisticIntentModel.load] {path} was trained on other features "
+                f"(ngram_range, max_chars, buckets = {saved}); retrain it"
+            )
+        model = cls()
+        model.classes, model.bias, model.weights = data["classes"], data["bias"], data["weights"]
+        model.info = data.get("info", {})
+        return model
+
+
+def evaluate(model: LogisticIntentModel, examples: Iterable[Dict[str, Any]], threshold: float) -> Dict[str, Any]:
+    """Accuracy on all examples, coverage at the threshold and accuracy on the covered ones."""
+    total = correct = covered = covered_correct = 0
+    for example in examples:
+        task_type, confidence = model.predict(example["features"])
+        total += 1
+        correct += task_type == example["label"]
+        if confidence >= threshold:
+            covered += 1
+            covered_correct += task_type == example["label"]
+    return {
+        "documents": total,
+        "accuracy": correct / total if total else None,
+        "coverage": covered / total if total else None,
+        "covered_accuracy": covered_correct / covered if covered else None,
+        "threshold": threshold,
+    }
+
+
+# =========================================================
+# Runtime
+# =========================================================
+class LearnedClassifier:
+    """First-stage classifier: the trained model, reloaded when its file changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded: Dict[str, Tuple[float, Optional[LogisticIntentModel]]] = {}
+        self._stats = {"calls": 0, "decided": 0, "no_model": 0, "load_errors": 0}
+
+    def _model(self, path: str) -> Optional[LogisticIntentModel]:
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._loaded.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            model = LogisticIntentModel.load(path)
+        except Exception:
+            # Corrupt or half-written model file: classify with the LLM until it is replaced
+            model = None
+            with self._lock:
+                self._stats["load_errors"] += 1
+        with self._lock:
+            self._loaded[path] = (mtime, model)
+        return model
+
+    def decide(self, text: str, model_path: Optional[str], threshold: float) -> Optional[Dict[str, Any]]:
+        """{"task_type", "confidence"} if the model is at least threshold sure, else None."""
+        model = self._model(model_path) if model_path else None
+        with self._lock:
+            self._stats["calls"] += 1
+            self._stats["no_model"] += 1 if model is None else 0
+        if model is None:
+            return None
+        task_type, confidence = model.predict(extract_features(text))
+        if confidence < threshold:
+            return None
+        with self._lock:
+            self._stats["decided"] += 1
+        return {"task_type": task_type, "confidence": round(confidence, 4)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["coverage"] = stats["decided"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+
+# =========================================================
+# CLI
+# =========================================================
+def _print_report(title: str, report: Dict[str, Any]) -> None:
+    def pct(value):
+        return f"{value:.1%}" if value is not None else "-"
+    print(f"{title}: {report['documents']} documents, accuracy {pct(report['accuracy'])}, "
+          f"coverage {pct(report['coverage'])} at {report['threshold']}, accuracy on covered {pct(report['covered_accuracy'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train / evaluate the local intent model on logged LLM decisions")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train = sub.add_parser("train", help="train on the decision log and report on a held-out share")
+    train.add_argument("--log", required=True, help="decision log (JSONL) or {text, label} corpus")
+    train.add_argument("--model", required=True, help="where to write the model (JSON)")
+    train.add_argument("--holdout", type=float, default=0.2)
+    train.add_argument("--threshold", type=float, default=0.95)
+    train.add_argument("--epochs", type=int, default=15)
+
+    test = sub.add_parser("evaluate", help="report accuracy and coverage on an LLM-labelled set")
+    test.add_argument("--model", required=True)
+    test.add_argument("--test", required=True, help="decision log (JSONL) or {text, label} corpus")
+    test.add_argument("--threshold", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train_set, held_out = split_holdout(read_examples(args.log), args.holdout)
+        model = LogisticIntentModel(epochs=args.epochs).fit([e["features"] for e in train_set], [e["label"] for e in train_set])
+        report = evaluate(model, held_out, args.threshold)
+        model.info["holdout"] = report
+        model.save(args.model)
+        print(f"trained on {len(train_set)} documents -> {args.model}")
+        _print_report("held out", report)
+    else:
+        _print_report("test", evaluate(LogisticIntentModel.load(args.model), read_examples(args.test), args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# agents/intent_agent/rules.py
+"""
+Rule-based fast path for intent classification.
+
+The classifier prompt spells several routes out deterministically: explicit
+requests ("幫我解釋", "give me the key points"), news leads with a dateline,
+and short definition / law / formula statements. RuleClassifier scores
+those patterns locally (microseconds, no LLM call) and returns a task type
+with a confidence; IntentAgentTool.classify only asks the LLM when the
+confidence is below its threshold ("rules": {"threshold": ...} in
+config.json).
+
+Each matching rule adds evidence for its task type:
+    score(type) = 1 - prod(1 - weight) over the matching rules of that type
+and the confidence of the winner is discounted by the evidence for the
+other type: score(winner) * (1 - score(other)). Conflicting requests
+("幫我解釋，再給我重點") therefore end up below the threshold and go to the LLM.
+
+Explicit-request rules only read the opening lines, where the user's own
+request is: an article that quotes "看不懂" further down is not asking for an
+explanation. URLs and code are removed before scanning, so their key=value
+pairs are not taken for formulas.
+
+Evaluate agreement with the LLM classifier on a labelled corpus with
+    python -m agents.intent_agent.eval_rules
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+KEYPOINT = "KEYPOINT"
+SYNTHESIS = "SYNTHESIS"
+
+REQUEST = "request"   # scanned in the opening lines only
+HEAD = "head"         # scanned in the first max_chars characters
+
+# (name, task type, weight, scope, pattern)
+DEFAULT_RULES: List[Tuple[str, str, float, str, str]] = [
+    # Explicit requests (prompt rule 3)
+    ("ask_explain_zh", SYNTHESIS, 0.97, REQUEST, r"幫我(理解|說明|解釋|解析)|教我(怎麼|如何)|請(解釋|說明)一下|看不懂"),
+    ("ask_explain_en", SYNTHESIS, 0.95, REQUEST, r"(?i)\b(help me understand|explain (this|it|that|the)|walk me through|make it easier to learn|organi[sz]e this for study)\b"),
+    ("ask_keypoints_zh", KEYPOINT, 0.95, REQUEST, r"(給我|列出|整理|抓出?|幫我[^。\n]{0,6})(重點|摘要)|重點整理|懶人包|簡短版"),
+    ("ask_keypoints_en", KEYPOINT, 0.95, REQUEST, r"(?i)\b(give me|list|what are) (the )?(key ?points|main points|highlights)\b|\btl;?dr\b|\bsummari[sz]e (this|it|the)\b|\bshort version\b|\bbullet points\b"),
+    # News leads with a dateline (prompt rule 4)
+    ("dateline_zh", KEYPOINT, 0.9, HEAD, r"[（(【〔]?(中央社|聯合報|自由時報|記者)[^\n]{0,20}(\d{1,2}日|電|報導)|[／/][^\n]{0,8}報導[】)]"),
+    ("dateline_en", KEYPOINT, 0.9, HEAD, r"^[A-Z][A-Za-z .]+,? ([A-Z][a-z]{2,8}\.? \d{1,2} )?\((AP|Reuters|AFP|Bloomberg)\)"),
+    ("incident_report_zh", KEYPOINT, 0.8, HEAD, r"\d{1,2}日[^。\n]{0,20}(時|晚間|上午|下午|凌晨)[^。\n]*(警方|檢方|消防|法院|宣布|發生)"),
+    # Definitions, laws, formulas (prompt rule 5)
+    ("law_or_definition_zh", SYNTHESIS, 0.85, HEAD, r"(定律|定理|定義為|是指|公式|方程式?)"),
+    ("law_or_definition_en", SYNTHESIS, 0.85, HEAD, r"(?i)\b(law|theorem|is defined as|states that|equation|formula)\b"),
+    ("formula", SYNTHESIS, 0.7, HEAD, r"(?<![\w?&/.:=-])[A-Za-zΔ∂][\w']*\s*=\s*[\w∂Δ(][^=\n]{0,40}"),
+]
+
+# URLs, fenced and inline code: their key=value pairs are not formulas
+NOT_PROSE = re.compile(r"https?://\S+|www\.\S+|```.*?```|`[^`\n]*`", re.DOTALL)
+
+
+class RuleClassifier:
+    """Scores the intent rules on a text; decide() returns None below the threshold."""
+
+    def __init__(
+        self,
+        rules: Optional[List[Tuple[str, str, float, str, str]]] = None,
+        threshold: float = 0.9,
+        max_chars: int = 4000,
+        request_lines: int = 2,
+        request_chars: int = 200,
+    ):
+        self.rules = [
+            (name, task_type, weight, scope, re.compile(pattern, re.MULTILINE))
+            for name, task_type, weight, scope, pattern in (rules or DEFAULT_RULES)
+        ]
+        self.threshold = threshold
+        # Only the beginning is scanned: requests and datelines come first
+        self.max_chars = max_chars
+        # A request is the first non-empty line(s), not anything the document quotes
+        self.request_lines = request_lines
+        self.request_chars = request_chars
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {"calls": 0, "decided": 0, "by_rule": {}}
+
+    def score(self, text: str) -> Dict[str, Any]:
+        """{"task_type", "confidence", "rules"} for a text (task_type None when no rule matches)."""
+        head = NOT_PROSE.sub(" ", (text or "")[: self.max_chars])
+        opening = "\n".join([line for line in head.splitlines() if line.strip()][: self.request_lines])[: self.request_chars]
+        scanned = {REQUEST: opening, HEAD: head}
+        matched = [
+            (name, task_type, weight)
+            for name, task_type, weight, scope, pattern in self.rules
+            if pattern.search(scanned[scope])
+        ]
+
+        miss = {KEYPOINT: 1.0, SYNTHESIS: 1.0}
+        for _, task_type, weight in matched:
+            miss[task_type] *= 1 - weight
+        scores = {task_type: 1 - m for task_type, m in miss.items()}
+        if not matched:
+            return {"task_type": None, "confidence": 0.0, "rules": []}
+
+        winner = max(scores, key=lambda t: (scores[t], t == SYNTHESIS))
+        other = KEYPOINT if winner == SYNTHESIS else SYNTHESIS
+        return {
+            "task_type": winner,
+            "confidence": round(scores[winner] * (1 - scores[other]), 4),
+            "rules": [name for name, task_type, _ in matched if task_type == winner],
+        }
+
+    def decide(self, text: str, threshold: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """The score if it reaches the threshold, else None (ask the LLM)."""
+        scored = self.score(text)
+        decided = scored["task_type"] is not None and scored["confidence"] >= (self.threshold if threshold is None else threshold)
+        with self._lock:
+            self._stats["calls"] += 1
+            if decided:
+                self._stats["decided"] += 1
+                for name in scored["rules"]:
+                    self._stats["by_rule"][name] = self._stats["by_rule"].get(name, 0) + 1
+        return scored if decided else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls, calls decided locally (LLM calls saved), their share and the rules that decided them."""
+        with self._lock:
+            stats = {**self._stats, "by_rule": dict(self._stats["by_rule"])}
+        stats["coverage"] = stats["decided"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
@@ -1,5 +1,5 @@
 # agents/intent_agent/schema.py
-from typing import TypedDict
+from typing import Optional, TypedDict
 from agents.mycore.base_schema import BaseSchema
 
 # ========================================================
@@ -7,6 +7,7 @@ from agents.mycore.base_schema import BaseSchema
 # ========================================================
 class IntentAgentState(TypedDict):
     input_text            : str
+    input_pages           : Optional[int]   # page count of an uploaded file (excerpt header)
     task_type_candidate   : str
 
 # ========================================================
@@ -32,7 +33,8 @@ class IntentAgentSchema(BaseSchema):
     state_mapping = {
         "check_input_intent": {
             "input": {
-                "input_text": "input_text"
+                "input_text": "input_text",
+                "input_pages": "input_pages"
             },
             "output": {
                 "task_type_candidate": "selected_task_type"
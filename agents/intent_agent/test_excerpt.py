@@ -0,0 +1,66 @@
+# agents/intent_agent/test_excerpt.py
+from types import SimpleNamespace
+
+from agents.intent_agent.excerpt import build_excerpt, structure_hints
+from agents.intent_agent.tool import IntentAgentTool
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.tokens import estimate_tokens
+
+OPENING = "第一章 熱力學第二定律\n熵的定義為 S = k ln W，其中 W 為系統的微觀狀態數。"
+CLOSING = "本講義到此結束，下週進入統計力學。"
+
+
+def _document(pages: int) -> str:
+    page = "\n".join(f"第{i}節 可逆過程\n在可逆過程中，系統與外界的總熵保持不變，而不可逆過程使總熵增加。" for i in range(20))
+    return OPENING + "\n" + "\n".join([page] * pages) + "\n" + CLOSING
+
+
+def test_long_documents_become_a_bounded_excerpt():
+    short = "歐姆定律：V = IR，電壓等於電流乘以電阻。"
+    assert build_excerpt(short, max_tokens=1500) == short
+
+    document = _document(300)
+    hints = structure_hints(document, pages=300)
+    assert hints["pages"] == 300 and hints["headings"] > 6000
+    assert structure_hints(document)["pages"] is None
+
+    excerpt = build_excerpt(document, max_tokens=1500, pages=300)
+    assert estimate_tokens(excerpt) <= 1500
+    assert excerpt.startswith("[Excerpt of a longer document:") and "300 pages" in excerpt
+    assert OPENING.splitlines()[1] in excerpt and excerpt.endswith(CLOSING)
+    assert "[Middle, sampled paragraphs]" in excerpt
+
+    # Deterministic, so the response cache still applies
+    assert build_excerpt(document, max_tokens=1500, pages=300) == excerpt
+    print("Test passed!")
+
+
+def test_classify_sends_the_excerpt():
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"task_type": "SYNTHESIS"}'), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=900, completion_tokens=10),
+        )
+
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    tool = IntentAgentTool(client)
+
+    # Prose the rules cannot decide, so the classifier is asked
+    document = "\n".join(["夜晚的山像沉睡的巨獸，而我在獸腹之中，聽見風穿過樹梢的聲音。" * 40] * 100)
+    assert tool.classify(document, pages=100) == {"task_type": "SYNTHESIS"}
+    user = calls[0]["messages"][-1]["content"]
+    assert estimate_tokens(user) < 1600 and "100 pages" in user
+    assert "excerpt" not in calls[0]
+
+    user_prompt, _, _ = tool.classify_request(document, excerpt={"enabled": False})
+    assert document in user_prompt
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_long_documents_become_a_bounded_excerpt()
+    test_classify_sends_the_excerpt()
@@ -0,0 +1,158 @@
+# agents/intent_agent/test_learned.py
+import json
+import os
+import random
+import tempfile
+from types import SimpleNamespace
+
+from agents.intent_agent.learned import (
+    LogisticIntentModel, evaluate, log_decision, read_examples, split_holdout,
+)
+from agents.intent_agent.tool import IntentAgentTool
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.cassette import Cassette
+from agents.mycore.stub_server import StubServer
+
+PLACES = ["台北", "高雄", "台中", "新竹", "花蓮", "台南", "嘉義", "基隆"]
+AGENCIES = ["市府", "交通部", "衛福部", "經濟部", "教育部", "環境部", "內政部"]
+EVENTS = ["宣布調整公車路線", "公布上半年失業率", "召開記者會說明颱風災情", "發布停班停課消息", "宣布明年預算編列方向"]
+CONCEPTS = ["熵", "邊際效用", "光合作用", "比較利益", "動量守恆", "自然選擇", "供需均衡"]
+ANGLES = ["可以從能量流動的角度來看", "背後的直覺在於取捨", "常被誤解為單純的數量變化", "讓我們能預測系統的長期行為"]
+
+
+def _corpus(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        if i % 2:
+            text = f"{rng.choice(PLACES)}{rng.choice(AGENCIES)}今天{rng.choice(EVENTS)}，相關措施將於下月起實施，民眾可上網查詢。第{i}則"
+            rows.append({"text": text, "label": "KEYPOINT"})
+        else:
+            text = f"{rng.choice(CONCEPTS)}這個概念{rng.choice(ANGLES)}，理解它有助於我們思考日常生活中的選擇與結果。第{i}篇"
+            rows.append({"text": text, "label": "SYNTHESIS"})
+    return rows
+
+
+def test_model_learns_from_the_decision_log():
+    with tempfile.TemporaryDirectory() as tmp:
+        log = os.path.join(tmp, "decisions.jsonl")
+        for row in _corpus(200):
+            log_decision(log, row["text"], row["label"])
+
+        # The log keeps features and a fingerprint, not the text
+        with open(log, "r", encoding="utf-8") as f:
+            first = json.loads(f.readline())
+        assert "text" not in first and len(first["fingerprint"]) == 16 and first["features"]
+
+        examples = read_examples(log)
+        train, held_out = split_holdout(examples, 0.25)
+        assert len(examples) == 200 and 20 < len(held_out) < 80
+        assert split_holdout(examples, 0.25)[1] == held_out
+
+        model = LogisticIntentModel().fit([e["features"] for e in train], [e["label"] for e in train])
+        report = evaluate(model, held_out, 0.8)
+        assert report["accuracy"] >= 0.95
+        assert report["coverage"] > 0.5 and report["covered_accuracy"] >= 0.95
+
+        path = os.path.join(tmp, "model.json")
+        model.save(path)
+        assert evaluate(LogisticIntentModel.load(path), held_out, 0.8) == report
+
+        # A model trained on other features would score garbage: it is refused
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        saved["buckets"] //= 2
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+        try:
+            LogisticIntentModel.load(path)
+            assert False, "a model with other feature settings should not load"
+        except ValueError as e:
+            assert "retrain" in str(e)
+    print("Test passed!")
+
+
+def test_classify_logs_llm_decisions_then_answers_locally():
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        label = "KEYPOINT" if "今天" in request["messages"][-1]["content"] else "SYNTHESIS"
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({"task_type": label})), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=900, completion_tokens=10),
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = {"log_path": os.path.join(tmp, "decisions.jsonl"), "model_path": os.path.join(tmp, "model.json"), "threshold": 0.8}
+
+        class _Tool(IntentAgentTool):
+            def _learned_settings(self):
+                return settings
+
+        client = LLMClient("test-key", {"model": "gpt-5-nano"})
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        tool = _Tool(client)
+
+        corpus = _corpus(120)
+        for row in corpus[:100]:
+            assert tool.classify(row["text"]) == {"task_type": row["label"]}
+        assert len(calls) == 100 and "learned" not in calls[0]
+        assert len(read_examples(settings["log_path"])) == 100
+
+        examples = read_examples(settings["log_path"])
+        LogisticIntentModel().fit([e["features"] for e in examples], [e["label"] for e in examples]).save(settings["model_path"])
+
+        # The retrained model is picked up without a restart
+        answers = [tool.classify(row["text"])["task_type"] for row in corpus[100:]]
+        assert answers == [row["label"] for row in corpus[100:]]
+        stats = tool.learned.stats()
+        assert stats["decided"] > 10 and len(calls) == 100 + 20 - stats["decided"]
+
+        # A corrupt model file is counted and the LLM answers instead
+        with open(settings["model_path"], "w", encoding="utf-8") as f:
+            f.write("{not json")
+        os.utime(settings["model_path"], (0, 0))
+        assert tool.classify(corpus[100]["text"]) == {"task_type": corpus[100]["label"]}
+        assert tool.learned.stats()["load_errors"] == 1 and len(calls) == 100 + 20 - stats["decided"] + 1
+    print("Test passed!")
+
+
+def test_synthetic_answers_are_not_logged():
+    def create(**request):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"task_type": "SYNTHESIS"}'), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=5),
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = {"enabled": False, "log_path": os.path.join(tmp, "decisions.jsonl")}
+
+        class _Tool(IntentAgentTool):
+            def _learned_settings(self):
+                return settings
+
+        text = "夜晚的山像沉睡的巨獸，而我在獸腹之中，聽見風穿過樹梢的聲音。"
+        fake = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+        fake.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        assert fake.synthetic and _Tool(fake).classify(text) == {"task_type": "SYNTHESIS"}
+        assert not os.path.exists(settings["log_path"])
+
+        # A cassette replays made-up answers; recording through one keeps the model's
+        assert LLMClient("test-key", {"model": "gpt-5-nano"}, cassette=Cassette(os.path.join(tmp, "c.json"))).synthetic
+        assert not LLMClient("test-key", {"model": "gpt-5-nano"}, cassette=Cassette(os.path.join(tmp, "c.json"), mode="record")).synthetic
+        with StubServer() as server:
+            assert server.client().synthetic
+
+        # A local deployment (e.g. llama.cpp on localhost) is a real model: logged
+        local = LLMClient("local", {"model": "gpt-5-nano"}, base_url="http://127.0.0.1:8080/v1")
+        local.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        assert _Tool(local).classify(text) == {"task_type": "SYNTHESIS"}
+        assert len(read_examples(settings["log_path"])) == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_model_learns_from_the_decision_log()
+    test_classify_logs_llm_decisions_then_answers_locally()
+    test_synthetic_answers_are_not_logged()
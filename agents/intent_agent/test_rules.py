@@ -0,0 +1,69 @@
+# agents/intent_agent/test_rules.py
+from types import SimpleNamespace
+
+from agents.intent_agent.eval_rules import DEFAULT_CORPUS, evaluate, load_corpus
+from agents.intent_agent.rules import RuleClassifier
+from agents.intent_agent.tool import IntentAgentTool
+from agents.mycore.LLMclient import LLMClient
+
+
+def test_rules_decide_obvious_inputs_only():
+    rules = RuleClassifier(threshold=0.9)
+
+    assert rules.decide("請幫我解釋這段話：人生如逆旅，我亦是行人。")["task_type"] == "SYNTHESIS"
+    assert rules.decide("（中央社記者王小明台北16日電）立法院今天三讀通過電業法修正草案。")["task_type"] == "KEYPOINT"
+    assert rules.decide("歐姆定律：V = IR，電壓等於電流乘以電阻。")["task_type"] == "SYNTHESIS"
+
+    # Conflicting request and plain prose are left to the LLM
+    assert rules.decide("幫我解釋，再給我重點：央行宣布升息半碼。") is None
+    assert rules.decide("白日依山盡，黃河入海流。") is None
+
+    # A request quoted inside the document is not the user's request
+    assert rules.decide("市府今天公布補助新制。\n\n申請流程分三階段。\n\n不少長輩直言「看不懂」，希望有人教我如何填表。") is None
+    # key=value in URLs and code is not a formula
+    assert rules.score("公式推導請見 https://example.com/doc?id=3&lang=zh")["rules"] == ["law_or_definition_zh"]
+    assert rules.score("把 `retries=3` 寫進設定檔：\n```\nx = run(job, retries=3)\n```")["rules"] == []
+
+    stats = rules.stats()
+    assert stats["calls"] == 6 and stats["decided"] == 3
+
+    report = evaluate(load_corpus(DEFAULT_CORPUS), [0.9])
+    assert report["thresholds"][0.9]["coverage"] > 0.3
+    assert report["thresholds"][0.9]["agreement"] >= 0.9
+    print("Test passed!")
+
+
+def test_classify_skips_the_llm_when_rules_are_confident():
+    calls = []
+
+    def create(**request):
+        calls.append(request)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='{"task_type": "SYNTHESIS"}'), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=900, completion_tokens=10),
+        )
+
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    class _Tool(IntentAgentTool):
+        def _rule_settings(self):
+            return {"enabled": True, "threshold": 0.9}
+
+    tool = _Tool(client)
+
+    assert tool.classify("給我重點就好：市府今日宣布明年起調漲公車票價。") == {"task_type": "KEYPOINT"}
+    assert calls == []
+
+    assert tool.classify("白日依山盡，黃河入海流。") == {"task_type": "SYNTHESIS"}
+    assert len(calls) == 1 and "rules" not in calls[0]
+
+    # Off by default (config.json): the threshold is not validated against the LLM
+    IntentAgentTool(client).classify("給我重點就好：市府今日宣布明年起調漲公車票價。")
+    assert len(calls) == 2
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_rules_decide_obvious_inputs_only()
+    test_classify_skips_the_llm_when_rules_are_confident()
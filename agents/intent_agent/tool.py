@@ -1,6 +1,10 @@
 # agents/intent_agent/tool.py
 from agents.mycore.LLMclient import LLMClient
 from agents.mycore.base_tool import BaseTool,auto_wrap_error
+from agents.intent_agent.rules import RuleClassifier
+from agents.intent_agent.learned import LearnedClassifier, log_decision
+from agents.intent_agent.excerpt import intent_input
+from typing import Optional
 import json
 import os
 
@@ -10,6 +14,10 @@ class IntentAgentTool(BaseTool):
     def __init__(self, client: LLMClient):
         super().__init__()
         self.client =  client
+        # Local fast path: obvious inputs are classified without an LLM call
+        self.rules  =  RuleClassifier()
+        # Second stage: model trained on logged LLM decisions (agents/intent_agent/learned.py)
+        self.learned = LearnedClassifier()
 
     def _readjson(self, path: str) -> dict:
         try:
@@ -18,8 +26,13 @@ class IntentAgentTool(BaseTool):
         except Exception as e:
             raise RuntimeError(f"Failed to read JSON file: {path}") from e
     
-    @auto_wrap_error   
-    def classify(self, text: str) -> dict:
+    def classify_request(self, text: str, excerpt: Optional[dict] = None, pages: Optional[int] = None) -> tuple:
+        """
+        Build (user_prompt, system_prompt, config) for the classify step.
+        Long documents are cut to a bounded excerpt (config.json "excerpt", or
+        the excerpt argument; {"enabled": False} sends the full text); pages
+        is the source file's page count, shown in the excerpt header.
+        """
         system_prompt = (
             "You are an intent classifier for summarization tasks. Your job is NOT to classify the text type itself,\n"
             "but to decide *why* a typical user would read this text, and therefore which summarization mode is\n"
@@ -112,16 +125,72 @@ class IntentAgentTool(BaseTool):
             "\n"
         )
 
+        current_config = self._readjson(CONFIG_1_PATH)
+        current_config.pop("rules", None)
+        current_config.pop("learned", None)
+        settings = current_config.pop("excerpt", None)
+
         user_prompt = (
             "Classify the intent of the following user request according to the system rules.\n"
-            f"User request (or text): {text}"
+            f"User request (or text): {intent_input(text, settings if excerpt is None else excerpt, pages)}"
         )
-        
-        current_config = self._readjson(CONFIG_1_PATH)
-        response = self.client.invoke(user_prompt, system_prompt, current_config) 
-        
-        result = json.loads(response["content"])
+        return user_prompt, system_prompt, current_config
+
+    def _rule_settings(self) -> dict:
+        return self._readjson(CONFIG_1_PATH).get("rules") or {}
+
+    def _rule_decision(self, text: str) -> Optional[dict]:
+        """{"task_type": ...} if the rules are enabled and confident enough (config.json "rules"), else None."""
+        settings = self._rule_settings()
+        if not settings.get("enabled", False):
+            return None
+        decided = self.rules.decide(text or "", settings.get("threshold"))
+        return {"task_type": decided["task_type"]} if decided else None
+
+    def _learned_settings(self) -> dict:
+        return self._readjson(CONFIG_1_PATH).get("learned") or {}
+
+    def _local_decision(self, text: str) -> Optional[dict]:
+        """Rules first, then the learned model; None means ask the LLM."""
+        decided = self._rule_decision(text)
+        if decided is not None:
+            return decided
+        settings = self._learned_settings()
+        if not settings.get("enabled", True):
+            return None
+        decided = self.learned.decide(text or "", settings.get("model_path"), settings.get("threshold", 0.95))
+        return {"task_type": decided["task_type"]} if decided else None
+
+    def _log_decision(self, text: str, result: dict) -> None:
+        """
+        Keep the LLM's decision as training data for the learned model
+        (config.json "learned": {"log_path"}). Answers of a synthetic client
+        (stub server, fake client, cassette replay; LLMClient.synthetic) are not the model's.
+        """
+        path = self._learned_settings().get("log_path")
+        if not path or getattr(self.client, "synthetic", False):
+            return
+        if isinstance(result, dict) and result.get("task_type"):
+            log_decision(path, text or "", result["task_type"])
+
+    @auto_wrap_error   
+    def classify(self, text: str, pages: Optional[int] = None) -> dict:
+        decided = self._local_decision(text)
+        if decided is not None:
+            return decided
+
+        result = self.client.invoke_json(*self.classify_request(text, pages=pages))
+        self._log_decision(text, result)
 
         # Removed: result.get("task_type", "KEYPOINT")
         # Reason: Return type is dictionary, no need to extract and re-wrap the value
+        return result
+
+    @auto_wrap_error
+    async def aclassify(self, text: str, pages: Optional[int] = None) -> dict:
+        decided = self._local_decision(text)
+        if decided is not None:
+            return decided
+        result = await self.client.ainvoke_json(*self.classify_request(text, pages=pages))
+        self._log_decision(text, result)
         return result
\ No newline at end of file
@@ -15,13 +15,31 @@ class KeypointAgent(BaseGraph):
         self.state_mapping = KeypointAgentSchema.state_mapping
         self.tools = KeypointAgentTool(llm_client)
 
+    # identify_protagonist / infer_focus_aspects keep values prefilled by
+    # TopController's shared pre-analysis stage and only call the LLM without them
     def identify_protagonist(self, state: dict) -> dict:
+        if state.get("protagonist"):
+            return {"protagonist": state["protagonist"]}
         out = self.tools.get_protagonist(state.get("input_text"))
         return {"protagonist": out["protagonist"]}
+
+    async def aidentify_protagonist(self, state: dict) -> dict:
+        if state.get("protagonist"):
+            return {"protagonist": state["protagonist"]}
+        out = await self.tools.aget_protagonist(state.get("input_text"))
+        return {"protagonist": out["protagonist"]}
     
     def infer_focus_aspects(self, state: dict) -> dict:
+        if state.get("focus_aspects"):
+            return {"focus_aspects": state["focus_aspects"]}
         out = self.tools.get_focus_aspects(state.get("input_text"), state.get("protagonist"))
         return {"focus_aspects": out["focus_aspects"]}
+
+    async def ainfer_focus_aspects(self, state: dict) -> dict:
+        if state.get("focus_aspects"):
+            return {"focus_aspects": state["focus_aspects"]}
+        out = await self.tools.aget_focus_aspects(state.get("input_text"), state.get("protagonist"))
+        return {"focus_aspects": out["focus_aspects"]}
     
     def extract_keypoints(self, state: dict) -> dict:
         out = self.tools.get_keypoints(
@@ -29,6 +47,18 @@ class KeypointAgent(BaseGraph):
             state.get("protagonist"),
             state.get("focus_aspects", []),
         )
+        return self.keypoints_update(state, out)
+
+    async def aextract_keypoints(self, state: dict) -> dict:
+        out = await self.tools.aget_keypoints(
+            state.get("input_text"),
+            state.get("protagonist"),
+            state.get("focus_aspects", []),
+        )
+        return self.keypoints_update(state, out)
+
+    def keypoints_update(self, state: dict, out: dict) -> dict:
+        """State update for a keypoints answer (also used by batch_runner.py)."""
         # assemble final object (JSON string for TopController)
         final_obj = {
             "protagonist": state.get("protagonist", "Unknown"),
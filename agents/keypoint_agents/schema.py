@@ -35,7 +35,10 @@ class KeypointAgentSchema(BaseSchema):
     state_mapping = {
         "extract_keypoints": {
             "input": {
-                "input_text": "input_text"
+                "input_text": "input_text",
+                # Filled by the shared pre-analysis stage; computed here when absent
+                "protagonist": "protagonist",
+                "focus_aspects": "focus_aspects"
             },
             "output": {
                 "keypoint_result": "final_result_text"
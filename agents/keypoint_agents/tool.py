@@ -2,11 +2,15 @@
 
 from agents.mycore.LLMclient import LLMClient
 from agents.mycore.base_tool import BaseTool, auto_wrap_error
+from agents.mycore.json_stream import stream_json_fields, astream_json_fields
+# Shared with the other document steps, so they all hit one cached prompt prefix
+from agents.mycore.prompts import DOCUMENT_SYSTEM_PROMPT as SYSTEM_PROMPT
 import json
 import os
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
 
+
 class KeypointAgentTool(BaseTool):
     def __init__(self, client: LLMClient):
         super().__init__()
@@ -18,7 +22,7 @@ class KeypointAgentTool(BaseTool):
                 return json.load(f)
         except Exception as e:
             raise RuntimeError(f"Failed to read JSON file: {path}") from e
-            
+
     def _with_schema(self, base_cfg: dict, schema: dict) -> dict:
         cfg = dict(base_cfg)
         cfg["response_format"] = {
@@ -30,17 +34,19 @@ class KeypointAgentTool(BaseTool):
             }
         }
         return cfg
-    
-    @auto_wrap_error
-    def get_protagonist(self, text: str) -> dict:
+
+    def _invoke_and_parse(self, request: tuple) -> dict:
+        # Parsed and validated; escalates along config["cascade"]["models"]
+        return self.client.invoke_json(*request)
+
+    async def _ainvoke_and_parse(self, request: tuple) -> dict:
+        return await self.client.ainvoke_json(*request)
+
+    def protagonist_request(self, text: str) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the protagonist step."""
         text = (text or "").strip()
 
-        system_prompt = (
-            "Identify the MAIN SUBJECT (protagonist) of the input.\n"
-            "Return ONLY one JSON object using double quotes.\n"
-            "No extra text.\n"
-        )
-        user_prompt = "Input:\n\n" + text
+        user_prompt = "Identify the MAIN SUBJECT (protagonist) of the input.\n"
 
         schema = {
             "name": "protagonist_only",
@@ -53,25 +59,28 @@ class KeypointAgentTool(BaseTool):
         }
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, schema)
-        raw = self.client.invoke(user_prompt, system_prompt, cfg)["content"].strip()
-        return json.loads(raw)
-        
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
+
     @auto_wrap_error
-    def get_focus_aspects(self, text: str, protagonist: str) -> dict:
+    def get_protagonist(self, text: str) -> dict:
+        return self._invoke_and_parse(self.protagonist_request(text))
+
+    @auto_wrap_error
+    async def aget_protagonist(self, text: str) -> dict:
+        return await self._ainvoke_and_parse(self.protagonist_request(text))
+
+    def focus_aspects_request(self, text: str, protagonist: str) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the focus-aspects step."""
         text = (text or "").strip()
         protagonist = (protagonist or "").strip()
-    
-        system_prompt = (
+
+        user_prompt = (
             "Infer 2–6 focus aspects that best capture what matters in the input.\n"
             "The aspects are NOT a fixed taxonomy; infer topic-dependent aspects.\n"
-            "Return ONLY one JSON object using double quotes.\n"
-            "No extra text.\n"
-        )
-        user_prompt = (
+            "\n"
             f"Protagonist: {protagonist}\n"
-            "Input:\n\n" + text
         )
-    
+
         schema = {
             "name": "focus_aspects_only",
             "schema": {
@@ -88,17 +97,24 @@ class KeypointAgentTool(BaseTool):
                 "additionalProperties": False
             }
         }
-    
+
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, schema)
-        raw = self.client.invoke(user_prompt, system_prompt, cfg)["content"].strip()
-        return json.loads(raw)
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
 
     @auto_wrap_error
-    def get_keypoints(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+    def get_focus_aspects(self, text: str, protagonist: str) -> dict:
+        return self._invoke_and_parse(self.focus_aspects_request(text, protagonist))
+
+    @auto_wrap_error
+    async def aget_focus_aspects(self, text: str, protagonist: str) -> dict:
+        return await self._ainvoke_and_parse(self.focus_aspects_request(text, protagonist))
+
+    def keypoints_request(self, text: str, protagonist: str, focus_aspects: list) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the keypoints step."""
         text = (text or "").strip()
 
-        system_prompt = (
+        user_prompt = (
             "You are a professional keypoint summarizer.\n"
             "\n"
             "Task:\n"
@@ -125,11 +141,9 @@ class KeypointAgentTool(BaseTool):
             "Fallback:\n"
             "If meaningful keypoints cannot be extracted, output:\n"
             "{\"keypoints\":[\"No clear keypoints can be extracted from the input.\"]}\n"
-        )
-        user_prompt = (
+            "\n"
             f"Protagonist: {protagonist}\n"
             f"Focus aspects: {focus_aspects}\n"
-            "Input:\n\n" + text
         )
 
         schema = {
@@ -151,15 +165,24 @@ class KeypointAgentTool(BaseTool):
 
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, schema)
-        raw = self.client.invoke(user_prompt, system_prompt, cfg)["content"].strip()
-        return json.loads(raw)
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
 
-        current_config = self._readjson(CONFIG_PATH)
-        response = self.client.invoke(user_prompt, system_prompt, current_config)
+    @auto_wrap_error
+    def get_keypoints(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+        return self._invoke_and_parse(self.keypoints_request(text, protagonist, focus_aspects))
 
-        raw = response.get("content", None)
-        raw = "" if raw is None else str(raw).strip()
-        if not raw:
-            raise Exception("LLM returned empty content")
+    @auto_wrap_error
+    async def aget_keypoints(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+        return await self._ainvoke_and_parse(self.keypoints_request(text, protagonist, focus_aspects))
+
+    @auto_wrap_error
+    def stream_keypoints(self, text: str, protagonist: str, focus_aspects: list):
+        """Streaming get_keypoints(): yields keypoints[i] as each one closes, then a "final" event."""
+        request = self.keypoints_request(text, protagonist, focus_aspects)
+        yield from stream_json_fields(self.client.invoke_stream(*request))
 
-        return json.loads(raw)
+    @auto_wrap_error
+    async def astream_keypoints(self, text: str, protagonist: str, focus_aspects: list):
+        request = self.keypoints_request(text, protagonist, focus_aspects)
+        async for event in astream_json_fields(self.client.ainvoke_stream(*request)):
+            yield event
@@ -1,6 +1,62 @@
 # agents/mycore/llm_client.py
-from openai import OpenAI
-from typing import Dict, Any
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from openai import OpenAI, AsyncOpenAI
+from typing import Dict, Any, Optional
+
+from agents.mycore.transport import TransportPool, shared_transport_pool
+from agents.mycore.cache import TieredCache, make_request_key, is_cacheable
+from agents.mycore.scheduler import LLMScheduler
+from agents.mycore.singleflight import SingleFlight
+from agents.mycore.tokens import TokenBudget
+from agents.mycore.ledger import TokenLedger, usage_details, current_tags, ledger_tags, meter_usage
+from agents.mycore.cascade import CascadeStats, check_output
+from agents.mycore.hedging import Hedger
+from agents.mycore.breaker import CircuitBreaker, CircuitOpenError, OPEN
+from agents.mycore.endpoint_pool import EndpointPool, endpoint_route, current_route
+from agents.mycore.micro_batch import MicroBatcher, batching_enabled
+from agents.mycore.cassette import Cassette
+from agents.mycore.profiles import ProfileRegistry
+
+
+class _StreamState:
+    """Accumulates a streamed completion into the standardized response object."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.time_to_first_token = None
+        self.parts = []
+        self.finish_reason = None
+        self.usage = None
+
+    def add(self, chunk) -> str:
+        """Record one chunk; return its content delta ("" if none)."""
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage
+        if not chunk.choices:
+            return ""
+        choice = chunk.choices[0]
+        if choice.finish_reason is not None:
+            self.finish_reason = choice.finish_reason
+        delta = choice.delta.content or ""
+        if delta:
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.monotonic() - self.started
+            self.parts.append(delta)
+        return delta
+
+    def result(self) -> Dict[str, Any]:
+        if self.finish_reason != "stop":
+            raise Exception(f"LLM response incomplete: {self.finish_reason}")
+        return {
+            "content": "".join(self.parts),
+            "tokens_in": self.usage.prompt_tokens if self.usage else 0,
+            "tokens_out": self.usage.completion_tokens if self.usage else 0,
+            **usage_details(self.usage),
+            "api_calls": 1,
+        }
 
 
 class LLMClient:
@@ -9,7 +65,26 @@ class LLMClient:
     Handles only communication (input/output), not prompt formatting or parsing.
     """
 
-    def __init__(self, api_key: str, default_config: Dict[str, Any]):
+    def __init__(
+        self,
+        api_key: str,
+        default_config: Dict[str, Any],
+        transport: Optional[TransportPool] = None,
+        cache: Optional[TieredCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        singleflight: Optional[SingleFlight] = None,
+        budget: Optional[TokenBudget] = None,
+        base_url: Optional[str] = None,
+        ledger: Optional[TokenLedger] = None,
+        cascade: Optional[CascadeStats] = None,
+        hedger: Optional[Hedger] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        pool: Optional[EndpointPool] = None,
+        batcher: Optional[MicroBatcher] = None,
+        cassette: Optional[Cassette] = None,
+        profiles: Optional[ProfileRegistry] = None,
+        synthetic: bool = False,
+    ):
         """
         Initialize the LLM client.
 
@@ -25,10 +100,143 @@ class LLMClient:
                                        "frequency_penalty": 0,
                                        "response_format": {"type": "text"}
                                    }
+            transport (TransportPool | None): Connection pool shared by the
+                                   worker process. Defaults to the process-wide
+                                   shared pool.
+            cache (TieredCache | None): Response cache. Only configs that are
+                                   deterministic or set "cache": true are cached.
+            scheduler (LLMScheduler | None): Rate-limit aware admission control
+                                   and retries. When set, the OpenAI SDK's own
+                                   retries are disabled so they are not doubled.
+            singleflight (SingleFlight | None): Coalesces identical concurrent
+                                   requests (same request hash) into one API
+                                   call; followers get the leader's result.
+            budget (TokenBudget | None): Pre-flight context check (trim/reject
+                                   oversized prompts) and recovery from
+                                   finish_reason == "length". Defaults to
+                                   TokenBudget().
+            base_url (str | None): OpenAI-compatible endpoint, e.g. the local
+                                   stub server (agents/mycore/stub_server.py).
+                                   Defaults to OPENAI_BASE_URL or api.openai.com.
+            ledger (TokenLedger | None): Records tokens, wall time and cost of
+                                   every call, tagged with the graph/node/step
+                                   it ran in (see agents/mycore/ledger.py).
+            cascade (CascadeStats | None): Per-step escalation statistics of
+                                   invoke_json() (see agents/mycore/cascade.py).
+                                   Defaults to a fresh CascadeStats().
+            hedger (Hedger | None): Sends a duplicate request when a call is
+                                   slower than the usual p95 of its step and
+                                   model, and uses the first answer.
+            breaker (CircuitBreaker | None): Fails fast (or switches to the
+                                   configured fallback model/endpoint) while
+                                   an endpoint/model is failing or too slow.
+            pool (EndpointPool | None): Several API keys / OpenAI-compatible
+                                   servers. Each call goes to the least loaded
+                                   healthy endpoint of the step's "route"
+                                   group (agent config.json); api_key and
+                                   base_url are then unused.
+            batcher (MicroBatcher | None): Packs concurrent invoke_json() calls
+                                   of steps with "micro_batch" in their config
+                                   into one request (agents/mycore/micro_batch.py).
+            cassette (Cassette | None): Records API responses or replays them
+                                   offline, keyed by request hash
+                                   (agents/mycore/cassette.py).
+            profiles (ProfileRegistry | None): Named reasoning effort /
+                                   verbosity / completion cap bundles picked
+                                   per step (agents/mycore/profiles.py).
+                                   Defaults to the built-in profiles.
+            synthetic (bool): The answers do not come from a real model (stub
+                                   server, fake client), so they are not
+                                   training data; see the synthetic property.
         """
         self.api_key = api_key
-        self.client = OpenAI(api_key=self.api_key)
         self.default_config = default_config
+        self.transport = transport or shared_transport_pool()
+        self.cache = cache
+        self.scheduler = scheduler
+        self.singleflight = singleflight
+        self.budget = budget or TokenBudget()
+        self.max_retries = 0 if scheduler is not None else 2
+        self.base_url = base_url
+        self.ledger = ledger
+        self.cascade = cascade or CascadeStats()
+        self.hedger = hedger
+        self.breaker = breaker
+        self.pool = pool
+        self.batcher = batcher
+        self.cassette = cassette
+        self.profiles = profiles or ProfileRegistry()
+        self._synthetic = synthetic
+
+        # OpenAI clients are built lazily per process (see the properties below)
+        self._client = None
+        self._async_client = None
+        self._async_http = None
+        self._client_pid = None
+        self._fallback_clients = {}
+
+    # =========================================================
+    # Per-process OpenAI clients (fork-safe)
+    # =========================================================
+    def _check_pid(self) -> None:
+        """Forget clients created in another process (e.g. before a Celery fork)."""
+        if self._client_pid != os.getpid():
+            self._client = None
+            self._async_client = None
+            self._async_http = None
+            self._fallback_clients = {}
+            self._client_pid = os.getpid()
+
+    @property
+    def client(self) -> OpenAI:
+        self._check_pid()
+        if self._client is None:
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=self.transport.get_client(),
+                max_retries=self.max_retries,
+            )
+        return self._client
+
+    @client.setter
+    def client(self, value) -> None:
+        self._check_pid()
+        self._client = value
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Must be accessed inside a running event loop (async pools are per loop)."""
+        self._check_pid()
+        if self._async_client is not None and self._async_http is None:
+            # Injected through the setter
+            return self._async_client
+        http_client = self.transport.get_async_client()
+        if self._async_http is not http_client:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                max_retries=self.max_retries,
+            )
+            self._async_http = http_client
+        return self._async_client
+
+    @async_client.setter
+    def async_client(self, value) -> None:
+        self._check_pid()
+        self._async_client = value
+        self._async_http = None
+
+    def warm_up(self) -> int:
+        """Pre-open pooled connections to the API endpoint(s) (call after fork)."""
+        if self.pool is not None:
+            opened = 0
+            for endpoint in self.pool.endpoints:
+                client = self.pool.client(endpoint, self.transport.get_client(), False, self.max_retries)
+                opened += self.transport.warm_up(str(client.base_url))
+            return opened
+        return self.transport.warm_up(str(self.client.base_url))
 
     def update_config(self, new_config: Dict[str, Any]) -> None:
         """
@@ -36,11 +244,380 @@ class LLMClient:
         """
         self.default_config.update(new_config)
 
+    def _merge_config(self, config_override: Dict[str, Any]) -> Dict[str, Any]:
+        # Merge configs: default + override
+        config = {**self.default_config, **(config_override or {})}
+
+        # Ensure a default response_format
+        if "response_format" not in config:
+            config["response_format"] = {"type": "text"}
+
+        # Step profile: reasoning effort, verbosity, completion cap
+        return self.profiles.apply(config)
+
+    def _build_request(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config: Dict[str, Any],
+        document: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Build the keyword arguments for chat.completions.create from a merged config.
+        Shared by the sync and async code paths so both send identical requests.
+        Client-side options in the config (e.g. "cache") are not forwarded.
+
+        Message layout is prefix-cache friendly: system prompt, then the
+        document (if given) as its own user message, then the per-step
+        user_prompt. Steps that share the system prompt and document share
+        that whole prefix, so the provider can serve it from its prompt cache.
+        "prompt_cache_key": true in the config routes every step of the same
+        document to the same cache (a string is sent as is).
+        """
+        messages = [{"role": "system", "content": system_prompt}]
+        if document is not None:
+            messages.append({"role": "user", "content": document})
+        messages.append({"role": "user", "content": user_prompt})
+
+        request = {
+            "model"                 : config["model"],
+            "temperature"           : config.get("temperature", 1),
+            "top_p"                 : config.get("top_p", 1),
+            "presence_penalty"      : config.get("presence_penalty", 0),
+            "frequency_penalty"     : config.get("frequency_penalty", 0),
+            "max_completion_tokens" : config.get("max_completion_tokens",500),
+            "response_format"       : config.get("response_format"),
+            "messages"              : messages,
+        }
+        for option in ("reasoning_effort", "verbosity"):
+            if config.get(option):
+                request[option] = config[option]
+        cache_key = config.get("prompt_cache_key")
+        if cache_key is True:
+            prefix = system_prompt + "\x00" + (document if document is not None else user_prompt)
+            cache_key = "prefix-" + hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:32]
+        if cache_key:
+            request["prompt_cache_key"] = cache_key
+        return request
+
+    def prepare_request(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        The chat.completions body invoke() would send (merged config, after
+        the pre-flight check). Used to write offline Batch API files.
+        """
+        config = self._merge_config(config_override)
+        return self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
+
+    @property
+    def synthetic(self) -> bool:
+        """
+        Whether answers may be made up rather than a model's: set for stub
+        servers and fake clients, and while a cassette replays recordings.
+        Consumers that learn from answers (the intent decision log) skip them.
+        """
+        return self._synthetic or (self.cassette is not None and self.cassette.mode != "record")
+
+    def submit_request(self, request: Dict[str, Any]):
+        """
+        Send one prepared body (see prepare_request) and return the raw
+        completion: one API call through the cassette, scheduler and hedging,
+        without parsing, retries of truncated answers or the response cache.
+        Used by batch_runner.py's local submitter.
+        """
+        return self._create(request)
+
+    def _parse_response(self, response) -> Dict[str, Any]:
+        """Convert a raw completion into the standardized response object."""
+        finish_reason = response.choices[0].finish_reason
+        if finish_reason != "stop":
+            raise Exception(f"LLM response incomplete: {finish_reason}")
+
+        return {
+            "content": response.choices[0].message.content,
+            "tokens_in": response.usage.prompt_tokens,
+            "tokens_out": response.usage.completion_tokens,
+        }
+
+    def _breaker_key(self, base_url: Optional[str], model: str) -> str:
+        return f"{base_url or 'default'}|{model}"
+
+    def _fallback_client(self, fallback: Dict[str, Any], is_async: bool):
+        """Client of a fallback route; the primary client unless it names another endpoint."""
+        base_url = fallback.get("base_url")
+        if not base_url or base_url == self.base_url:
+            return self.async_client if is_async else self.client
+        self._check_pid()
+        http_client = self.transport.get_async_client() if is_async else self.transport.get_client()
+        slot = (base_url, is_async)
+        cached = self._fallback_clients.get(slot)
+        if cached is None or cached[0] is not http_client:
+            client_class = AsyncOpenAI if is_async else OpenAI
+            client = client_class(
+                api_key=fallback.get("api_key") or self.api_key,
+                base_url=base_url,
+                http_client=http_client,
+                max_retries=self.max_retries,
+            )
+            cached = self._fallback_clients[slot] = (http_client, client)
+        return cached[1]
+
+    def _fallback_route(self, request: Dict[str, Any], key: str) -> tuple:
+        """(breaker key, request, fallback) after the breaker `key` rejected the request."""
+        fallback = self.breaker.fallback_for(key, request["model"])
+        if fallback is None:
+            return None, request, None
+        routed = {**request, "model": fallback.get("model", request["model"])}
+        return self._breaker_key(fallback.get("base_url") or self.base_url, routed["model"]), routed, fallback
+
+    def _pool_target(self, request: Dict[str, Any], is_async: bool) -> tuple:
+        """(endpoint, client, adapted request, breaker key) of a pooled call; the endpoint is reserved."""
+        def available(endpoint):
+            return self.breaker.state(self._breaker_key(endpoint.name, request["model"])) != OPEN
+
+        endpoint = self.pool.select(request["model"], current_route(), available if self.breaker else None)
+        try:
+            http_client = self.transport.get_async_client() if is_async else self.transport.get_client()
+            client = self.pool.client(endpoint, http_client, is_async, self.max_retries)
+            routed = endpoint.backend.adapt(request, endpoint)
+        except BaseException as e:
+            # Release the reservation select() made
+            self.pool.finish(endpoint, 0.0, e)
+            raise
+        return endpoint, client, routed, self._breaker_key(endpoint.name, request["model"])
+
+    def _pooled_call(self, request: Dict[str, Any]):
+        endpoint, client, routed, key = self._pool_target(request, is_async=False)
+        if self.breaker is None:
+            return self.pool.run(endpoint, lambda: client.chat.completions.create(**routed))
+        return self.pool.run(endpoint, lambda: self.breaker.run(key, lambda: client.chat.completions.create(**routed)))
+
+    async def _apooled_call(self, request: Dict[str, Any]):
+        endpoint, client, routed, key = self._pool_target(request, is_async=True)
+        if self.breaker is None:
+            return await self.pool.arun(endpoint, lambda: client.chat.completions.create(**routed))
+        return await self.pool.arun(endpoint, lambda: self.breaker.arun(key, lambda: client.chat.completions.create(**routed)))
+
+    def _primary_call(self, request: Dict[str, Any]):
+        if self.pool is not None:
+            return self._pooled_call(request)
+        if self.breaker is None:
+            return self.client.chat.completions.create(**request)
+        key = self._breaker_key(self.base_url, request["model"])
+        return self.breaker.run(key, lambda: self.client.chat.completions.create(**request))
+
+    async def _aprimary_call(self, request: Dict[str, Any]):
+        if self.pool is not None:
+            return await self._apooled_call(request)
+        if self.breaker is None:
+            return await self.async_client.chat.completions.create(**request)
+        key = self._breaker_key(self.base_url, request["model"])
+        return await self.breaker.arun(key, lambda: self.async_client.chat.completions.create(**request))
+
+    def _api_call(self, request: Dict[str, Any]):
+        """
+        One API call, under the circuit breaker when configured (fallback route
+        while open). With a pool, every endpoint whose breaker is open is
+        skipped; when none is left the fallback model is served by the pool
+        too, unless the fallback names its own base_url.
+        """
+        try:
+            return self._primary_call(request)
+        except CircuitOpenError as e:
+            key, routed, fallback = self._fallback_route(request, e.key)
+            if fallback is None:
+                raise
+        if self.pool is not None and not fallback.get("base_url"):
+            return self._pooled_call(routed)
+        client = self._fallback_client(fallback, is_async=False)
+        return self.breaker.run(key, lambda: client.chat.completions.create(**routed))
+
+    async def _aapi_call(self, request: Dict[str, Any]):
+        try:
+            return await self._aprimary_call(request)
+        except CircuitOpenError as e:
+            key, routed, fallback = self._fallback_route(request, e.key)
+            if fallback is None:
+                raise
+        if self.pool is not None and not fallback.get("base_url"):
+            return await self._apooled_call(routed)
+        client = self._fallback_client(fallback, is_async=True)
+        return await self.breaker.arun(key, lambda: client.chat.completions.create(**routed))
+
+    def _send(self, request: Dict[str, Any]):
+        """Send the request, through the scheduler when one is configured."""
+        if self.scheduler is None:
+            return self._api_call(request)
+        return self.scheduler.run(request, lambda: self._api_call(request))
+
+    async def _asend(self, request: Dict[str, Any]):
+        if self.scheduler is None:
+            return await self._aapi_call(request)
+        return await self.scheduler.arun(request, lambda: self._aapi_call(request))
+
+    def _hedge_key(self, request: Dict[str, Any]) -> Optional[str]:
+        """Hedging applies to non-streaming calls; latency is tracked per step and model."""
+        if self.hedger is None or request.get("stream"):
+            return None
+        return f"{current_tags().get('step', '-')}|{request['model']}"
+
+    @staticmethod
+    def _usage_tokens(response) -> tuple:
+        return response.usage.prompt_tokens, response.usage.completion_tokens
+
+    def _hedged(self, request: Dict[str, Any]):
+        key = self._hedge_key(request)
+        if key is None:
+            return self._send(request)
+        return self.hedger.run(key, lambda: self._send(request), self._usage_tokens)
+
+    async def _ahedged(self, request: Dict[str, Any]):
+        key = self._hedge_key(request)
+        if key is None:
+            return await self._asend(request)
+        return await self.hedger.arun(key, lambda: self._asend(request), self._usage_tokens)
+
+    def _create(self, request: Dict[str, Any]):
+        """Send the request (cassette replay, else scheduler and hedging when configured)."""
+        if self.cassette is not None:
+            return self.cassette.play(request, lambda: self._hedged(request))
+        return self._hedged(request)
+
+    async def _acreate(self, request: Dict[str, Any]):
+        if self.cassette is not None:
+            return await self.cassette.aplay(request, lambda: self._ahedged(request))
+        return await self._ahedged(request)
+
+    def _cache_lookup(self, config: Dict[str, Any], request: Dict[str, Any]) -> tuple:
+        """Return (cache_key, cached_response); the key is None when caching does not apply."""
+        if self.cache is None or not is_cacheable(config):
+            return None, None
+        key = make_request_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return key, {**cached, "cache_hit": True}
+        return key, None
+
+    def _after_response(self, request: Dict[str, Any], response, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Account for one response. After a recoverable finish_reason == "length"
+        return the follow-up request planned by the token budget, else None.
+        """
+        state["tokens_in"] += response.usage.prompt_tokens
+        state["tokens_out"] += response.usage.completion_tokens
+        for field, amount in usage_details(response.usage).items():
+            state[field] += amount
+        state["api_calls"] += 1
+        choice = response.choices[0]
+        if choice.finish_reason != "length" or state["attempts"] >= self.budget.length_retries:
+            return None
+
+        state["attempts"] += 1
+        partial = choice.message.content or ""
+        plan = self.budget.next_after_length(request, partial, response.usage.completion_tokens)
+        if plan is None:
+            return None
+        next_request, keep_partial = plan
+        if keep_partial:
+            state["parts"].append(partial)
+        return next_request
+
+    def _final_result(self, response, state: Dict[str, Any]) -> Dict[str, Any]:
+        if state["attempts"]:
+            self.budget.record_length_outcome(response.choices[0].finish_reason == "stop")
+        result = self._parse_response(response)
+        result["content"] = "".join(state["parts"]) + (result["content"] or "")
+        for field in ("tokens_in", "tokens_out", "reasoning_tokens", "cached_tokens", "api_calls"):
+            result[field] = state[field]
+        return result
+
+    def _new_state(self) -> Dict[str, Any]:
+        return {
+            "parts": [], "attempts": 0, "api_calls": 0,
+            "tokens_in": 0, "tokens_out": 0, "reasoning_tokens": 0, "cached_tokens": 0,
+        }
+
+    def record_usage(self, config: Dict[str, Any], result: Optional[Dict[str, Any]], elapsed: float) -> None:
+        """Account one call (or one micro-batched item's share) under the current ledger tags."""
+        self.profiles.record(config.get("profile"), elapsed, result)
+        meter_usage(result)
+        if self.ledger is not None:
+            with ledger_tags(profile=config.get("profile")):
+                self.ledger.record_call(config["model"], result, elapsed)
+
+    @contextmanager
+    def _metered(self, config: Dict[str, Any]):
+        """
+        Record the call in the ledger (if any); set meter["result"] on success.
+        "metered": False leaves accounting to the caller (micro-batch requests
+        are split across their items by MicroBatcher).
+        """
+        meter = {"result": None}
+        started = time.monotonic()
+        try:
+            yield meter
+        finally:
+            if config.get("metered", True):
+                self.record_usage(config, meter["result"], time.monotonic() - started)
+
+    def _complete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Call the API and parse the response, continuing or retrying truncated completions."""
+        state = self._new_state()
+        while True:
+            response = self._create(request)
+            next_request = self._after_response(request, response, state)
+            if next_request is None:
+                return self._final_result(response, state)
+            request = next_request
+
+    async def _acomplete(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        state = self._new_state()
+        while True:
+            response = await self._acreate(request)
+            next_request = self._after_response(request, response, state)
+            if next_request is None:
+                return self._final_result(response, state)
+            request = next_request
+
+    def _fetch(self, request: Dict[str, Any], cache_key: Optional[str]) -> Dict[str, Any]:
+        """
+        Call the API and parse the response. The cache is filled before the
+        singleflight slot is released, so late arrivals hit the cache.
+        """
+        def call():
+            result = self._complete(request)
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            return result
+
+        if self.singleflight is None:
+            return call()
+        result, shared = self.singleflight.do(cache_key or make_request_key(request), call)
+        return {**result, "coalesced": True} if shared else result
+
+    async def _afetch(self, request: Dict[str, Any], cache_key: Optional[str]) -> Dict[str, Any]:
+        async def call():
+            result = await self._acomplete(request)
+            if cache_key is not None:
+                self.cache.set(cache_key, result)
+            return result
+
+        if self.singleflight is None:
+            return await call()
+        result, shared = await self.singleflight.ado(cache_key or make_request_key(request), call)
+        return {**result, "coalesced": True} if shared else result
+
     def invoke(
         self,
         user_prompt:  str,
         system_prompt:str,
         config_override: Dict[str, Any],
+        document: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Perform a single chat completion call (token-in → token-out).
@@ -50,6 +627,9 @@ class LLMClient:
             user_prompt (str): User-level input or query.
             config_override (dict | None): Optional temporary configuration
                                            to override defaults.
+            document (str | None): Long, step-independent input (the article).
+                                   Sent right after the system prompt so it is
+                                   part of the cacheable prompt prefix.
 
         Returns:
             dict: Standardized response object:
@@ -58,42 +638,254 @@ class LLMClient:
                     "content": str | None,
                     "tokens_in": int,
                     "tokens_out": int,
+                    "reasoning_tokens": int,
+                    "cached_tokens": int,      # prompt tokens served from the provider's prompt cache
+                    "api_calls": int,
                     "error": str | None
                 }
         """
+        try:
+            config = self._merge_config(config_override)
+            with self._metered(config) as meter, endpoint_route(config.get("route")):
+                request = self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
 
-        # Merge configs: default + override
-        config = {**self.default_config, **(config_override or {})}
+                cache_key, cached = self._cache_lookup(config, request)
+                meter["result"] = cached if cached is not None else self._fetch(request, cache_key)
+            return meter["result"]
 
-        # Ensure a default response_format
-        if "response_format" not in config:
-            config["response_format"] = {"type": "text"}
+        except Exception as e:
+            raise Exception(f"[LLMClient.invoke] {e}")
 
+    async def ainvoke(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Async twin of invoke() built on AsyncOpenAI.
+
+        The request/response format is identical to invoke(); the call only
+        yields the event loop while waiting for the API, so a single worker
+        process can keep many documents in flight.
+        """
         try:
-            response = self.client.chat.completions.create(
-                model                   =config["model"],
-                temperature             =config.get("temperature", 1),
-                top_p                   =config.get("top_p", 1),
-                presence_penalty        =config.get("presence_penalty", 0),
-                frequency_penalty       =config.get("frequency_penalty", 0),
-                max_completion_tokens   =config.get("max_completion_tokens",500),
-                response_format         =config.get("response_format"),
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-            )
-            
-            finish_reason = response.choices[0].finish_reason
-            if finish_reason != "stop":
-                raise Exception(f"LLM response incomplete: {finish_reason}")
-            
-            return {
-                "content": response.choices[0].message.content,
-                "tokens_in": response.usage.prompt_tokens,
-                "tokens_out": response.usage.completion_tokens,
-            }
+            config = self._merge_config(config_override)
+            with self._metered(config) as meter, endpoint_route(config.get("route")):
+                request = self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
+
+                cache_key, cached = self._cache_lookup(config, request)
+                meter["result"] = cached if cached is not None else await self._afetch(request, cache_key)
+            return meter["result"]
 
         except Exception as e:
-            raise Exception(f"[LLMClient.invoke] {e}")
+            raise Exception(f"[LLMClient.ainvoke] {e}")
+
+    # =========================================================
+    # Validated JSON with model cascade
+    # =========================================================
+    def _cascade_plan(self, config_override: Dict[str, Any]) -> tuple:
+        """(step name, models to try cheapest first, merged config) of an invoke_json() call."""
+        config = self._merge_config(config_override)
+        models = (config.get("cascade") or {}).get("models") or [config["model"]]
+        schema_name = ((config.get("response_format") or {}).get("json_schema") or {}).get("name", "json")
+        return current_tags().get("step") or schema_name, models, config
+
+    def _cascade_attempt(self, step: str, model: str, result, error, started: float, config: Dict[str, Any]):
+        """Validate one tier's answer and record it; returns (value, problems)."""
+        if error is not None:
+            value, problems = None, [str(error)]
+        else:
+            value, problems = check_output(result.get("content"), config)
+        billed = result is not None and not result.get("cache_hit") and not result.get("coalesced")
+        tokens_in = result["tokens_in"] if billed else 0
+        tokens_out = result["tokens_out"] if billed else 0
+        cost = self.ledger.cost(model, tokens_in, tokens_out, result.get("cached_tokens", 0)) if billed and self.ledger else 0.0
+        self.cascade.record(step, model, not problems, time.monotonic() - started, tokens_in, tokens_out, cost, problems)
+        return value, problems
+
+    def _batched_cache(self, user_prompt: str, system_prompt: str, config: Dict[str, Any], document: Optional[str]) -> Any:
+        """Parsed answer of a cached single call for a batchable item (metered as a cache hit), else None."""
+        request = self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
+        _, cached = self._cache_lookup(config, request)
+        if cached is None:
+            return None
+        value, problems = check_output(cached.get("content"), config)
+        if problems:
+            return None
+        self.record_usage(config, cached, 0.0)
+        return value
+
+    def invoke_json(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ) -> Any:
+        """
+        invoke() + JSON parsing + validation against the config's json_schema.
+
+        With a "cascade" block in the config, models are tried cheapest first
+        and the call escalates to the next one when the answer fails
+        validation or a low-confidence check (see agents/mycore/cascade.py).
+        Steps with "micro_batch" in their config share a request with
+        concurrent calls of the same step when a batcher is configured.
+
+        Returns:
+            The parsed JSON value of the first answer that passes. If none
+            passes, the last model's answer when it is at least valid JSON;
+            otherwise an exception is raised.
+        """
+        try:
+            step, models, config = self._cascade_plan(config_override)
+            if self.batcher is not None and batching_enabled(config):
+                value = self._batched_cache(user_prompt, system_prompt, config, document)
+                if value is None:
+                    value = self.batcher.invoke_json(self, user_prompt, system_prompt, config, document)
+                return value
+
+            value, problems = None, []
+            for attempt, model in enumerate(models, start=1):
+                started = time.monotonic()
+                result = error = None
+                try:
+                    result = self.invoke(user_prompt, system_prompt, {**config, "model": model}, document)
+                except Exception as e:
+                    error = e
+                value, problems = self._cascade_attempt(step, model, result, error, started, config)
+                if not problems:
+                    self.cascade.record_outcome(step, attempt, True)
+                    return value
+            self.cascade.record_outcome(step, len(models), False)
+            if value is not None:
+                # Best effort: the last tier's parsed answer, as without a cascade
+                return value
+            raise Exception(f"No model produced a valid answer ({', '.join(models)}): {'; '.join(problems[:3])}")
+
+        except Exception as e:
+            raise Exception(f"[LLMClient.invoke_json] {e}")
 
+    async def ainvoke_json(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ) -> Any:
+        """Async twin of invoke_json()."""
+        try:
+            step, models, config = self._cascade_plan(config_override)
+            if self.batcher is not None and batching_enabled(config):
+                value = self._batched_cache(user_prompt, system_prompt, config, document)
+                if value is None:
+                    value = await self.batcher.ainvoke_json(self, user_prompt, system_prompt, config, document)
+                return value
+
+            value, problems = None, []
+            for attempt, model in enumerate(models, start=1):
+                started = time.monotonic()
+                result = error = None
+                try:
+                    result = await self.ainvoke(user_prompt, system_prompt, {**config, "model": model}, document)
+                except Exception as e:
+                    error = e
+                value, problems = self._cascade_attempt(step, model, result, error, started, config)
+                if not problems:
+                    self.cascade.record_outcome(step, attempt, True)
+                    return value
+            self.cascade.record_outcome(step, len(models), False)
+            if value is not None:
+                # Best effort: the last tier's parsed answer, as without a cascade
+                return value
+            raise Exception(f"No model produced a valid answer ({', '.join(models)}): {'; '.join(problems[:3])}")
+
+        except Exception as e:
+            raise Exception(f"[LLMClient.ainvoke_json] {e}")
+
+    def _stream_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        # Usage arrives in a final chunk without choices
+        return {**request, "stream": True, "stream_options": {"include_usage": True}}
+
+    def invoke_stream(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ):
+        """
+        Streaming twin of invoke(): a generator of events
+
+            {"type": "delta", "content": str}          # as tokens arrive
+            ...
+            {"type": "final", "content": str, "tokens_in": int,
+             "tokens_out": int, "time_to_first_token": float}
+
+        The full response is cached exactly like invoke() (same key), and a
+        cache hit is replayed as a single delta. Pair with
+        agents.mycore.json_stream.stream_json_fields to get JSON fields as
+        soon as they close.
+        """
+        try:
+            config = self._merge_config(config_override)
+            with self._metered(config) as meter, endpoint_route(config.get("route")):
+                request = self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
+
+                cache_key, cached = self._cache_lookup(config, request)
+                if cached is not None:
+                    meter["result"] = cached
+                    yield {"type": "delta", "content": cached["content"]}
+                    yield {"type": "final", **cached, "time_to_first_token": 0.0}
+                    return
+
+                state = _StreamState()
+                for chunk in self._create(self._stream_request(request)):
+                    delta = state.add(chunk)
+                    if delta:
+                        yield {"type": "delta", "content": delta}
+
+                result = state.result()
+                if cache_key is not None:
+                    self.cache.set(cache_key, result)
+                meter["result"] = result
+                yield {"type": "final", **result, "time_to_first_token": state.time_to_first_token}
+
+        except Exception as e:
+            raise Exception(f"[LLMClient.invoke_stream] {e}")
+
+    async def ainvoke_stream(
+        self,
+        user_prompt:  str,
+        system_prompt:str,
+        config_override: Dict[str, Any],
+        document: Optional[str] = None,
+    ):
+        """Async twin of invoke_stream() (an async generator of the same events)."""
+        try:
+            config = self._merge_config(config_override)
+            with self._metered(config) as meter, endpoint_route(config.get("route")):
+                request = self.budget.preflight(self._build_request(user_prompt, system_prompt, config, document), config)
+
+                cache_key, cached = self._cache_lookup(config, request)
+                if cached is not None:
+                    meter["result"] = cached
+                    yield {"type": "delta", "content": cached["content"]}
+                    yield {"type": "final", **cached, "time_to_first_token": 0.0}
+                    return
+
+                state = _StreamState()
+                async for chunk in await self._acreate(self._stream_request(request)):
+                    delta = state.add(chunk)
+                    if delta:
+                        yield {"type": "delta", "content": delta}
+
+                result = state.result()
+                if cache_key is not None:
+                    self.cache.set(cache_key, result)
+                meter["result"] = result
+                yield {"type": "final", **result, "time_to_first_token": state.time_to_first_token}
+
+        except Exception as e:
+            raise Exception(f"[LLMClient.ainvoke_stream] {e}")
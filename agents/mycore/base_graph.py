@@ -1,7 +1,11 @@
 # agents/mycore/base_graph.py
+import inspect
 from langgraph.graph import StateGraph, END
+from langchain_core.runnables import RunnableLambda
 from typing import Callable, Dict, List, Type
 
+from agents.mycore.ledger import ledger_tags
+
 
 class BaseGraph:
     """Reusable base class for building LangGraph state graphs."""
@@ -22,13 +26,26 @@ class BaseGraph:
     # Error tracking
     # =========================================================    
     def _wrap_node(self, node_fn, node_name):
-        """Wrap node function with automatic error handling"""
+        """
+        Wrap node function with automatic error handling (sync or async).
+        LLM calls made inside the node are tagged with graph and node in the token ledger.
+        """
+        graph_name = self.__class__.__name__
+        if inspect.iscoroutinefunction(node_fn):
+            async def awrapped(state):
+                try:
+                    with ledger_tags(graph=graph_name, node=node_name):
+                        return await node_fn(state)
+                except Exception as e:
+                    raise Exception(f"[{graph_name}: {node_name}] {e}")
+            return awrapped
+
         def wrapped(state):
             try:
-                result = node_fn(state)
+                with ledger_tags(graph=graph_name, node=node_name):
+                    result = node_fn(state)
                 return result
             except Exception as e:
-                graph_name = self.__class__.__name__
                 raise Exception(f"[{graph_name}: {node_name}] {e}")
         return wrapped
     # =========================================================
@@ -54,6 +71,11 @@ class BaseGraph:
     # Internal registration methods (override if needed)
     # =========================================================
     def _register_all_nodes(self):
+        """
+        Register all nodes. If the controller defines an async twin named
+        "a<node_name>", the node is registered with both implementations so
+        graph.invoke() uses the sync one and graph.ainvoke() awaits the async one.
+        """
         for node_name, fn in self.nodes:
             if hasattr(self, node_name):
                 actual_fn = getattr(self, node_name)
@@ -61,6 +83,11 @@ class BaseGraph:
                 actual_fn = fn
             
             wrapped_fn = self._wrap_node(actual_fn ,node_name)
+
+            async_fn = getattr(self, f"a{node_name}", None)
+            if async_fn is not None:
+                wrapped_afn = self._wrap_node(async_fn, node_name)
+                wrapped_fn = RunnableLambda(wrapped_fn, afunc=wrapped_afn, name=node_name)
             
             self.graph.add_node(node_name, wrapped_fn)
     def _register_all_conditional_edges(self):
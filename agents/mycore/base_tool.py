@@ -1,4 +1,7 @@
 # agents/mycore/base_tool.py
+import inspect
+
+from agents.mycore.ledger import step_tag
 
 def auto_wrap_error(method):
     """
@@ -12,16 +15,73 @@ def auto_wrap_error(method):
         def some_method(self, ...):
             # your logic here
     
+    Coroutine methods (async def) are wrapped with an async wrapper, so the
+    same decorator can be used on the async twins of tool methods.
+    LLM calls inside the outermost decorated method are tagged with
+    step="ClassName.method_name" in the token ledger.
+    Generator methods (streaming) are wrapped so that errors raised while
+    iterating get the same prefix.
+    
     Args:
         method: The method to be wrapped
         
     Returns:
         wrapped: The wrapped method with error handling
     """
+    if inspect.iscoroutinefunction(method):
+        async def awrapped(self, *args, **kwargs):
+            try:
+                with step_tag(f"{self.__class__.__name__}.{method.__name__}"):
+                    return await method(self, *args, **kwargs)
+            except Exception as e:
+                class_name = self.__class__.__name__
+                method_name = method.__name__
+                raise Exception(f"[{class_name}.{method_name}] {e}")
+        return awrapped
+
+    if inspect.isgeneratorfunction(method):
+        def gwrapped(self, *args, **kwargs):
+            step = f"{self.__class__.__name__}.{method.__name__}"
+            generator = method(self, *args, **kwargs)
+            try:
+                while True:
+                    # Tag each resumption only: the caller's context runs between items
+                    with step_tag(step):
+                        try:
+                            item = next(generator)
+                        except StopIteration as stop:
+                            return stop.value
+                    yield item
+            except Exception as e:
+                raise Exception(f"[{self.__class__.__name__}.{method.__name__}] {e}")
+            finally:
+                # Consumer stopped early: close the stream now, not at garbage collection
+                generator.close()
+        return gwrapped
+
+    if inspect.isasyncgenfunction(method):
+        async def agwrapped(self, *args, **kwargs):
+            step = f"{self.__class__.__name__}.{method.__name__}"
+            generator = method(self, *args, **kwargs)
+            try:
+                while True:
+                    with step_tag(step):
+                        try:
+                            item = await generator.__anext__()
+                        except StopAsyncIteration:
+                            return
+                    yield item
+            except Exception as e:
+                raise Exception(f"[{self.__class__.__name__}.{method.__name__}] {e}")
+            finally:
+                await generator.aclose()
+        return agwrapped
+
     def wrapped(self, *args, **kwargs):
         try:
             # Call the original method and return its result
-            result = method(self,*args,**kwargs)
+            with step_tag(f"{self.__class__.__name__}.{method.__name__}"):
+                result = method(self,*args,**kwargs)
             return result
         except Exception as e:
             # Get class name and method name
@@ -0,0 +1,322 @@
+# agents/mycore/breaker.py
+"""
+Circuit breakers for LLM endpoints and models.
+
+When the provider degrades, every call either fails or hangs until the HTTP
+timeout, and Celery workers pile up behind it. A breaker per
+(endpoint, model) watches the recent calls and
+
+- opens when, over the last `window` seconds and at least `min_calls`
+  calls, the error rate reaches `error_rate` or the share of calls slower
+  than `slow_call_seconds` reaches `slow_rate`;
+- while open, rejects calls right away with CircuitOpenError for
+  `open_seconds` (LLMClient then routes them to the configured fallback
+  model/endpoint, if any);
+- afterwards lets one probe call through (half-open): success closes the
+  breaker, failure opens it again.
+
+Only transient provider failures count as errors (connection errors and
+timeouts, 5xx, 429); a bad request is the caller's problem, not the
+provider's. RedisCircuitBreaker keeps counters and state in Redis so all
+Celery workers trip and recover together.
+"""
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from agents.mycore.scheduler import RETRYABLE_ERRORS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an endpoint/model whose breaker is open."""
+
+    def __init__(self, key: str, retry_in: float):
+        super().__init__(f"circuit open for {key} (retry in {retry_in:.0f}s)")
+        self.key = key
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """In-process breakers, one per key (e.g. "https://api.openai.com/v1|gpt-5-nano")."""
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        slow_call_seconds: float = 30.0,
+        slow_rate: float = 0.5,
+        min_calls: int = 10,
+        window: float = 60.0,
+        buckets: int = 6,
+        open_seconds: float = 30.0,
+        probe_timeout: float = 120.0,
+        fallbacks: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        self.error_rate = error_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate = slow_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.bucket_seconds = window / buckets
+        self.open_seconds = open_seconds
+        self.probe_timeout = probe_timeout
+        # model -> {"model": ..., "base_url": ..., "api_key": ...}
+        self.fallbacks = fallbacks or {}
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Dict[int, list]] = {}
+        self._open_until: Dict[str, float] = {}
+        self._probe_until: Dict[str, float] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    # ---------------------------------------------------------
+    # Storage (overridden by RedisCircuitBreaker)
+    # ---------------------------------------------------------
+    def _add(self, key: str, now: float, error: bool, slow: bool) -> None:
+        bucket = int(now // self.bucket_seconds)
+        with self._lock:
+            buckets = self._buckets.setdefault(key, {})
+            counts = buckets.setdefault(bucket, [0, 0, 0])
+            counts[0] += 1
+            counts[1] += 1 if error else 0
+            counts[2] += 1 if slow else 0
+            oldest = bucket - int(self.window // self.bucket_seconds)
+            for stale in [b for b in buckets if b <= oldest]:
+                del buckets[stale]
+
+    def _counts(self, key: str, now: float) -> Tuple[int, int, int]:
+        """(calls, errors, slow calls) over the window."""
+        oldest = int(now // self.bucket_seconds) - int(self.window // self.bucket_seconds)
+        with self._lock:
+            rows = [c for b, c in self._buckets.get(key, {}).items() if b > oldest]
+        return tuple(sum(c[i] for c in rows) for i in range(3))
+
+    def _tripped_until(self, key: str) -> Optional[float]:
+        """End of the open period of a tripped breaker; None while closed."""
+        with self._lock:
+            return self._open_until.get(key)
+
+    def _trip(self, key: str, now: float, force: bool) -> bool:
+        """Open the breaker (force: even if already tripped). True if it was opened."""
+        with self._lock:
+            if key in self._open_until and not force:
+                return False
+            self._open_until[key] = now + self.open_seconds
+            self._probe_until.pop(key, None)
+            return True
+
+    def _try_probe(self, key: str, now: float) -> bool:
+        """Claim the single half-open probe (expires after probe_timeout)."""
+        with self._lock:
+            if self._probe_until.get(key, 0.0) > now:
+                return False
+            self._probe_until[key] = now + self.probe_timeout
+            return True
+
+    def _reset(self, key: str) -> None:
+        with self._lock:
+            self._open_until.pop(key, None)
+            self._probe_until.pop(key, None)
+            self._buckets.pop(key, None)
+
+    # ---------------------------------------------------------
+    # Breaker logic
+    # ---------------------------------------------------------
+    def _count(self, key: str, field: str) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(key, {"calls": 0, "failures": 0, "opened": 0, "rejected": 0, "probes": 0, "fallbacks": 0})
+            stats[field] = stats.get(field, 0) + 1
+
+    def state(self, key: str) -> str:
+        until = self._tripped_until(key)
+        if until is None:
+            return CLOSED
+        return OPEN if time.time() < until else HALF_OPEN
+
+    def before_call(self, key: str) -> bool:
+        """Admit a call. Returns True if it is the half-open probe; raises CircuitOpenError if rejected."""
+        now = time.time()
+        until = self._tripped_until(key)
+        if until is None:
+            return False
+        if now < until or not self._try_probe(key, now):
+            self._count(key, "rejected")
+            raise CircuitOpenError(key, max(0.0, until - now))
+        self._count(key, "probes")
+        return True
+
+    def after_call(self, key: str, probe: bool, latency: float, error: Optional[BaseException]) -> None:
+        """Record the outcome of an admitted call and open/close the breaker accordingly."""
+        failed = error is not None and isinstance(error, RETRYABLE_ERRORS)
+        slow = latency >= self.slow_call_seconds
+        now = time.time()
+        self._count(key, "calls")
+        if failed:
+            self._count(key, "failures")
+
+        if probe:
+            # A cancelled probe proves nothing: reopen rather than close
+            if failed or slow or (error is not None and not isinstance(error, Exception)):
+                self._trip(key, now, force=True)
+                self._count(key, "opened")
+            else:
+                self._reset(key)
+            return
+
+        if error is not None and not failed:
+            return
+        self._add(key, now, failed, slow)
+        calls, errors, slows = self._counts(key, now)
+        if calls < self.min_calls:
+            return
+        if errors / calls >= self.error_rate or slows / calls >= self.slow_rate:
+            if self._trip(key, now, force=False):
+                self._count(key, "opened")
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Any:
+        """Call fn() under the key's breaker."""
+        probe = self.before_call(key)
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.after_call(key, probe, time.monotonic() - started, e)
+            raise
+        self.after_call(key, probe, time.monotonic() - started, None)
+        return result
+
+    async def arun(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async twin of run()."""
+        probe = self.before_call(key)
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.after_call(key, probe, time.monotonic() - started, e)
+            raise
+        self.after_call(key, probe, time.monotonic() - started, None)
+        return result
+
+    def fallback_for(self, key: str, model: str) -> Optional[Dict[str, Any]]:
+        """The configured fallback route of a model (counted as a fallback use)."""
+        fallback = self.fallbacks.get(model)
+        if fallback is not None:
+            self._count(key, "fallbacks")
+        return fallback
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per key: current state and counters of calls, failures, openings, rejections, probes and fallbacks."""
+        with self._lock:
+            stats = {key: dict(counts) for key, counts in self._stats.items()}
+        for key, counts in stats.items():
+            counts["state"] = self.state(key)
+        return stats
+
+
+class RedisCircuitBreaker(CircuitBreaker):
+    """
+    Breakers shared by all worker processes.
+
+    Window counters are Redis hashes per time bucket (expiring after the
+    window); a tripped breaker is a key holding the end of its open period;
+    the half-open probe is a SET NX lock so only one worker probes. If Redis
+    is unreachable the breaker stays closed (calls go through).
+    """
+
+    def __init__(self, redis_client, prefix: str = "llm_cb:", **settings):
+        super().__init__(**settings)
+        self.redis = redis_client
+        self.prefix = prefix
+
+    def _bucket_key(self, key: str, bucket: int) -> str:
+        return f"{self.prefix}{key}:b:{bucket}"
+
+    def _add(self, key: str, now: float, error: bool, slow: bool) -> None:
+        bucket_key = self._bucket_key(key, int(now // self.bucket_seconds))
+        try:
+            pipe = self.redis.pipeline()
+            pipe.hincrby(bucket_key, "calls", 1)
+            pipe.hincrby(bucket_key, "errors", 1 if error else 0)
+            pipe.hincrby(bucket_key, "slow", 1 if slow else 0)
+            pipe.expire(bucket_key, int(self.window + self.bucket_seconds) + 1)
+            pipe.execute()
+        except Exception:
+            self._count(key, "redis_errors")
+
+    def _counts(self, key: str, now: float) -> Tuple[int, int, int]:
+        newest = int(now // self.bucket_seconds)
+        span = int(self.window // self.bucket_seconds)
+        try:
+            pipe = self.redis.pipeline()
+            for bucket in range(newest - span + 1, newest + 1):
+                pipe.hgetall(self._bucket_key(key, bucket))
+            rows = pipe.execute()
+        except Exception:
+            self._count(key, "redis_errors")
+            return 0, 0, 0
+        totals = [0, 0, 0]
+        for row in rows:
+            for i, field in enumerate((b"calls", b"errors", b"slow")):
+                totals[i] += int(row.get(field, 0))
+        return tuple(totals)
+
+    def _tripped_until(self, key: str) -> Optional[float]:
+        try:
+            raw = self.redis.get(f"{self.prefix}{key}:open")
+        except Exception:
+            self._count(key, "redis_errors")
+            return None
+        return float(raw) if raw is not None else None
+
+    def _trip(self, key: str, now: float, force: bool) -> bool:
+        try:
+            opened = self.redis.set(f"{self.prefix}{key}:open", now + self.open_seconds, nx=not force)
+            if opened:
+                self.redis.delete(f"{self.prefix}{key}:probe")
+            return bool(opened)
+        except Exception:
+            self._count(key, "redis_errors")
+            return False
+
+    def _try_probe(self, key: str, now: float) -> bool:
+        try:
+            return bool(self.redis.set(f"{self.prefix}{key}:probe", 1, nx=True, px=int(self.probe_timeout * 1000)))
+        except Exception:
+            self._count(key, "redis_errors")
+            return True
+
+    def _reset(self, key: str) -> None:
+        newest = int(time.time() // self.bucket_seconds)
+        span = int(self.window // self.bucket_seconds)
+        buckets = [self._bucket_key(key, b) for b in range(newest - span, newest + 1)]
+        try:
+            self.redis.delete(f"{self.prefix}{key}:open", f"{self.prefix}{key}:probe", *buckets)
+        except Exception:
+            self._count(key, "redis_errors")
+
+
+def build_circuit_breaker(settings: Optional[Dict[str, Any]]) -> Optional[CircuitBreaker]:
+    """
+    Build a CircuitBreaker from the LLM_CIRCUIT_BREAKER setting in config.py.
+
+    Example:
+        LLM_CIRCUIT_BREAKER = {
+            "error_rate": 0.5,
+            "slow_call_seconds": 30,
+            "open_seconds": 30,
+            "redis_url": "redis://localhost:6379/5",       # omit for per-process breakers
+            "fallbacks": {"gpt-5-nano": {"model": "gpt-5-mini"}},
+        }
+    """
+    if not settings:
+        return None
+    settings = dict(settings)
+    redis_url = settings.pop("redis_url", None)
+    if not redis_url:
+        return CircuitBreaker(**settings)
+
+    import redis
+    return RedisCircuitBreaker(redis.Redis.from_url(redis_url), **settings)
@@ -0,0 +1,290 @@
+# agents/mycore/cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# =========================================================
+# Keys and cacheability
+# =========================================================
+def make_request_key(request: Dict[str, Any]) -> str:
+    """
+    Content-addressed key of a chat completion request.
+
+    The request dict is exactly what is sent to the API (model, messages,
+    response_format and sampling params), so two requests share a key only
+    if the provider would receive identical input.
+    """
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(config: Dict[str, Any]) -> bool:
+    """
+    Decide whether a merged config may be served from cache.
+
+    - "cache": true / false in the config always wins (explicit opt-in/out).
+      Opting a sampled step in means repeated inputs get the first sample
+      back for the TTL instead of a fresh one.
+    - Otherwise only deterministic sampling (temperature == 0) is cached;
+      the default temperature of 1 is non-deterministic and must opt in.
+    """
+    if "cache" in config:
+        return bool(config["cache"])
+    return config.get("temperature", 1) == 0
+
+
+# =========================================================
+# Tiers
+# =========================================================
+# Every tier implements entry(key) -> (value, created) and set(key, value, created=None).
+# created is when the response was first stored (time.time(), None if unknown):
+# a copy backfilled into a faster tier keeps it, so it expires with the original.
+class MemoryLRUCache:
+    """In-process LRU tier (per worker process) with the same TTL as the slower tiers."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def entry(self, key: str) -> Optional[Tuple[dict, float]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if self.ttl_seconds is not None and time.time() - entry[1] > self.ttl_seconds:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: dict, created: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() if created is None else created)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SQLiteCache:
+    """
+    Persistent on-disk tier with TTL and size-bounded (least recently used) eviction.
+    One connection per process; access is serialized with a lock.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 50000, ttl_seconds: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def entry(self, key: str) -> Optional[Tuple[dict, float]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.ttl_seconds is not None and now - created > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+                return None
+            conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(value), created
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: dict, created: Optional[float] = None) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now if created is None else created, now),
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds is not None:
+            conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl_seconds,))
+        overflow = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class RedisCache:
+    """Optional tier shared by all Celery workers (TTL handled by Redis)."""
+
+    name = "redis"
+
+    def __init__(self, redis_client, ttl_seconds: Optional[float] = None, prefix: str = "llm_cache:"):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.prefix = prefix
+
+    def entry(self, key: str) -> Optional[Tuple[dict, Optional[float]]]:
+        raw = self.redis.get(self.prefix + key)
+        if raw is None:
+            return None
+        created = None
+        if self.ttl_seconds:
+            # Redis keeps the remaining lifetime, not the creation time
+            remaining = self.redis.ttl(self.prefix + key)
+            if remaining is not None and remaining >= 0:
+                created = time.time() - (self.ttl_seconds - remaining)
+        return json.loads(raw), created
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entry(key)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: dict, created: Optional[float] = None) -> None:
+        ex = None
+        if self.ttl_seconds:
+            ex = int(self.ttl_seconds - (0 if created is None else time.time() - created))
+            if ex <= 0:
+                return
+        self.redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=ex)
+
+
+# =========================================================
+# Tiered cache
+# =========================================================
+class TieredCache:
+    """
+    Look up tiers in order (fast → slow). A hit in a slower tier is copied
+    back into the faster ones with its original creation time, so the copy
+    expires with it. Writes go to every tier.
+
+    A failing tier (e.g. Redis down) is skipped instead of failing the call.
+    """
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self._lock = threading.Lock()
+        self._stats = {"hits": {t.name: 0 for t in tiers}, "misses": 0, "sets": 0, "errors": 0}
+
+    def _count(self, field: str, tier: Optional[str] = None) -> None:
+        with self._lock:
+            if tier is None:
+                self._stats[field] += 1
+            else:
+                self._stats[field][tier] += 1
+
+    def get(self, key: str) -> Optional[dict]:
+        for i, tier in enumerate(self.tiers):
+            try:
+                entry = tier.entry(key)
+            except Exception:
+                self._count("errors")
+                continue
+            if entry is not None:
+                value, created = entry
+                self._count("hits", tier.name)
+                for faster in self.tiers[:i]:
+                    try:
+                        faster.set(key, value, created)
+                    except Exception:
+                        self._count("errors")
+                return value
+        self._count("misses")
+        return None
+
+    def set(self, key: str, value: dict) -> None:
+        self._count("sets")
+        for tier in self.tiers:
+            try:
+                tier.set(key, value)
+            except Exception:
+                self._count("errors")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters since process start."""
+        with self._lock:
+            hits = dict(self._stats["hits"])
+            misses = self._stats["misses"]
+            total = sum(hits.values()) + misses
+            return {
+                "hits": hits,
+                "misses": misses,
+                "sets": self._stats["sets"],
+                "errors": self._stats["errors"],
+                "hit_rate": (sum(hits.values()) / total) if total else 0.0,
+            }
+
+
+def build_response_cache(settings: Optional[Dict[str, Any]]) -> Optional[TieredCache]:
+    """
+    Build a TieredCache from the LLM_CACHE setting in config.py.
+
+    Example:
+        LLM_CACHE = {
+            "memory_max_entries": 1024,
+            "sqlite_path": "temp/llm_cache.sqlite3",
+            "sqlite_max_entries": 50000,
+            "ttl_seconds": 7 * 24 * 3600,
+            "redis_url": "redis://localhost:6379/1",   # optional
+        }
+    """
+    if not settings:
+        return None
+
+    ttl = settings.get("ttl_seconds")
+    tiers = [MemoryLRUCache(settings.get("memory_max_entries", 1024), ttl)]
+    if settings.get("sqlite_path"):
+        tiers.append(SQLiteCache(settings["sqlite_path"], settings.get("sqlite_max_entries", 50000), ttl))
+    if settings.get("redis_url"):
+        import redis
+        tiers.append(RedisCache(redis.Redis.from_url(settings["redis_url"]), ttl))
+    return TieredCache(tiers)
@@ -0,0 +1,193 @@
+# agents/mycore/cascade.py
+"""
+Model cascade: answer with the cheapest model whose output passes validation.
+
+A step opts in with a "cascade" block in its config (agent config.json):
+
+    "cascade": {
+        "models": ["gpt-5-nano", "gpt-5-mini", "gpt-5.1"],     # cheapest first
+        "reject": {"protagonist": ["Unknown"]}                # low-confidence sentinels
+    }
+
+LLMClient.invoke_json() tries the models in order and escalates when
+    - the call fails (API error, truncated or refused completion),
+    - the content is not JSON or violates the step's json_schema (types,
+      enum, required, minItems/maxItems, minLength/maxLength), or
+    - a field holds a rejected value (e.g. "Unknown", a fallback sentence),
+      which is the model's way of saying it is not confident.
+Per-step escalation rates and the latency/cost spent on rejected tiers are
+available from CascadeStats.stats().
+"""
+import json
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# =========================================================
+# Validation
+# =========================================================
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def validate_schema(value: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Problems of value against the JSON Schema subset used by structured outputs ([] if valid)."""
+    if "anyOf" in schema:
+        if any(not validate_schema(value, option, path) for option in schema["anyOf"]):
+            return []
+        return [f"{path}: matches no anyOf option"]
+    if "enum" in schema and value not in schema["enum"]:
+        return [f"{path}: {value!r} not in enum"]
+    if "const" in schema and value != schema["const"]:
+        return [f"{path}: expected {schema['const']!r}"]
+
+    kinds = schema.get("type")
+    if kinds is not None:
+        kinds = kinds if isinstance(kinds, list) else [kinds]
+        matches = any(
+            isinstance(value, _JSON_TYPES[k]) and not (k in ("integer", "number") and isinstance(value, bool))
+            for k in kinds
+        )
+        if not matches:
+            return [f"{path}: expected {'/'.join(kinds)}, got {type(value).__name__}"]
+
+    problems = []
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                problems.append(f"{path}.{name}: missing")
+        if schema.get("additionalProperties") is False:
+            problems += [f"{path}.{name}: not allowed" for name in value if name not in properties]
+        for name, sub in properties.items():
+            if name in value:
+                problems += validate_schema(value[name], sub, f"{path}.{name}")
+    elif isinstance(value, list):
+        if len(value) < schema.get("minItems", 0):
+            problems.append(f"{path}: fewer than {schema['minItems']} items")
+        if "maxItems" in schema and len(value) > schema["maxItems"]:
+            problems.append(f"{path}: more than {schema['maxItems']} items")
+        for i, item in enumerate(value):
+            problems += validate_schema(item, schema.get("items", {}), f"{path}[{i}]")
+    elif isinstance(value, str):
+        if len(value.strip()) < schema.get("minLength", 0):
+            problems.append(f"{path}: shorter than {schema['minLength']}")
+        if "maxLength" in schema and len(value) > schema["maxLength"]:
+            problems.append(f"{path}: longer than {schema['maxLength']}")
+    return problems
+
+
+def rejected_values(value: Any, reject: Dict[str, List[Any]]) -> List[str]:
+    """Fields holding a low-confidence sentinel (for arrays: any item)."""
+    problems = []
+    if not isinstance(value, dict):
+        return problems
+    for field, bad in (reject or {}).items():
+        current = value.get(field)
+        items = current if isinstance(current, list) else [current]
+        hits = [item for item in items if isinstance(item, str) and item.strip() in bad]
+        if hits:
+            problems.append(f"$.{field}: low-confidence value {hits[0]!r}")
+    return problems
+
+
+def check_output(content: Optional[str], config: Dict[str, Any]) -> Tuple[Any, List[str]]:
+    """Parse and validate a completion against the config's json_schema and cascade reject rules."""
+    if not content or not content.strip():
+        return None, ["empty content"]
+    try:
+        value = json.loads(content)
+    except ValueError as e:
+        return None, [f"invalid JSON: {e}"]
+
+    response_format = config.get("response_format") or {}
+    schema = (response_format.get("json_schema") or {}).get("schema")
+    problems = validate_schema(value, schema) if schema else []
+    problems += rejected_values(value, (config.get("cascade") or {}).get("reject", {}))
+    return value, problems
+
+
+# =========================================================
+# Statistics
+# =========================================================
+class CascadeStats:
+    """Per-step counters of LLMClient.invoke_json (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._steps: Dict[str, Dict[str, Any]] = {}
+
+    def record(
+        self,
+        step: str,
+        model: str,
+        accepted: bool,
+        latency: float,
+        tokens_in: int = 0,
+        tokens_out: int = 0,
+        cost_usd: float = 0.0,
+        problems: Optional[List[str]] = None,
+    ) -> None:
+        with self._lock:
+            entry = self._steps.setdefault(step, {"calls": 0, "escalations": 0, "failures": 0, "models": {}, "last_problems": []})
+            tier = entry["models"].setdefault(model, {
+                "attempts": 0, "accepted": 0, "latency": 0.0, "tokens_in": 0, "tokens_out": 0, "cost_usd": 0.0,
+                "rejected_latency": 0.0, "rejected_tokens": 0, "rejected_cost_usd": 0.0,
+            })
+            tier["attempts"] += 1
+            tier["latency"] += latency
+            tier["tokens_in"] += tokens_in
+            tier["tokens_out"] += tokens_out
+            tier["cost_usd"] += cost_usd
+            if accepted:
+                tier["accepted"] += 1
+            else:
+                tier["rejected_latency"] += latency
+                tier["rejected_tokens"] += tokens_in + tokens_out
+                tier["rejected_cost_usd"] += cost_usd
+                entry["last_problems"] = (problems or [])[:5]
+
+    def record_outcome(self, step: str, attempts: int, accepted: bool) -> None:
+        with self._lock:
+            entry = self._steps[step]
+            entry["calls"] += 1
+            entry["escalations"] += 1 if attempts > 1 else 0
+            entry["failures"] += 0 if accepted else 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Per step: calls, escalation_rate, failures, and per model the
+        attempts, acceptance rate, mean latency, tokens and cost. The
+        escalation_* totals are what rejected tiers cost on top of the
+        accepted answers.
+        """
+        with self._lock:
+            out = {}
+            for step, entry in self._steps.items():
+                tiers = entry["models"]
+                models = {
+                    model: {
+                        **tier,
+                        "acceptance_rate": tier["accepted"] / tier["attempts"],
+                        "mean_latency": tier["latency"] / tier["attempts"],
+                    }
+                    for model, tier in tiers.items()
+                }
+                out[step] = {
+                    "calls": entry["calls"],
+                    "escalation_rate": entry["escalations"] / entry["calls"] if entry["calls"] else 0.0,
+                    "failures": entry["failures"],
+                    "escalation_latency": sum(t["rejected_latency"] for t in tiers.values()),
+                    "escalation_tokens": sum(t["rejected_tokens"] for t in tiers.values()),
+                    "escalation_cost_usd": sum(t["rejected_cost_usd"] for t in tiers.values()),
+                    "models": models,
+                    "last_problems": list(entry["last_problems"]),
+                }
+            return out
@@ -0,0 +1,222 @@
+# agents/mycore/cassette.py
+"""
+Record/replay of LLM API calls ("cassettes") for offline test runs.
+
+    # once, against the real API: store every response
+    LLM_CASSETTE=temp/cassettes/agents.jsonl LLM_CASSETTE_MODE=record python -m pytest agents/
+    # afterwards: no network, no cost, milliseconds per pipeline
+    LLM_CASSETTE=temp/cassettes/agents.jsonl python -m pytest agents/
+
+Responses are keyed by the hash of the exact request body (the same key as
+the response cache), so any prompt, schema or config change is a miss. In
+"replay" mode a miss is an error; "auto" replays what it has and records
+the rest. A request recorded several times (e.g. temperature > 0) replays
+its responses in order. Streams are recorded chunk by chunk.
+
+The file is append-only JSONL, one interaction per line tagged with the
+recording session, so a recording costs one write however large the
+cassette is and processes recording into the same file (e.g. parallel
+workers) do not overwrite each other. When a request was recorded by
+several sessions, the last session to record it wins on load.
+
+With simulate_latency the recorded API latency is slept (times
+latency_scale) to reproduce realistic timing; without it, stats() reports
+how much model latency the replay skipped, which separates pipeline
+overhead from model time.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from agents.mycore.cache import make_request_key
+
+MODES = ("replay", "record", "auto")
+
+
+class Cassette:
+    """A JSONL file of recorded request → response interactions."""
+
+    def __init__(self, path: str, mode: str = "replay", simulate_latency: bool = False, latency_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"[Cassette] unknown mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.simulate_latency = simulate_latency
+        self.latency_scale = latency_scale
+
+        self._lock = threading.Lock()
+        self._session = uuid.uuid4().hex
+        self._interactions: Dict[str, List[Dict[str, Any]]] = self._load()
+        self._cursor: Dict[str, int] = {}
+        self._rerecorded = set()
+        self._stats = {"replayed": 0, "recorded": 0, "misses": 0, "skipped_latency": 0.0}
+
+    # ---------------------------------------------------------
+    # Storage
+    # ---------------------------------------------------------
+    def _load(self) -> Dict[str, List[Dict[str, Any]]]:
+        if not os.path.exists(self.path):
+            return {}
+        # key -> session -> takes, sessions in the order they first recorded the key
+        sessions: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue   # a line cut short by a killed recorder
+                takes = sessions.setdefault(record.pop("key"), {})
+                takes.setdefault(record.pop("session", ""), []).append(record)
+        return {key: list(takes.values())[-1] for key, takes in sessions.items()}
+
+    def _append(self, line: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # One write to an O_APPEND descriptor: lines of concurrent recorders do not interleave
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def _store(self, key: str, request: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        take = {"request": request, **entry}
+        line = json.dumps({"key": key, "session": self._session, **take}, ensure_ascii=False) + "\n"
+        with self._lock:
+            if key not in self._rerecorded:
+                # First recording of this request in the session replaces older takes
+                self._rerecorded.add(key)
+                self._interactions[key] = []
+            self._interactions[key].append(take)
+            self._stats["recorded"] += 1
+            self._append(line)
+
+    def _next(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            takes = self._interactions.get(key)
+            if not takes:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            self._stats["replayed"] += 1
+            return takes[index % len(takes)]
+
+    def _miss(self, request: Dict[str, Any]) -> Exception:
+        with self._lock:
+            self._stats["misses"] += 1
+        schema = ((request.get("response_format") or {}).get("json_schema") or {}).get("name", "text")
+        return Exception(
+            f"[Cassette] no recording for {request.get('model')} / {schema} request in {self.path} "
+            f"(record it with LLM_CASSETTE_MODE=record or auto)"
+        )
+
+    # ---------------------------------------------------------
+    # Replay
+    # ---------------------------------------------------------
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        if self.simulate_latency:
+            return entry["latency"] * self.latency_scale
+        with self._lock:
+            self._stats["skipped_latency"] += entry["latency"]
+        return 0.0
+
+    @staticmethod
+    def _response(entry: Dict[str, Any]):
+        if "chunks" in entry:
+            return [ChatCompletionChunk.model_validate(chunk) for chunk in entry["chunks"]]
+        return ChatCompletion.model_validate(entry["response"])
+
+    @staticmethod
+    async def _aiter(chunks):
+        for chunk in chunks:
+            yield chunk
+
+    # ---------------------------------------------------------
+    # Recording
+    # ---------------------------------------------------------
+    def _record_stream(self, key: str, request: Dict[str, Any], stream, started: float):
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk.model_dump(mode="json"))
+            yield chunk
+        self._store(key, request, {"chunks": chunks, "latency": time.monotonic() - started})
+
+    async def _arecord_stream(self, key: str, request: Dict[str, Any], stream, started: float):
+        chunks = []
+        async for chunk in stream:
+            chunks.append(chunk.model_dump(mode="json"))
+            yield chunk
+        self._store(key, request, {"chunks": chunks, "latency": time.monotonic() - started})
+
+    # ---------------------------------------------------------
+    # Entry points
+    # ---------------------------------------------------------
+    def play(self, request: Dict[str, Any], live: Callable[[], Any]):
+        """The recorded response of request, or live()'s (recorded) when recording."""
+        key = make_request_key(request)
+        if self.mode != "record":
+            entry = self._next(key)
+            if entry is not None:
+                time.sleep(self._delay(entry))
+                response = self._response(entry)
+                return iter(response) if request.get("stream") else response
+            if self.mode == "replay":
+                raise self._miss(request)
+
+        started = time.monotonic()
+        response = live()
+        if request.get("stream"):
+            return self._record_stream(key, request, response, started)
+        self._store(key, request, {"response": response.model_dump(mode="json"), "latency": time.monotonic() - started})
+        return response
+
+    async def aplay(self, request: Dict[str, Any], live: Callable[[], Any]):
+        """Async twin of play(); live() returns an awaitable."""
+        key = make_request_key(request)
+        if self.mode != "record":
+            entry = self._next(key)
+            if entry is not None:
+                await asyncio.sleep(self._delay(entry))
+                response = self._response(entry)
+                return self._aiter(response) if request.get("stream") else response
+            if self.mode == "replay":
+                raise self._miss(request)
+
+        started = time.monotonic()
+        response = await live()
+        if request.get("stream"):
+            return self._arecord_stream(key, request, response, started)
+        self._store(key, request, {"response": response.model_dump(mode="json"), "latency": time.monotonic() - started})
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        """Replayed / recorded / missed calls and the model latency replay skipped (seconds)."""
+        with self._lock:
+            return dict(self._stats)
+
+
+def build_cassette(settings: Optional[Dict[str, Any]] = None) -> Optional[Cassette]:
+    """
+    Build a Cassette from the LLM_CASSETTE setting in config.py, overridden
+    by the environment (LLM_CASSETTE=path, LLM_CASSETTE_MODE=replay|record|auto,
+    LLM_CASSETTE_LATENCY=<scale> to simulate recorded latency).
+    None (no path configured) keeps calls live.
+    """
+    settings = dict(settings or {})
+    if os.environ.get("LLM_CASSETTE"):
+        settings["path"] = os.environ["LLM_CASSETTE"]
+    if os.environ.get("LLM_CASSETTE_MODE"):
+        settings["mode"] = os.environ["LLM_CASSETTE_MODE"]
+    if os.environ.get("LLM_CASSETTE_LATENCY"):
+        settings["simulate_latency"] = True
+        settings["latency_scale"] = float(os.environ["LLM_CASSETTE_LATENCY"])
+    if not settings.get("path"):
+        return None
+    return Cassette(**settings)
@@ -4,4 +4,4 @@
 from typing import TypedDict, Optional, Any
 
 # LangGraph 
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
@@ -0,0 +1,298 @@
+# agents/mycore/endpoint_pool.py
+"""
+Pool of LLM endpoints: several API keys and OpenAI-compatible servers.
+
+One key's rate limit no longer caps the deployment, and a step can be sent
+to a different server (e.g. intent classification to a local llama.cpp
+server on CPU, synthesis to the hosted model):
+
+    LLM_POOL = {
+        "strategy": "least_outstanding",            # or "latency_weighted"
+        "endpoints": [
+            {"name": "openai-a", "api_key_env": "OPENAI_KEY_A"},
+            {"name": "openai-b", "api_key_env": "OPENAI_KEY_B"},
+            {"name": "local", "base_url": "http://127.0.0.1:8080/v1", "backend": "llama_cpp",
+             "groups": ["local"], "model_map": {"gpt-5-nano": "qwen2.5-7b-instruct"}},
+        ],
+    }
+
+and "route": "local" in an agent's config.json. Steps without a route use
+the endpoints of the "default" group (endpoints list no groups by default).
+
+Selection among the endpoints that serve the requested model:
+- least_outstanding: fewest requests in flight (ties: lower latency),
+- latency_weighted: lowest (in flight + 1) * recent mean latency.
+Endpoints at max_outstanding are skipped while others have room. After
+failure_threshold consecutive transient failures an endpoint is taken out
+for a cooldown that doubles on every further failure; a success brings it
+back. If every candidate is down, the one that comes back first is tried.
+
+Backends adapt requests and build clients; register_backend() adds one for
+another OpenAI-compatible server flavour.
+"""
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from openai import OpenAI, AsyncOpenAI
+
+from agents.mycore.scheduler import RETRYABLE_ERRORS
+
+_route: contextvars.ContextVar = contextvars.ContextVar("llm_route", default=None)
+
+
+@contextmanager
+def endpoint_route(route: Optional[str]):
+    """Route the LLM calls made inside the block to the pool group `route` (None: default group)."""
+    token = _route.set(route)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+def current_route() -> Optional[str]:
+    return _route.get()
+
+
+# =========================================================
+# Backends
+# =========================================================
+class OpenAIBackend:
+    """OpenAI API and servers that accept the same requests."""
+
+    def create_client(self, endpoint: "Endpoint", http_client, is_async: bool, max_retries: int):
+        client_class = AsyncOpenAI if is_async else OpenAI
+        return client_class(
+            api_key=endpoint.api_key,
+            base_url=endpoint.base_url,
+            http_client=http_client,
+            max_retries=max_retries,
+        )
+
+    def adapt(self, request: Dict[str, Any], endpoint: "Endpoint") -> Dict[str, Any]:
+        model = endpoint.model_map.get(request["model"], request["model"])
+        return request if model == request["model"] else {**request, "model": model}
+
+
+class LlamaCppBackend(OpenAIBackend):
+    """llama.cpp / vLLM style servers: classic max_tokens, no OpenAI-only options."""
+
+    UNSUPPORTED = ("prompt_cache_key", "stream_options", "reasoning_effort", "verbosity")
+
+    def adapt(self, request: Dict[str, Any], endpoint: "Endpoint") -> Dict[str, Any]:
+        request = {k: v for k, v in super().adapt(request, endpoint).items() if k not in self.UNSUPPORTED}
+        if "max_completion_tokens" in request:
+            request["max_tokens"] = request.pop("max_completion_tokens")
+        return request
+
+
+BACKENDS: Dict[str, OpenAIBackend] = {
+    "openai": OpenAIBackend(),
+    "llama_cpp": LlamaCppBackend(),
+}
+
+
+def register_backend(name: str, backend: OpenAIBackend) -> None:
+    """Make a backend available to endpoints as "backend": name."""
+    BACKENDS[name] = backend
+
+
+# =========================================================
+# Endpoints
+# =========================================================
+class Endpoint:
+    """One API key on one server, with its load and health."""
+
+    def __init__(
+        self,
+        name: str,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        api_key_env: Optional[str] = None,
+        backend: str = "openai",
+        groups: Optional[List[str]] = None,
+        models: Optional[List[str]] = None,
+        model_map: Optional[Dict[str, str]] = None,
+        max_outstanding: Optional[int] = None,
+    ):
+        if backend not in BACKENDS:
+            raise ValueError(f"[Endpoint] unknown backend {backend!r} (known: {', '.join(BACKENDS)})")
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key or (os.environ.get(api_key_env) if api_key_env else None) or "none"
+        self.backend = BACKENDS[backend]
+        self.groups = groups or ["default"]
+        self.model_map = model_map or {}
+        # None: any model; model names match exactly or as a prefix
+        self.models = models if models is not None else (list(self.model_map) or None)
+        self.max_outstanding = max_outstanding
+
+        self.outstanding = 0
+        self.latency: Optional[float] = None     # moving average of successful calls
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.calls = 0
+        self.errors = 0
+
+    def serves(self, model: str) -> bool:
+        return self.models is None or any(model == m or model.startswith(m) for m in self.models)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.down_until
+
+    def saturated(self) -> bool:
+        return self.max_outstanding is not None and self.outstanding >= self.max_outstanding
+
+
+class EndpointPool:
+    """Picks an endpoint per call and tracks load, latency and health."""
+
+    STRATEGIES = ("least_outstanding", "latency_weighted")
+
+    def __init__(
+        self,
+        endpoints: List[Endpoint],
+        strategy: str = "least_outstanding",
+        latency_alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 5.0,
+        max_cooldown: float = 300.0,
+    ):
+        if not endpoints:
+            raise ValueError("[EndpointPool] at least one endpoint is required")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"[EndpointPool] unknown strategy {strategy!r}")
+        self.endpoints = endpoints
+        self.strategy = strategy
+        self.latency_alpha = latency_alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self._lock = threading.Lock()
+        self._clients: Dict[tuple, tuple] = {}
+        self._clients_pid = None
+
+    # ---------------------------------------------------------
+    # Selection
+    # ---------------------------------------------------------
+    def _score(self, endpoint: Endpoint) -> tuple:
+        latency = endpoint.latency or 0.0       # untried endpoints get a chance first
+        if self.strategy == "latency_weighted":
+            return ((endpoint.outstanding + 1) * latency, endpoint.outstanding)
+        return (endpoint.outstanding, latency)
+
+    def select(
+        self,
+        model: str,
+        route: Optional[str] = None,
+        available: Optional[Callable[[Endpoint], bool]] = None,
+    ) -> Endpoint:
+        """
+        Reserve the best endpoint for model in group route (release with
+        finish()). available(endpoint) can veto endpoints, e.g. those whose
+        circuit breaker is open; they count as down.
+        """
+        group = route or "default"
+        candidates = [e for e in self.endpoints if group in e.groups and e.serves(model)]
+        if not candidates:
+            raise Exception(f"[EndpointPool.select] no endpoint serves {model!r} in group {group!r}")
+        vetoed = {e.name for e in candidates if available is not None and not available(e)}
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in candidates if e.healthy(now) and e.name not in vetoed]
+            if healthy:
+                ready = [e for e in healthy if not e.saturated()] or healthy
+                chosen = min(ready, key=self._score)
+            else:
+                chosen = min(candidates, key=lambda e: e.down_until)
+            chosen.outstanding += 1
+            chosen.calls += 1
+            return chosen
+
+    def finish(self, endpoint: Endpoint, latency: float, error: Optional[BaseException] = None) -> None:
+        """Release a reservation and update the endpoint's latency and health."""
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.consecutive_failures = 0
+                endpoint.down_until = 0.0
+                if endpoint.latency is None:
+                    endpoint.latency = latency
+                else:
+                    endpoint.latency += self.latency_alpha * (latency - endpoint.latency)
+                return
+            if not isinstance(error, RETRYABLE_ERRORS):
+                return
+            endpoint.errors += 1
+            endpoint.consecutive_failures += 1
+            excess = endpoint.consecutive_failures - self.failure_threshold
+            if excess >= 0:
+                pause = min(self.max_cooldown, self.cooldown * (2 ** excess))
+                endpoint.down_until = time.monotonic() + pause
+
+    # ---------------------------------------------------------
+    # Clients
+    # ---------------------------------------------------------
+    def client(self, endpoint: Endpoint, http_client, is_async: bool, max_retries: int):
+        """The endpoint's OpenAI client on the given (per-process / per-loop) HTTP pool."""
+        with self._lock:
+            if self._clients_pid != os.getpid():
+                self._clients = {}
+                self._clients_pid = os.getpid()
+            slot = (endpoint.name, is_async)
+            cached = self._clients.get(slot)
+            if cached is None or cached[0] is not http_client:
+                client = endpoint.backend.create_client(endpoint, http_client, is_async, max_retries)
+                cached = self._clients[slot] = (http_client, client)
+            return cached[1]
+
+    def run(self, endpoint: Endpoint, fn: Callable[[], Any]) -> Any:
+        """Call fn() on a selected endpoint and record the outcome."""
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(endpoint, time.monotonic() - started, e)
+            raise
+        self.finish(endpoint, time.monotonic() - started)
+        return result
+
+    async def arun(self, endpoint: Endpoint, fn: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        try:
+            result = await fn()
+        except BaseException as e:
+            self.finish(endpoint, time.monotonic() - started, e)
+            raise
+        self.finish(endpoint, time.monotonic() - started)
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per endpoint: calls, errors, in flight, mean latency and whether it is up."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                e.name: {
+                    "calls": e.calls,
+                    "errors": e.errors,
+                    "outstanding": e.outstanding,
+                    "latency": e.latency,
+                    "healthy": e.healthy(now),
+                    "groups": list(e.groups),
+                }
+                for e in self.endpoints
+            }
+
+
+def build_endpoint_pool(settings: Optional[Dict[str, Any]]) -> Optional[EndpointPool]:
+    """Build an EndpointPool from the LLM_POOL setting in config.py (see the module docstring)."""
+    if not settings:
+        return None
+    settings = dict(settings)
+    endpoints = [Endpoint(**e) for e in settings.pop("endpoints")]
+    return EndpointPool(endpoints, **settings)
@@ -0,0 +1,248 @@
+# agents/mycore/hedging.py
+"""
+Hedged requests: when an LLM call runs longer than the usual p95 for its
+step and model, send a duplicate and take whichever succeeds first.
+
+- Thresholds come from a sliding window of observed latencies per
+  (step, model); no hedging until min_samples calls were seen.
+- At most budget_fraction of calls may be hedged (e.g. 0.05 = 5% extra
+  requests at most), so a provider-wide slowdown cannot double the load.
+- The loser is cancelled (async) or abandoned (sync: its thread finishes in
+  the background). Its tokens are counted as extra spend: the reported
+  usage if it finished, else the winner's prompt tokens as an estimate.
+
+stats() reports per step: hedge rate, hedge wins, extra tokens and the p99
+of the primary requests (what the latency would have been without hedging;
+a lower bound where primaries were cancelled) next to the p99 callers saw.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def _quantile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyTracker:
+    """Sliding window of latencies per key."""
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, latency: float) -> None:
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def count(self, key: str) -> int:
+        with self._lock:
+            return len(self._samples.get(key, ()))
+
+    def quantile(self, key: str, q: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples.get(key, ()))
+        return _quantile(samples, q) if samples else None
+
+
+class Hedger:
+    """Runs API calls with a delayed duplicate ("hedge") for slow outliers."""
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        budget_fraction: float = 0.05,
+        min_samples: int = 20,
+        min_delay: float = 0.05,
+        window: int = 500,
+        max_workers: int = 64,
+    ):
+        self.quantile = quantile
+        self.budget_fraction = budget_fraction
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.primary = LatencyTracker(window)      # thresholds + "without hedging" estimate
+        self.effective = LatencyTracker(window)    # what callers actually waited
+
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedges = 0
+        self._steps: Dict[str, Dict[str, Any]] = {}
+        self._pool = None
+        self._pool_pid = None
+
+    # ---------------------------------------------------------
+    # Bookkeeping
+    # ---------------------------------------------------------
+    def _executor(self) -> ThreadPoolExecutor:
+        # Threads do not survive a fork; build one pool per process
+        if self._pool is None or self._pool_pid != os.getpid():
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-hedge")
+            self._pool_pid = os.getpid()
+        return self._pool
+
+    def _step(self, key: str) -> Dict[str, Any]:
+        return self._steps.setdefault(key, {"calls": 0, "hedged": 0, "hedge_wins": 0, "extra_tokens": 0, "errors_absorbed": 0})
+
+    def delay_for(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging, or None while the key has too few samples."""
+        if self.primary.count(key) < self.min_samples:
+            return None
+        return max(self.min_delay, self.primary.quantile(key, self.quantile))
+
+    def _begin(self, key: str) -> Optional[float]:
+        with self._lock:
+            self._calls += 1
+            self._step(key)["calls"] += 1
+        return self.delay_for(key)
+
+    def _take_budget(self, key: str) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.budget_fraction * self._calls:
+                return False
+            self._hedges += 1
+            self._step(key)["hedged"] += 1
+            return True
+
+    def _finish(self, key: str, started: float, primary_latency: Optional[float]) -> None:
+        self.effective.record(key, time.monotonic() - started)
+        if primary_latency is not None:
+            self.primary.record(key, primary_latency)
+
+    def _count_win(self, key: str, hedge_won: bool) -> None:
+        with self._lock:
+            self._step(key)["hedge_wins"] += 1 if hedge_won else 0
+
+    def _count_loser(self, key: str, tokens: int, error_absorbed: bool = False) -> None:
+        with self._lock:
+            step = self._step(key)
+            step["extra_tokens"] += tokens
+            step["errors_absorbed"] += 1 if error_absorbed else 0
+
+    # ---------------------------------------------------------
+    # Sync
+    # ---------------------------------------------------------
+    def run(self, key: str, fn: Callable[[], Any], tokens_of: Callable[[Any], Tuple[int, int]]):
+        """Call fn(), hedging it once if it is slower than the key's threshold."""
+        started = time.monotonic()
+        delay = self._begin(key)
+        if delay is None:
+            result = fn()
+            self._finish(key, started, time.monotonic() - started)
+            return result
+
+        pool = self._executor()
+        primary = pool.submit(contextvars.copy_context().run, fn)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget(key):
+            result = primary.result()
+            self._finish(key, started, time.monotonic() - started)
+            return result
+
+        hedge = pool.submit(contextvars.copy_context().run, fn)
+        pending, error = {primary, hedge}, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = next((f for f in done if f.exception() is None), None)
+            if winner is not None:
+                break
+            error = next(iter(done)).exception()
+        else:
+            self._finish(key, started, None)
+            raise error
+
+        loser = hedge if winner is primary else primary
+        result = winner.result()
+        self._count_win(key, winner is hedge)
+        self._finish(key, started, time.monotonic() - started if winner is primary else None)
+
+        def settle(future):
+            if future.exception() is None:
+                self._count_loser(key, sum(tokens_of(future.result())))
+            else:
+                self._count_loser(key, 0, error_absorbed=True)
+            if loser is primary:
+                self.primary.record(key, time.monotonic() - started)
+        loser.add_done_callback(settle)
+        return result
+
+    # ---------------------------------------------------------
+    # Async
+    # ---------------------------------------------------------
+    async def arun(self, key: str, fn: Callable[[], Any], tokens_of: Callable[[Any], Tuple[int, int]]):
+        """Async twin of run(); fn returns an awaitable and the loser is cancelled."""
+        started = time.monotonic()
+        delay = self._begin(key)
+        if delay is None:
+            result = await fn()
+            self._finish(key, started, time.monotonic() - started)
+            return result
+
+        primary = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._take_budget(key):
+            result = await primary
+            self._finish(key, started, time.monotonic() - started)
+            return result
+
+        hedge = asyncio.ensure_future(fn())
+        pending, error, winner = {primary, hedge}, None, None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((t for t in done if t.exception() is None), None)
+                if winner is None:
+                    error = next(iter(done)).exception()
+        finally:
+            for task in pending:
+                task.cancel()
+        if winner is None:
+            self._finish(key, started, None)
+            raise error
+
+        result = winner.result()
+        loser = hedge if winner is primary else primary
+        # A cancelled primary's latency is unknown; recording the hedge's time would bias the threshold down
+        primary_completed = primary.done() and not primary.cancelled() and primary.exception() is None
+        self._finish(key, started, time.monotonic() - started if primary_completed else None)
+        if loser.done() and not loser.cancelled() and loser.exception() is None:
+            tokens = sum(tokens_of(loser.result()))
+        else:
+            tokens = tokens_of(result)[0]    # the cancelled request's prompt was sent and likely billed
+        self._count_win(key, winner is hedge)
+        self._count_loser(key, tokens)
+        return result
+
+    # ---------------------------------------------------------
+    # Report
+    # ---------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = {key: dict(step) for key, step in self._steps.items()}
+            totals = {"calls": self._calls, "hedges": self._hedges}
+        for key, step in steps.items():
+            p99_primary = self.primary.quantile(key, 0.99)
+            p99_effective = self.effective.quantile(key, 0.99)
+            step["hedge_rate"] = step["hedged"] / step["calls"] if step["calls"] else 0.0
+            step["threshold"] = self.delay_for(key)
+            step["p50"] = self.effective.quantile(key, 0.5)
+            step["p99"] = p99_effective
+            step["p99_unhedged"] = p99_primary
+            step["p99_reduction"] = (p99_primary - p99_effective) if p99_primary is not None and p99_effective is not None else None
+        totals["hedge_rate"] = totals["hedges"] / totals["calls"] if totals["calls"] else 0.0
+        return {**totals, "steps": steps}
+
+
+def build_hedger(settings: Optional[Dict[str, Any]]) -> Optional[Hedger]:
+    """Build a Hedger from the LLM_HEDGING setting in config.py (None disables hedging)."""
+    if not settings:
+        return None
+    return Hedger(**settings)
@@ -0,0 +1,190 @@
+# agents/mycore/json_stream.py
+import json
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+
+_WHITESPACE = " \t\r\n"
+
+
+def format_path(path: tuple) -> str:
+    """("keypoints", 0, "text") -> "keypoints[0].text"."""
+    out = ""
+    for part in path:
+        if isinstance(part, int):
+            out += f"[{part}]"
+        else:
+            out += f".{part}" if out else part
+    return out
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for a JSON document that arrives in fragments (streamed
+    completions). feed() returns every value that closed within the new
+    fragment as (path, value), e.g.
+
+        (("protagonist",), "台南市政府")
+        (("keypoints", 0), "...")
+        (("keypoints",), [...])
+
+    Only values up to max_depth are reported (depth 1 = top-level fields,
+    depth 2 = their items / sub-fields). The root value is available from
+    result once done is True.
+
+    The parser only tracks structure; each closed value is decoded with
+    json.loads, so it accepts exactly what json.loads accepts.
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.done = False
+        self.result: Any = None
+
+        self._text = ""
+        self._pos = 0
+        # Open containers: {"kind": "object"|"array", "start": int, "key": str, "index": int, "expect_key": bool}
+        self._stack: List[Dict[str, Any]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._scalar_start = None
+
+    def _path(self) -> tuple:
+        return tuple(f["key"] if f["kind"] == "object" else f["index"] for f in self._stack)
+
+    def _close_value(self, start: int, end: int, events: list) -> None:
+        value = json.loads(self._text[start:end])
+        if not self._stack:
+            self.done = True
+            self.result = value
+            return
+        path = self._path()
+        if len(path) <= self.max_depth:
+            events.append((path, value))
+
+    def _close_scalar(self, end: int, events: list) -> None:
+        start, self._scalar_start = self._scalar_start, None
+        self._close_value(start, end, events)
+
+    def feed(self, fragment: str) -> List[Tuple[tuple, Any]]:
+        """Consume the next fragment; return the values it completed."""
+        if self.done and fragment.strip():
+            raise ValueError("Extra data after the JSON document")
+        self._text += fragment
+        events: list = []
+        text = self._text
+
+        for i in range(self._pos, len(text)):
+            c = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    frame = self._stack[-1] if self._stack else None
+                    if frame is not None and frame["kind"] == "object" and frame["expect_key"]:
+                        frame["key"] = json.loads(text[self._string_start:i + 1])
+                        frame["expect_key"] = False
+                    else:
+                        self._close_value(self._string_start, i + 1, events)
+                continue
+
+            if self._scalar_start is not None and (c in _WHITESPACE or c in ",]}"):
+                self._close_scalar(i, events)
+
+            if c in _WHITESPACE or c == ":":
+                continue
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._stack.append({
+                    "kind": "object" if c == "{" else "array",
+                    "start": i, "key": None, "index": 0, "expect_key": c == "{",
+                })
+            elif c in "}]":
+                frame = self._stack.pop()
+                self._close_value(frame["start"], i + 1, events)
+            elif c == ",":
+                frame = self._stack[-1]
+                if frame["kind"] == "object":
+                    frame["expect_key"] = True
+                else:
+                    frame["index"] += 1
+            elif self._scalar_start is None:
+                self._scalar_start = i
+
+        self._pos = len(text)
+        return events
+
+    def close(self) -> List[Tuple[tuple, Any]]:
+        """Finish the document (flushes a bare top-level number/literal)."""
+        events: list = []
+        if self._scalar_start is not None:
+            self._close_scalar(len(self._text), events)
+        if not self.done:
+            raise ValueError("Incomplete JSON document")
+        return events
+
+
+class _FieldTimer:
+    """Shared bookkeeping of stream_json_fields / astream_json_fields."""
+
+    def __init__(self, max_depth: int):
+        self.parser = IncrementalJSONParser(max_depth)
+        self.started = time.monotonic()
+        self.first_field = None
+
+    def fields(self, delta: str) -> List[Dict[str, Any]]:
+        events = []
+        for path, value in self.parser.feed(delta):
+            elapsed = time.monotonic() - self.started
+            if self.first_field is None:
+                self.first_field = elapsed
+            events.append({"type": "field", "path": path, "field": format_path(path), "value": value, "elapsed": elapsed})
+        return events
+
+    def final(self, event: Dict[str, Any]) -> Dict[str, Any]:
+        self.parser.close()
+        return {
+            "type": "final",
+            "value": self.parser.result,
+            "time_to_first_field": self.first_field,
+            "time_to_first_token": event.get("time_to_first_token"),
+            "elapsed": time.monotonic() - self.started,
+            "tokens_in": event.get("tokens_in"),
+            "tokens_out": event.get("tokens_out"),
+            "cache_hit": event.get("cache_hit", False),
+        }
+
+
+def stream_json_fields(stream: Iterable[Dict[str, Any]], max_depth: int = 2) -> Iterator[Dict[str, Any]]:
+    """
+    Turn LLMClient.invoke_stream() events into field events:
+
+        {"type": "field", "path": ("keypoints", 0), "field": "keypoints[0]",
+         "value": ..., "elapsed": seconds since the call started}
+        ...
+        {"type": "final", "value": parsed_document, "time_to_first_field": seconds,
+         "time_to_first_token": seconds, "elapsed": seconds, "tokens_in": int, "tokens_out": int}
+    """
+    timer = _FieldTimer(max_depth)
+    for event in stream:
+        if event["type"] == "delta":
+            yield from timer.fields(event["content"])
+        elif event["type"] == "final":
+            yield timer.final(event)
+
+
+async def astream_json_fields(stream, max_depth: int = 2):
+    """Async twin of stream_json_fields() for LLMClient.ainvoke_stream()."""
+    timer = _FieldTimer(max_depth)
+    async for event in stream:
+        if event["type"] == "delta":
+            for field in timer.fields(event["content"]):
+                yield field
+        elif event["type"] == "final":
+            yield timer.final(event)
@@ -0,0 +1,391 @@
+# agents/mycore/ledger.py
+"""
+Token and cost ledger for LLM calls.
+
+Every LLMClient call is recorded with its prompt / completion / reasoning /
+cached tokens, wall time and estimated cost, tagged with the context it ran
+in. Tags come from a contextvar, so nothing has to be threaded through the
+tools:
+    - UnifyAPI.process      -> user, request_id
+    - BaseGraph._wrap_node  -> graph, node
+    - auto_wrap_error       -> step (outermost tool method, e.g. "IntentAgentTool.classify")
+    - LLMClient             -> profile (execution profile of the call, see profiles.py)
+
+Records are aggregated in-process and flushed in batches (every flush_every
+records / flush_interval seconds, and at exit) to SQLite and/or Redis. The
+writes run on a background thread, never on the request path; a failed
+SQLite write keeps the records queued for the next flush.
+
+Query the SQLite ledger per step:
+    python -m agents.mycore.ledger temp/llm_ledger.sqlite3 --by graph,node,step
+"""
+import argparse
+import atexit
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+_TAGS: contextvars.ContextVar = contextvars.ContextVar("llm_ledger_tags", default={})
+_METERS: contextvars.ContextVar = contextvars.ContextVar("llm_usage_meters", default=())
+
+TAG_FIELDS = ("graph", "node", "step", "model", "user", "request_id", "profile")
+SUMMARY_FIELDS = ("graph", "node", "step", "model", "profile")
+COUNTER_FIELDS = (
+    "calls", "api_calls", "errors", "cache_hits", "coalesced",
+    "tokens_in", "tokens_out", "reasoning_tokens", "cached_tokens", "wall_time", "cost_usd",
+)
+MAX_PENDING_FLUSHES = 10       # records kept while SQLite is failing: flush_every * this
+
+
+# =========================================================
+# Tags
+# =========================================================
+@contextmanager
+def ledger_tags(**tags):
+    """Tag every LLM call made inside the block (inner tags override outer ones)."""
+    token = _TAGS.set({**_TAGS.get(), **{k: v for k, v in tags.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _TAGS.reset(token)
+
+
+@contextmanager
+def step_tag(step: str):
+    """Set the step tag unless an outer tool method already did (keeps the public entry point)."""
+    if "step" in _TAGS.get():
+        yield
+        return
+    with ledger_tags(step=step):
+        yield
+
+
+def current_tags() -> Dict[str, Any]:
+    return dict(_TAGS.get())
+
+
+@contextmanager
+def usage_meter():
+    """
+    Sum the usage of every LLM call made inside the block (also in tasks and
+    threads started with its context) into the yielded dict.
+    """
+    meter = {"calls": 0, "tokens_in": 0, "tokens_out": 0, "reasoning_tokens": 0}
+    token = _METERS.set((*_METERS.get(), meter))
+    try:
+        yield meter
+    finally:
+        _METERS.reset(token)
+
+
+def meter_usage(result: Optional[Dict[str, Any]]) -> None:
+    """Add one call's usage to the active usage meters (called by LLMClient)."""
+    for meter in _METERS.get():
+        meter["calls"] += 1
+        for field in ("tokens_in", "tokens_out", "reasoning_tokens"):
+            meter[field] += (result or {}).get(field) or 0
+
+
+def usage_details(usage) -> Dict[str, int]:
+    """Reasoning and cached prompt tokens from an OpenAI usage object (0 when absent)."""
+    completion = getattr(usage, "completion_tokens_details", None)
+    prompt = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "reasoning_tokens": getattr(completion, "reasoning_tokens", None) or 0,
+        "cached_tokens": getattr(prompt, "cached_tokens", None) or 0,
+    }
+
+
+def _with_rates(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Add cached_share: fraction of billed prompt tokens served from the provider's prompt cache."""
+    row["cached_share"] = row["cached_tokens"] / row["tokens_in"] if row["tokens_in"] else 0.0
+    return row
+
+
+# =========================================================
+# Ledger
+# =========================================================
+class TokenLedger:
+    """
+    In-process token/cost aggregation with batched persistence.
+
+    prices: USD per 1M tokens per model prefix (longest prefix wins), e.g.
+        {"gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.40}}
+    Reasoning tokens are billed as output and are already part of tokens_out.
+    Cache hits and coalesced followers are recorded with zero billed tokens.
+    """
+
+    def __init__(
+        self,
+        sqlite_path: Optional[str] = None,
+        redis_client=None,
+        prices: Optional[Dict[str, Dict[str, float]]] = None,
+        flush_every: int = 200,
+        flush_interval: float = 10.0,
+        redis_prefix: str = "llm_ledger:",
+    ):
+        self.sqlite_path = sqlite_path
+        self.redis = redis_client
+        self.prices = prices or {}
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.redis_prefix = redis_prefix
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()       # one writer at a time; held during I/O, not by record()
+        self._flush_due = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+        self._pending: List[Dict[str, Any]] = []
+        self._totals: Dict[tuple, Dict[str, float]] = {}
+        self._last_flush = time.monotonic()
+        self._retry_at = 0.0                      # after a failed write, wait flush_interval before the next
+        self._conn = None
+        self._pid = None
+
+        if sqlite_path:
+            os.makedirs(os.path.dirname(os.path.abspath(sqlite_path)), exist_ok=True)
+        atexit.register(self.flush)
+
+    def cost(self, model: str, tokens_in: int, tokens_out: int, cached_tokens: int = 0) -> float:
+        matches = [prefix for prefix in self.prices if model.startswith(prefix)]
+        if not matches:
+            return 0.0
+        price = self.prices[max(matches, key=len)]
+        cached_price = price.get("cached_input", price.get("input", 0.0))
+        return (
+            (tokens_in - cached_tokens) * price.get("input", 0.0)
+            + cached_tokens * cached_price
+            + tokens_out * price.get("output", 0.0)
+        ) / 1_000_000
+
+    # ---------------------------------------------------------
+    # Recording
+    # ---------------------------------------------------------
+    def record_call(self, model: str, result: Optional[Dict[str, Any]], wall_time: float) -> None:
+        """Record one LLMClient call; result is None when it raised."""
+        result = result or {}
+        billed = bool(result) and not result.get("cache_hit") and not result.get("coalesced")
+        tokens = {
+            field: int(result.get(field) or 0) if billed else 0
+            for field in ("tokens_in", "tokens_out", "reasoning_tokens", "cached_tokens")
+        }
+        self.record(
+            model=model,
+            wall_time=wall_time,
+            api_calls=int(result.get("api_calls", 1)) if billed else 0,
+            errors=0 if result else 1,
+            cache_hits=1 if result.get("cache_hit") else 0,
+            coalesced=1 if result.get("coalesced") else 0,
+            **tokens,
+        )
+
+    def record(self, model: str, wall_time: float = 0.0, **counters) -> None:
+        tags = current_tags()
+        entry = {field: tags.get(field, "") for field in TAG_FIELDS}
+        entry["model"] = model
+        entry["ts"] = time.time()
+        for field in COUNTER_FIELDS:
+            entry[field] = counters.get(field, 0)
+        entry["calls"] = 1
+        entry["wall_time"] = wall_time
+        entry["cost_usd"] = self.cost(model, entry["tokens_in"], entry["tokens_out"], entry["cached_tokens"])
+
+        key = tuple(entry[f] for f in SUMMARY_FIELDS)
+        with self._lock:
+            totals = self._totals.setdefault(key, dict.fromkeys(COUNTER_FIELDS, 0))
+            for field in COUNTER_FIELDS:
+                totals[field] += entry[field]
+            self._pending.append(entry)
+            now = time.monotonic()
+            due = now >= self._retry_at and (
+                len(self._pending) >= self.flush_every or now - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self._wake_flusher()
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def _connection(self) -> sqlite3.Connection:
+        # SQLite connections must not cross a fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.sqlite_path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = ", ".join(f"{f} TEXT" for f in TAG_FIELDS) + ", ts REAL, " + ", ".join(f"{f} REAL" for f in COUNTER_FIELDS)
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS llm_ledger ({columns})")
+            # Ledgers created before a tag field existed
+            existing = {row[1] for row in self._conn.execute("PRAGMA table_info(llm_ledger)")}
+            for field in TAG_FIELDS:
+                if field not in existing:
+                    self._conn.execute(f"ALTER TABLE llm_ledger ADD COLUMN {field} TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_ledger_ts ON llm_ledger(ts)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def _wake_flusher(self) -> None:
+        """Have the background thread flush (started on first use and again after a fork)."""
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                # The parent's flush thread (and any lock it held) did not survive the fork
+                self._flush_lock = threading.Lock()
+                self._flusher = None
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._flush_loop, name="llm-ledger-flush", daemon=True)
+                self._flusher_pid = os.getpid()
+                self._flusher.start()
+        self._flush_due.set()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._flush_due.wait()
+            self._flush_due.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending records to SQLite / Redis; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._last_flush = time.monotonic()
+            if not pending:
+                return 0
+
+            if self.sqlite_path:
+                try:
+                    self._write_sqlite(pending)
+                except Exception as e:
+                    # The ledger must never fail a request: keep the records for the next flush
+                    with self._lock:
+                        self._pending[:0] = pending
+                        self._retry_at = time.monotonic() + self.flush_interval
+                        dropped = len(self._pending) - self.flush_every * MAX_PENDING_FLUSHES
+                        if dropped > 0:
+                            del self._pending[:dropped]
+                    print(f"LLM ledger SQLite flush failed ({len(pending)} records re-queued"
+                          + (f", {dropped} oldest dropped" if dropped > 0 else "") + f"): {e}")
+                    return 0
+            self._write_redis(pending)
+        return len(pending)
+
+    def _write_sqlite(self, pending: List[Dict[str, Any]]) -> None:
+        fields = TAG_FIELDS + ("ts",) + COUNTER_FIELDS
+        conn = self._connection()
+        try:
+            conn.executemany(
+                f"INSERT INTO llm_ledger ({', '.join(fields)}) VALUES ({', '.join('?' * len(fields))})",
+                [tuple(entry[f] for f in fields) for entry in pending],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def _write_redis(self, pending: List[Dict[str, Any]]) -> None:
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for entry in pending:
+                    key = self.redis_prefix + "|".join(entry[f] or "-" for f in ("graph", "node", "step", "model"))
+                    for field in COUNTER_FIELDS:
+                        if entry[field]:
+                            pipe.hincrbyfloat(key, field, entry[field])
+                pipe.execute()
+            except Exception as e:
+                # The ledger must never fail a request
+                print(f"LLM ledger Redis flush failed: {e}")
+        return len(pending)
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+    def summary(self, by=("graph", "node", "step", "model")) -> List[Dict[str, Any]]:
+        """In-process totals (since start) grouped by tag fields (from SUMMARY_FIELDS), most expensive first."""
+        grouped: Dict[tuple, Dict[str, float]] = {}
+        with self._lock:
+            for key, totals in self._totals.items():
+                tags = dict(zip(SUMMARY_FIELDS, key))
+                group = tuple(tags[f] for f in by)
+                target = grouped.setdefault(group, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field in COUNTER_FIELDS:
+                    target[field] += totals[field]
+        rows = [_with_rates({**dict(zip(by, group)), **totals}) for group, totals in grouped.items()]
+        return sorted(rows, key=lambda r: (r["cost_usd"], r["tokens_in"] + r["tokens_out"]), reverse=True)
+
+    def query(self, by=("graph", "node", "step", "model"), since: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Totals from the SQLite ledger (all processes that flushed to it), grouped by tag fields."""
+        self.flush()
+        return query_sqlite(self.sqlite_path, by, since)
+
+
+def query_sqlite(path: str, by=("graph", "node", "step", "model"), since: Optional[float] = None) -> List[Dict[str, Any]]:
+    for field in by:
+        if field not in TAG_FIELDS:
+            raise ValueError(f"Unknown ledger field: {field}")
+    group = ", ".join(by)
+    sums = ", ".join(f"SUM({f})" for f in COUNTER_FIELDS)
+    with sqlite3.connect(path, timeout=10) as conn:
+        rows = conn.execute(
+            f"SELECT {group}, {sums} FROM llm_ledger WHERE ts >= ? GROUP BY {group} "
+            f"ORDER BY SUM(cost_usd) DESC, SUM(tokens_in) + SUM(tokens_out) DESC",
+            (since or 0,),
+        ).fetchall()
+    return [_with_rates(dict(zip(by + COUNTER_FIELDS, row))) for row in rows]
+
+
+def build_ledger(settings: Optional[Dict[str, Any]]) -> Optional[TokenLedger]:
+    """
+    Build a TokenLedger from the LLM_LEDGER setting in config.py.
+
+    Example:
+        LLM_LEDGER = {
+            "sqlite_path": "temp/llm_ledger.sqlite3",
+            "redis_url": None,            # e.g. "redis://localhost:6379/4"
+            "flush_every": 200,
+            "flush_interval": 10.0,
+            "prices": {"gpt-5-nano": {"input": 0.05, "cached_input": 0.005, "output": 0.40}},
+        }
+    """
+    if not settings:
+        return None
+    redis_client = None
+    if settings.get("redis_url"):
+        import redis
+        redis_client = redis.Redis.from_url(settings["redis_url"])
+    return TokenLedger(
+        sqlite_path=settings.get("sqlite_path"),
+        redis_client=redis_client,
+        prices=settings.get("prices"),
+        flush_every=settings.get("flush_every", 200),
+        flush_interval=settings.get("flush_interval", 10.0),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize the LLM token/cost ledger")
+    parser.add_argument("path", nargs="?", default="temp/llm_ledger.sqlite3")
+    parser.add_argument("--by", default="graph,node,step,model", help=f"comma-separated, from {','.join(TAG_FIELDS)}")
+    parser.add_argument("--hours", type=float, help="only the last N hours")
+    args = parser.parse_args()
+
+    by = tuple(f.strip() for f in args.by.split(",") if f.strip())
+    since = time.time() - args.hours * 3600 if args.hours else None
+    rows = query_sqlite(args.path, by, since)
+    total = sum(r["tokens_in"] + r["tokens_out"] for r in rows) or 1
+    for row in rows:
+        name = " / ".join(str(row[f] or "-") for f in by)
+        tokens = row["tokens_in"] + row["tokens_out"]
+        print(
+            f"{name:<70} calls={int(row['calls']):>6} in={int(row['tokens_in']):>9} "
+            f"out={int(row['tokens_out']):>8} (reasoning {int(row['reasoning_tokens'])}) cached={row['cached_share']:5.1%} "
+            f"share={tokens / total:6.1%} ${row['cost_usd']:.4f} wall={row['wall_time']:.1f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+# agents/mycore/micro_batch.py
+"""
+Cross-request micro-batching of small structured-output steps.
+
+Steps like intent classification answer with a single enum but pay a full
+round trip and the whole (large) system prompt per document. During bursts
+the MicroBatcher holds such calls for `window` seconds, packs up to
+`max_batch` of them into one request whose schema is an array of the
+step's answers (each tagged with the item id) and hands every caller its
+own answer.
+
+A step opts in with "micro_batch": true in its agent config.json (or a list
+of json_schema names, for configs shared by several steps). Calls are only
+packed together when system prompt and config are identical. Items whose
+answer is missing or fails the step's schema / cascade reject rules, and
+all items of a batch whose response cannot be parsed, fall back to a normal
+single call (LLMClient.invoke_json, cascade included) in the caller.
+
+The combined request is not metered as one call: every item gets its own
+ledger entry, under its caller's tags (user, request_id, node, step), with
+an even share of the batch's tokens. Batched answers are not written to the
+response cache, which only holds real single-call responses.
+
+Batching needs concurrent callers in one process: the async pipeline
+(UnifyAPI.aprocess) or a threaded Celery pool.
+"""
+import asyncio
+import contextvars
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from agents.mycore.cascade import validate_schema, rejected_values
+
+BATCH_INSTRUCTIONS = (
+    "\n\nBATCH MODE:\n"
+    "The user message contains several independent items, each starting with a line \"### Item <id>\".\n"
+    "Handle every item as a separate request under the rules above; items must not influence each other.\n"
+    "Return one JSON object {\"results\": [...]} with exactly one entry per item, holding the item's \"id\" "
+    "and the fields of that item's answer.\n"
+)
+
+# Marks an item the caller must answer with a single call
+_FALLBACK = object()
+
+_SHARED_FIELDS = ("tokens_in", "tokens_out", "reasoning_tokens", "cached_tokens", "api_calls")
+
+
+def batching_enabled(config: Dict[str, Any]) -> bool:
+    """Whether a merged config opted in to micro-batching."""
+    flag = config.get("micro_batch")
+    if isinstance(flag, list):
+        name = ((config.get("response_format") or {}).get("json_schema") or {}).get("name")
+        return name in flag
+    return bool(flag)
+
+
+def batch_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Array-of-answers schema for a step's (object) answer schema."""
+    item = {
+        "type": "object",
+        "properties": {"id": {"type": "integer"}, **schema.get("properties", {})},
+        "required": ["id", *schema.get("required", [])],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "object",
+        "properties": {"results": {"type": "array", "items": item}},
+        "required": ["results"],
+        "additionalProperties": False,
+    }
+
+
+class _Item:
+    def __init__(self, user_prompt: str, document: Optional[str]):
+        self.user_prompt = user_prompt
+        self.document = document
+        self.value: Any = _FALLBACK
+        self.done = threading.Event()
+        self.future: Optional[asyncio.Future] = None
+        # Ledger tags etc. of this caller, to meter its share of the batch
+        self.context = contextvars.copy_context()
+
+
+class _Batch:
+    def __init__(self, system_prompt: str, config: Dict[str, Any]):
+        self.system_prompt = system_prompt
+        self.config = config
+        self.items: List[_Item] = []
+        self.handle = None
+
+
+class MicroBatcher:
+    """Packs concurrent small structured-output calls into one request per batch."""
+
+    def __init__(self, window: float = 0.01, max_batch: int = 16, max_completion_tokens: int = 32000):
+        self.window = window
+        self.max_batch = max_batch
+        self.max_completion_tokens = max_completion_tokens
+        self._lock = threading.Lock()
+        self._open: Dict[Any, _Batch] = {}
+        self._stats = {"calls": 0, "singles": 0, "batches": 0, "batched_items": 0, "fallbacks": 0, "failed_batches": 0}
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[field] += amount
+
+    @staticmethod
+    def _batch_key(system_prompt: str, config: Dict[str, Any]) -> str:
+        canonical = json.dumps([system_prompt, config], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _single_config(config: Dict[str, Any]) -> Dict[str, Any]:
+        return {**config, "micro_batch": False}
+
+    # ---------------------------------------------------------
+    # Packing and fan-out
+    # ---------------------------------------------------------
+    def _packed_request(self, batch: _Batch) -> tuple:
+        """(user_prompt, system_prompt, config) of the combined request."""
+        config = {k: v for k, v in batch.config.items() if k not in ("micro_batch", "cascade", "prompt_cache_key", "cache")}
+        config["metered"] = False
+        json_schema = config["response_format"]["json_schema"]
+        config["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": f"{json_schema['name']}_batch", "strict": True, "schema": batch_schema(json_schema["schema"])},
+        }
+        per_item = config.get("max_completion_tokens", 500)
+        config["max_completion_tokens"] = min(self.max_completion_tokens, per_item * len(batch.items))
+        parts = []
+        for i, item in enumerate(batch.items):
+            body = item.user_prompt if item.document is None else f"{item.document}\n\n{item.user_prompt}"
+            parts.append(f"### Item {i}\n{body}")
+        return "\n\n".join(parts), batch.system_prompt + BATCH_INSTRUCTIONS, config
+
+    def _fan_out(self, batch: _Batch, content: Optional[str]) -> None:
+        """Give every item its own answer; items without a valid one keep _FALLBACK."""
+        try:
+            results = json.loads(content or "")["results"]
+        except (ValueError, KeyError, TypeError):
+            self._count("failed_batches")
+            return
+        schema = batch.config["response_format"]["json_schema"]["schema"]
+        reject = (batch.config.get("cascade") or {}).get("reject", {})
+        for entry in results if isinstance(results, list) else []:
+            if not isinstance(entry, dict) or not isinstance(entry.get("id"), int):
+                continue
+            if not 0 <= entry["id"] < len(batch.items):
+                continue
+            answer = {k: v for k, v in entry.items() if k != "id"}
+            if validate_schema(answer, schema) or rejected_values(answer, reject):
+                continue
+            batch.items[entry["id"]].value = answer
+
+    @staticmethod
+    def _meter_items(client, batch: _Batch, result: Optional[Dict[str, Any]], elapsed: float) -> None:
+        """One ledger entry per item, in the item's own context, with an even share of the batch's usage."""
+        count = len(batch.items)
+        for i, item in enumerate(batch.items):
+            share = None
+            if result is not None:
+                share = dict(result)
+                for field in _SHARED_FIELDS:
+                    total = int(result.get(field) or 0)
+                    share[field] = total // count + (1 if i < total % count else 0)
+            item.context.run(client.record_usage, batch.config, share, elapsed)
+
+    def _settle(self, batch: _Batch) -> None:
+        if len(batch.items) == 1:
+            # Nobody to share with: the caller makes its normal call
+            self._count("singles")
+            return
+        fallbacks = sum(1 for item in batch.items if item.value is _FALLBACK)
+        self._count("fallbacks", fallbacks)
+        self._count("batched_items", len(batch.items) - fallbacks)
+
+    # ---------------------------------------------------------
+    # Sync
+    # ---------------------------------------------------------
+    def _run(self, client, batch: _Batch) -> None:
+        started = time.monotonic()
+        try:
+            if len(batch.items) > 1:
+                self._count("batches")
+                result = client.invoke(*self._packed_request(batch))
+                self._meter_items(client, batch, result, time.monotonic() - started)
+                self._fan_out(batch, result.get("content"))
+        except Exception:
+            self._count("failed_batches")
+            self._meter_items(client, batch, None, time.monotonic() - started)
+        finally:
+            self._settle(batch)
+            for item in batch.items:
+                item.done.set()
+
+    def _flush(self, client, key: str, batch: _Batch) -> None:
+        with self._lock:
+            if self._open.get(key) is not batch:
+                return
+            del self._open[key]
+        self._run(client, batch)
+
+    def invoke_json(self, client, user_prompt: str, system_prompt: str, config: Dict[str, Any], document: Optional[str] = None) -> Any:
+        """client.invoke_json() for one item, answered from a shared batch when possible."""
+        key = self._batch_key(system_prompt, config)
+        item = _Item(user_prompt, document)
+        with self._lock:
+            self._stats["calls"] += 1
+            batch = self._open.get(key)
+            if batch is None:
+                batch = self._open[key] = _Batch(system_prompt, config)
+                batch.handle = threading.Timer(self.window, self._flush, args=(client, key, batch))
+                batch.handle.daemon = True
+                batch.handle.start()
+            batch.items.append(item)
+            full = len(batch.items) >= self.max_batch
+            if full:
+                del self._open[key]
+                batch.handle.cancel()
+        if full:
+            self._run(client, batch)
+
+        item.done.wait()
+        if item.value is _FALLBACK:
+            return client.invoke_json(user_prompt, system_prompt, self._single_config(config), document)
+        return item.value
+
+    # ---------------------------------------------------------
+    # Async
+    # ---------------------------------------------------------
+    async def _arun(self, client, batch: _Batch) -> None:
+        started = time.monotonic()
+        try:
+            if len(batch.items) > 1:
+                self._count("batches")
+                result = await client.ainvoke(*self._packed_request(batch))
+                self._meter_items(client, batch, result, time.monotonic() - started)
+                self._fan_out(batch, result.get("content"))
+        except Exception:
+            self._count("failed_batches")
+            self._meter_items(client, batch, None, time.monotonic() - started)
+        finally:
+            self._settle(batch)
+            for item in batch.items:
+                if not item.future.done():
+                    item.future.set_result(item.value)
+
+    def _aflush(self, client, slot: tuple, batch: _Batch) -> None:
+        if self._open.get(slot) is not batch:
+            return
+        del self._open[slot]
+        asyncio.get_running_loop().create_task(self._arun(client, batch))
+
+    async def ainvoke_json(self, client, user_prompt: str, system_prompt: str, config: Dict[str, Any], document: Optional[str] = None) -> Any:
+        """Async twin of invoke_json(); batches calls made on the same event loop."""
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), self._batch_key(system_prompt, config))
+        item = _Item(user_prompt, document)
+        item.future = loop.create_future()
+        self._count("calls")
+
+        batch = self._open.get(slot)
+        if batch is None:
+            batch = self._open[slot] = _Batch(system_prompt, config)
+            batch.handle = loop.call_later(self.window, self._aflush, client, slot, batch)
+        batch.items.append(item)
+        if len(batch.items) >= self.max_batch:
+            batch.handle.cancel()
+            self._aflush(client, slot, batch)
+
+        value = await asyncio.shield(item.future)
+        if value is _FALLBACK:
+            return await client.ainvoke_json(user_prompt, system_prompt, self._single_config(config), document)
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Calls, batches sent, items answered from a batch, fallbacks to a
+        single call, calls that found no partner (singles) and the mean
+        number of items answered per batch.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["mean_batch_size"] = stats["batched_items"] / stats["batches"] if stats["batches"] else 0.0
+        return stats
+
+
+def build_micro_batcher(settings: Optional[Dict[str, Any]]) -> Optional[MicroBatcher]:
+    """Build a MicroBatcher from the LLM_MICRO_BATCH setting in config.py (None disables batching)."""
+    if not settings:
+        return None
+    return MicroBatcher(**settings)
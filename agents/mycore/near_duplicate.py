@@ -0,0 +1,204 @@
+# agents/mycore/near_duplicate.py
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+MASK64 = (1 << 64) - 1
+
+# Share-link footers and boilerplate that users' clients append when forwarding
+_URL_RE = re.compile(r"https?://\S+|www\.\S+")
+_FOOTER_RE = re.compile(
+    r"^\s*(分享自|來源[:：]|原文網址|原文連結|更多新聞|看更多|延伸閱讀|"
+    r"sent from|shared via|read more|source:).*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a document for fingerprinting:
+    NFKC (full/half width), lower case, drop URLs and share footers,
+    remove all whitespace (CJK text has no word boundaries anyway).
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    text = _URL_RE.sub(" ", text)
+    text = _FOOTER_RE.sub(" ", text)
+    return _SPACE_RE.sub("", text)
+
+
+def minhash_sketch(normalized: str, k: int = 5, sketch_size: int = 128) -> List[int]:
+    """
+    Bottom-k MinHash sketch: the sketch_size smallest hashes of the
+    character k-shingles, sorted. Python's str hash is stable within a
+    process, which is all an in-memory index needs.
+    """
+    if len(normalized) <= k:
+        shingles = {hash(normalized) & MASK64} if normalized else set()
+    else:
+        shingles = {hash(normalized[i:i + k]) & MASK64 for i in range(len(normalized) - k + 1)}
+    return sorted(heapq.nsmallest(sketch_size, shingles))
+
+
+def estimate_jaccard(sketch_a: List[int], sketch_b: List[int]) -> float:
+    """Jaccard similarity estimate from two bottom-k sketches."""
+    if not sketch_a or not sketch_b:
+        return 0.0
+    size = min(len(sketch_a), len(sketch_b))
+    set_a, set_b = set(sketch_a), set(sketch_b)
+    union_k = heapq.nsmallest(size, set_a | set_b)
+    shared = sum(1 for h in union_k if h in set_a and h in set_b)
+    return shared / size
+
+
+def false_match_probability(estimate: float, threshold: float, sketch_size: int) -> float:
+    """
+    Probability that the true Jaccard is below threshold given a sketch
+    estimate (normal approximation of the binomial sampling error).
+    """
+    variance = max(estimate * (1.0 - estimate), 1.0 / sketch_size) / sketch_size
+    z = (threshold - estimate) / math.sqrt(variance)
+    return 0.5 * (1.0 + math.erf(z / math.sqrt(2.0)))
+
+
+class NearDuplicateIndex:
+    """
+    Bounded in-process index of processed documents, used to reuse the stored
+    pipeline result when a new input is a near-duplicate of an earlier one
+    (whitespace changes, share-link footer, truncated tail, ...).
+
+    Lookup:
+      1. Candidates: stored documents sharing at least min_shared MinHash
+         sketch values (inverted index, i.e. MinHash LSH).
+      2. Verification: Jaccard estimate >= threshold.
+
+    Metrics report two false-positive rates:
+      - candidate_false_positive_rate: candidates rejected by verification.
+      - estimated_false_positive_rate: expected share of returned hits whose
+        true similarity is below threshold (sketch sampling error).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        max_entries: int = 5000,
+        shingle_size: int = 5,
+        sketch_size: int = 128,
+        min_shared: Optional[int] = None,
+        min_chars: int = 50,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.shingle_size = shingle_size
+        self.sketch_size = sketch_size
+        # Near-duplicates above threshold share far more than half of that many values
+        self.min_shared = min_shared or max(1, int(sketch_size * threshold / 2))
+        self.min_chars = min_chars   # very short inputs are not worth indexing
+
+        self._entries: "OrderedDict[int, dict]" = OrderedDict()
+        self._postings: Dict[int, set] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._metrics = {
+            "lookups": 0, "hits": 0, "misses": 0, "skipped": 0,
+            "candidates": 0, "rejected_candidates": 0,
+            "expected_false_positives": 0.0,
+            "inserts": 0, "evictions": 0,
+        }
+
+    def _sketch(self, text: str) -> Optional[List[int]]:
+        normalized = normalize_text(text)
+        if len(normalized) < self.min_chars:
+            return None
+        return minhash_sketch(normalized, self.shingle_size, self.sketch_size)
+
+    # =========================================================
+    # Public API
+    # =========================================================
+    def lookup(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Return {"result": stored_result, "similarity": float} for the most
+        similar stored document above threshold, else None.
+        """
+        sketch = self._sketch(text)
+        with self._lock:
+            self._metrics["lookups"] += 1
+            if sketch is None:
+                self._metrics["skipped"] += 1
+                return None
+
+            shared_counts: Dict[int, int] = {}
+            for value in sketch:
+                for entry_id in self._postings.get(value, ()):
+                    shared_counts[entry_id] = shared_counts.get(entry_id, 0) + 1
+
+            best_id, best_sim = None, 0.0
+            for entry_id, shared in shared_counts.items():
+                if shared < self.min_shared:
+                    continue
+                self._metrics["candidates"] += 1
+                similarity = estimate_jaccard(sketch, self._entries[entry_id]["sketch"])
+                if similarity < self.threshold:
+                    self._metrics["rejected_candidates"] += 1
+                    continue
+                if similarity > best_sim:
+                    best_id, best_sim = entry_id, similarity
+
+            if best_id is None:
+                self._metrics["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best_id)
+            self._metrics["hits"] += 1
+            self._metrics["expected_false_positives"] += false_match_probability(
+                best_sim, self.threshold, self.sketch_size
+            )
+            return {"result": self._entries[best_id]["result"], "similarity": best_sim}
+
+    def add(self, text: str, result: Dict[str, Any]) -> bool:
+        """Index a processed document and its pipeline result. Returns False if skipped."""
+        sketch = self._sketch(text)
+        if sketch is None:
+            return False
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {"sketch": sketch, "result": result}
+            for value in sketch:
+                self._postings.setdefault(value, set()).add(entry_id)
+            self._metrics["inserts"] += 1
+
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+        return True
+
+    def _evict_oldest(self) -> None:
+        entry_id, entry = self._entries.popitem(last=False)
+        for value in entry["sketch"]:
+            posting = self._postings.get(value)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._postings[value]
+        self._metrics["evictions"] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Counters plus hit rate and false-positive rates."""
+        with self._lock:
+            m = dict(self._metrics)
+            m["size"] = len(self._entries)
+        m["hit_rate"] = m["hits"] / m["lookups"] if m["lookups"] else 0.0
+        m["candidate_false_positive_rate"] = (
+            m["rejected_candidates"] / m["candidates"] if m["candidates"] else 0.0
+        )
+        m["estimated_false_positive_rate"] = (
+            m["expected_false_positives"] / m["hits"] if m["hits"] else 0.0
+        )
+        return m
+
+    def __len__(self) -> int:
+        return len(self._entries)
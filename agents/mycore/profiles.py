@@ -0,0 +1,180 @@
+# agents/mycore/profiles.py
+"""
+Named execution profiles: reasoning effort, verbosity and completion cap.
+
+Small steps (protagonist extraction, enum classification) do not need a
+reasoning model to think for seconds or an 8000-token budget. A profile
+bundles the settings that trade quality for latency:
+
+    "fast":     {"reasoning_effort": "minimal", "verbosity": "low",    "max_completion_tokens": 2000}
+    "balanced": {"reasoning_effort": "low",     "verbosity": "medium", "max_completion_tokens": 6000}
+    "thorough": {"reasoning_effort": "medium",  "verbosity": "medium", "max_completion_tokens": 12000}
+
+A call picks its profile with "profile" in the config, or through the
+"profiles" map of its agent config.json (json_schema name -> profile), e.g.
+{"protagonist_only": "fast", "keypoints_only": "balanced"}. Profile values
+override the agent config's own values.
+
+Under load every step can be switched to one profile at once with
+force("fast") (per process) or, with a Redis client, across all workers:
+    python -m agents.mycore.profiles --redis-url redis://localhost:6379/6 --force fast
+    python -m agents.mycore.profiles --redis-url redis://localhost:6379/6 --clear
+
+Calls, latency and tokens are counted per profile (stats()); with a ledger
+the calls are also tagged profile=<name>.
+"""
+import argparse
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {"reasoning_effort": "minimal", "verbosity": "low", "max_completion_tokens": 2000},
+    "balanced": {"reasoning_effort": "low", "verbosity": "medium", "max_completion_tokens": 6000},
+    "thorough": {"reasoning_effort": "medium", "verbosity": "medium", "max_completion_tokens": 12000},
+}
+
+OVERRIDE_KEY = "llm_profile:override"
+
+
+class ProfileRegistry:
+    """Resolves a call's profile and applies it to the merged config."""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+        default: Optional[str] = None,
+        redis_client=None,
+        refresh_interval: float = 5.0,
+    ):
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        if default is not None and default not in self.profiles:
+            raise ValueError(f"[ProfileRegistry] unknown default profile {default!r}")
+        self.default = default
+        self.redis = redis_client
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._forced: Optional[str] = None
+        self._shared: Optional[str] = None
+        self._shared_read = 0.0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # ---------------------------------------------------------
+    # Global switch
+    # ---------------------------------------------------------
+    def force(self, name: Optional[str]) -> None:
+        """Run every step with profile `name` (None: back to per-step profiles)."""
+        if name is not None and name not in self.profiles:
+            raise ValueError(f"[ProfileRegistry.force] unknown profile {name!r}")
+        self._forced = name
+        if self.redis is not None:
+            if name is None:
+                self.redis.delete(OVERRIDE_KEY)
+            else:
+                self.redis.set(OVERRIDE_KEY, name)
+            self._shared, self._shared_read = name, time.monotonic()
+
+    def forced(self) -> Optional[str]:
+        """The profile forced on every step, if any (Redis value cached for refresh_interval)."""
+        if self.redis is None:
+            return self._forced
+        now = time.monotonic()
+        if now - self._shared_read >= self.refresh_interval:
+            try:
+                raw = self.redis.get(OVERRIDE_KEY)
+                self._shared = raw.decode() if isinstance(raw, bytes) else raw
+            except Exception:
+                # Keep the last known value if Redis is unreachable
+                pass
+            self._shared_read = now
+        return self._shared if self._shared in self.profiles else None
+
+    # ---------------------------------------------------------
+    # Resolution
+    # ---------------------------------------------------------
+    def resolve(self, config: Dict[str, Any]) -> Optional[str]:
+        """Profile of a call: forced > config "profile" > config "profiles"[schema name] > default."""
+        forced = self.forced()
+        if forced is not None:
+            return forced
+        if config.get("profile"):
+            return config["profile"]
+        schema_name = ((config.get("response_format") or {}).get("json_schema") or {}).get("name")
+        return (config.get("profiles") or {}).get(schema_name) or self.default
+
+    def apply(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """The config with its profile's settings applied; "profile" holds the name used."""
+        name = self.resolve(config)
+        if name is None:
+            return config
+        if name not in self.profiles:
+            raise ValueError(f"[ProfileRegistry.apply] unknown profile {name!r}")
+        return {**config, **self.profiles[name], "profile": name}
+
+    # ---------------------------------------------------------
+    # Report
+    # ---------------------------------------------------------
+    def record(self, name: Optional[str], latency: float, result: Optional[Dict[str, Any]]) -> None:
+        result = result or {}
+        with self._lock:
+            stats = self._stats.setdefault(name or "-", {
+                "calls": 0, "errors": 0, "latency": 0.0, "tokens_in": 0, "tokens_out": 0, "reasoning_tokens": 0,
+            })
+            stats["calls"] += 1
+            stats["errors"] += 0 if result else 1
+            stats["latency"] += latency
+            for field in ("tokens_in", "tokens_out", "reasoning_tokens"):
+                stats[field] += result.get(field) or 0
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per profile: calls, errors, mean latency and mean tokens per call."""
+        with self._lock:
+            out = {}
+            for name, stats in self._stats.items():
+                calls = stats["calls"] or 1
+                out[name] = {
+                    **stats,
+                    "mean_latency": stats["latency"] / calls,
+                    "mean_tokens_out": stats["tokens_out"] / calls,
+                    "mean_reasoning_tokens": stats["reasoning_tokens"] / calls,
+                }
+            return out
+
+
+def build_profiles(settings: Optional[Dict[str, Any]]) -> ProfileRegistry:
+    """
+    Build the ProfileRegistry from the LLM_PROFILES setting in config.py
+    (built-in profiles when unset).
+
+    Example:
+        LLM_PROFILES = {
+            "profiles": {"fast": {"reasoning_effort": "minimal", "verbosity": "low", "max_completion_tokens": 1500}},
+            "default": None,          # profile of steps that name none
+            "redis_url": None,        # share force() across workers
+        }
+    """
+    settings = dict(settings or {})
+    redis_url = settings.pop("redis_url", None)
+    redis_client = None
+    if redis_url:
+        import redis
+        redis_client = redis.Redis.from_url(redis_url)
+    return ProfileRegistry(redis_client=redis_client, **settings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Force one execution profile on every worker (via Redis)")
+    parser.add_argument("--redis-url", required=True)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--force", help="profile name, e.g. fast")
+    group.add_argument("--clear", action="store_true", help="back to per-step profiles")
+    args = parser.parse_args()
+
+    registry = build_profiles({"redis_url": args.redis_url})
+    registry.force(None if args.clear else args.force)
+    print(f"forced profile: {registry.forced() or '(none)'}")
+
+
+if __name__ == "__main__":
+    main()
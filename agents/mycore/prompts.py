@@ -0,0 +1,17 @@
+# agents/mycore/prompts.py
+"""
+Prompts shared across agents.
+
+Every document step (pre-analysis, keypoint and synthesis) sends the same
+system prompt with the document right after it, so all steps for one
+document share one cacheable prompt prefix; the step instructions and
+variables (protagonist, focus aspects) follow the document.
+"""
+
+DOCUMENT_SYSTEM_PROMPT = (
+    "You analyze the input document in steps: identify its protagonist, infer what the reader "
+    "should focus on, then write its keypoints or a synthesis.\n"
+    "The document comes first; the instructions for the current step follow it.\n"
+    "Return ONLY one JSON object using ONLY double quotes.\n"
+    "No extra text.\n"
+)
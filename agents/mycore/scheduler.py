@@ -0,0 +1,340 @@
+# agents/mycore/scheduler.py
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import openai
+
+from agents.mycore.tokens import estimate_messages_tokens
+
+
+DEFAULT_SCHEDULER_CONFIG = {
+    # Per-model limits; "default" applies to models not listed
+    "limits": {"default": {"rpm": 500, "tpm": 200000}},
+    "redis_url": None,             # share buckets across Celery workers
+    "max_retries": 5,
+    "backoff_base": 1.0,           # seconds, doubled per retry
+    "backoff_max": 60.0,
+    "initial_concurrency": 8,
+    "min_concurrency": 1,
+    "max_concurrency": 64,
+    "latency_target": 30.0,        # seconds; slower calls count as congestion
+}
+
+# Errors worth retrying (rate limits, transient network / server failures)
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.InternalServerError,
+)
+
+
+def estimate_request_tokens(request: Dict[str, Any]) -> int:
+    """
+    Token cost of a request as counted by provider rate limits:
+    estimated prompt tokens + the completion cap.
+    """
+    return estimate_messages_tokens(request.get("messages", [])) + int(request.get("max_completion_tokens") or 0)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read Retry-After(-ms) from an API error response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after") is not None:
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+# =========================================================
+# Token buckets
+# =========================================================
+class TokenBucket:
+    """In-process token bucket. take() returns 0 when granted, else seconds to wait."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = float(rate_per_minute)
+        self.rate = float(rate_per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self, amount: float) -> float:
+        # A single request larger than the bucket is capped so it can still pass
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Give back tokens taken for a request that was not sent after all."""
+        amount = min(amount, self.capacity)
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RedisTokenBucket:
+    """
+    Token bucket stored in Redis so every worker process draws from the same
+    budget. Refill and take happen atomically in a Lua script. If Redis is
+    unreachable, the local fallback bucket is used instead.
+    """
+
+    _SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local amount = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= amount then
+  tokens = tokens - amount
+else
+  wait = (amount - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], 120)
+return tostring(wait)
+"""
+
+    _REFUND_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local amount = tonumber(ARGV[2])
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens'))
+if tokens then
+  redis.call('HSET', KEYS[1], 'tokens', math.min(capacity, tokens + amount))
+end
+return 1
+"""
+
+    def __init__(self, redis_client, key: str, rate_per_minute: float):
+        self.redis = redis_client
+        self.key = key
+        self.capacity = float(rate_per_minute)
+        self.rate = float(rate_per_minute) / 60.0
+        self.fallback = TokenBucket(rate_per_minute)
+        self._script = redis_client.register_script(self._SCRIPT)
+        self._refund_script = redis_client.register_script(self._REFUND_SCRIPT)
+
+    def take(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        try:
+            return float(self._script(keys=[self.key], args=[self.capacity, self.rate, time.time(), amount]))
+        except Exception:
+            return self.fallback.take(amount)
+
+    def refund(self, amount: float) -> None:
+        amount = min(amount, self.capacity)
+        try:
+            self._refund_script(keys=[self.key], args=[self.capacity, amount])
+        except Exception:
+            self.fallback.refund(amount)
+
+
+# =========================================================
+# Adaptive concurrency (AIMD)
+# =========================================================
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that grows additively on healthy calls and halves on
+    congestion signals (429 or latency above target).
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, latency_target: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait(timeout=1.0)
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify()
+
+    def on_success(self, latency: float) -> None:
+        with self._cond:
+            if latency > self.latency_target:
+                self.limit = max(self.minimum, self.limit * 0.5)
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_congestion(self) -> None:
+        with self._cond:
+            self.limit = max(self.minimum, self.limit * 0.5)
+
+
+# =========================================================
+# Scheduler
+# =========================================================
+class LLMScheduler:
+    """
+    Admission control in front of LLMClient calls:
+    RPM/TPM token buckets per model, AIMD concurrency limit, and retries with
+    exponential backoff + jitter that honour Retry-After.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, redis_client=None):
+        self.config = {**DEFAULT_SCHEDULER_CONFIG, **(config or {})}
+        self.redis = redis_client
+        self.concurrency = AdaptiveConcurrency(
+            self.config["initial_concurrency"],
+            self.config["min_concurrency"],
+            self.config["max_concurrency"],
+            self.config["latency_target"],
+        )
+        self._buckets: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "rate_limited": 0, "throttle_wait": 0.0}
+
+    def _buckets_for(self, model: str) -> tuple:
+        with self._lock:
+            if model not in self._buckets:
+                limits = (
+                    self.config["limits"].get(model)
+                    or self.config["limits"].get("default")
+                    or DEFAULT_SCHEDULER_CONFIG["limits"]["default"]
+                )
+                if self.redis is not None:
+                    rpm = RedisTokenBucket(self.redis, f"llm_sched:{model}:rpm", limits["rpm"])
+                    tpm = RedisTokenBucket(self.redis, f"llm_sched:{model}:tpm", limits["tpm"])
+                else:
+                    rpm = TokenBucket(limits["rpm"])
+                    tpm = TokenBucket(limits["tpm"])
+                self._buckets[model] = (rpm, tpm)
+            return self._buckets[model]
+
+    def _throttle_wait(self, request: Dict[str, Any]) -> float:
+        """Try to take 1 request + estimated tokens; return seconds to wait (0 = admitted)."""
+        rpm, tpm = self._buckets_for(request["model"])
+        wait = rpm.take(1)
+        if wait > 0:
+            return wait
+        wait = tpm.take(estimate_request_tokens(request))
+        if wait > 0:
+            # Not sent yet: give the request slot back so TPM waits do not drain the RPM budget
+            rpm.refund(1)
+        return wait
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = min(self.config["backoff_max"], self.config["backoff_base"] * (2 ** attempt))
+        delay = random.uniform(0.5 * delay, delay)      # jitter
+        retry_after = retry_after_seconds(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _record(self, field: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[field] += amount
+
+    def run(self, request: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        """Run call() for request under rate limits and retries (blocking)."""
+        attempt = 0
+        while True:
+            wait = self._throttle_wait(request)
+            while wait > 0:
+                self._record("throttle_wait", wait)
+                time.sleep(wait)
+                wait = self._throttle_wait(request)
+
+            self.concurrency.acquire()
+            started = time.monotonic()
+            try:
+                self._record("calls")
+                result = call()
+                self.concurrency.on_success(time.monotonic() - started)
+                return result
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self._record("rate_limited")
+                self.concurrency.on_congestion()
+                if attempt >= self.config["max_retries"]:
+                    raise
+                self._record("retries")
+                delay = self._backoff(attempt, e)
+            finally:
+                self.concurrency.release()
+            # Back off without the concurrency slot, so waiting retries do not block other calls
+            time.sleep(delay)
+            attempt += 1
+
+    async def arun(self, request: Dict[str, Any], call: Callable[[], Any]) -> Any:
+        """Async twin of run(); call() must return an awaitable."""
+        attempt = 0
+        while True:
+            wait = self._throttle_wait(request)
+            while wait > 0:
+                self._record("throttle_wait", wait)
+                await asyncio.sleep(wait)
+                wait = self._throttle_wait(request)
+
+            while not self.concurrency.try_acquire():
+                await asyncio.sleep(0.05)
+            started = time.monotonic()
+            try:
+                self._record("calls")
+                result = await call()
+                self.concurrency.on_success(time.monotonic() - started)
+                return result
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, openai.RateLimitError):
+                    self._record("rate_limited")
+                self.concurrency.on_congestion()
+                if attempt >= self.config["max_retries"]:
+                    raise
+                self._record("retries")
+                delay = self._backoff(attempt, e)
+            finally:
+                self.concurrency.release()
+            # Back off without the concurrency slot, so waiting retries do not block other calls
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+
+def build_scheduler(settings: Optional[Dict[str, Any]]) -> Optional[LLMScheduler]:
+    """Build an LLMScheduler from the LLM_SCHEDULER setting in config.py."""
+    if not settings:
+        return None
+    redis_client = None
+    if settings.get("redis_url"):
+        import redis
+        redis_client = redis.Redis.from_url(settings["redis_url"])
+    return LLMScheduler(settings, redis_client)
@@ -0,0 +1,260 @@
+# agents/mycore/singleflight.py
+import asyncio
+import json
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class _Call:
+    """One in-flight call that followers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls inside one process.
+
+    The first caller for a key (the leader) runs fn(); callers arriving while
+    it is in flight wait and receive the same result (or the same error).
+    Nothing is kept after the leader finishes - this is not a cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[Tuple[int, str], asyncio.Future] = {}
+        self._stats = {"leaders": 0, "followers": 0}
+
+    def _count(self, field: str) -> None:
+        with self._lock:
+            self._stats[field] += 1
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run fn() once per key among concurrent callers. Returns (result, shared)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+            else:
+                self._stats["followers"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Async twin of do(); coalesces calls made on the same event loop."""
+        loop = asyncio.get_running_loop()
+        slot = (id(loop), key)
+        future = self._async_calls.get(slot)
+        if future is not None:
+            self._count("followers")
+            # shield: a cancelled follower must not cancel the leader's call
+            return await asyncio.shield(future), True
+
+        self._count("leaders")
+        future = self._async_calls[slot] = loop.create_future()
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unwatched failure does not log a warning
+            future.exception()
+            raise
+        finally:
+            del self._async_calls[slot]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+class RedisSingleFlight(SingleFlight):
+    """
+    Singleflight across worker processes.
+
+    Threads of one process are coalesced locally first; the local leader then
+    competes for a Redis lock (SET NX PX). The lock holder calls the API and
+    publishes the result under a short-lived key; other processes poll for
+    it. If the holder dies, its lock expires after lock_timeout and a waiter
+    takes over, so a crashed leader delays followers but never blocks them.
+
+    Results must be JSON serializable (LLMClient results are plain dicts).
+    If Redis is unreachable the call simply runs uncoalesced.
+    """
+
+    _RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(
+        self,
+        redis_client,
+        lock_timeout: float = 60.0,
+        poll_interval: float = 0.05,
+        result_ttl: float = 30.0,
+        prefix: str = "llm_sf:",
+    ):
+        super().__init__()
+        self.redis = redis_client
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.prefix = prefix
+        self._release = redis_client.register_script(self._RELEASE)
+        self._stats.update({"remote_followers": 0, "takeovers": 0, "redis_errors": 0})
+
+    def _keys(self, key: str) -> Tuple[str, str]:
+        return f"{self.prefix}lock:{key}", f"{self.prefix}result:{key}"
+
+    def _try_lock(self, lock_key: str, token: str) -> bool:
+        return bool(self.redis.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)))
+
+    def _poll(self, lock_key: str, result_key: str) -> Tuple[str, Any]:
+        """
+        Check on the remote leader: ("done", result) once published,
+        ("gone", None) if its lock vanished without a result, else ("pending", None).
+        """
+        raw = self.redis.get(result_key)
+        if raw is None and not self.redis.exists(lock_key):
+            # Leader may have published between the two reads
+            raw = self.redis.get(result_key)
+            if raw is None:
+                return "gone", None
+        if raw is None:
+            return "pending", None
+        return "done", json.loads(raw)
+
+    def _publish(self, lock_key: str, result_key: str, token: str, result: Any) -> None:
+        self.redis.set(result_key, json.dumps(result, ensure_ascii=False), px=int(self.result_ttl * 1000))
+        self._release(keys=[lock_key], args=[token])
+
+    def _unlock(self, lock_key: str, token: str) -> None:
+        """Release our lock so a waiter can take over right away (expiry is the backstop)."""
+        try:
+            self._release(keys=[lock_key], args=[token])
+        except Exception:
+            self._count("redis_errors")
+
+    def _remote(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        lock_key, result_key = self._keys(key)
+        token = uuid.uuid4().hex
+        try:
+            # Once following, look for the result before retrying the lock:
+            # the leader releases it right after publishing.
+            if not self._try_lock(lock_key, token):
+                while True:
+                    status, result = self._poll(lock_key, result_key)
+                    if status == "done":
+                        self._count("remote_followers")
+                        return result, True
+                    if status == "gone" and self._try_lock(lock_key, token):
+                        # Leader failed or its lock expired (crashed / stuck): take over
+                        self._count("takeovers")
+                        break
+                    if status == "pending":
+                        time.sleep(self.poll_interval)
+        except Exception:
+            self._count("redis_errors")
+            return fn(), False
+
+        try:
+            result = fn()
+        except BaseException:
+            self._unlock(lock_key, token)
+            raise
+        try:
+            self._publish(lock_key, result_key, token, result)
+        except Exception:
+            self._count("redis_errors")
+        return result, False
+
+    async def _aremote(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        lock_key, result_key = self._keys(key)
+        token = uuid.uuid4().hex
+        try:
+            if not self._try_lock(lock_key, token):
+                while True:
+                    status, result = self._poll(lock_key, result_key)
+                    if status == "done":
+                        self._count("remote_followers")
+                        return result, True
+                    if status == "gone" and self._try_lock(lock_key, token):
+                        self._count("takeovers")
+                        break
+                    if status == "pending":
+                        await asyncio.sleep(self.poll_interval)
+        except Exception:
+            self._count("redis_errors")
+            return await fn(), False
+
+        try:
+            result = await fn()
+        except BaseException:
+            self._unlock(lock_key, token)
+            raise
+        try:
+            self._publish(lock_key, result_key, token, result)
+        except Exception:
+            self._count("redis_errors")
+        return result, False
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        (result, remote_shared), local_shared = super().do(key, lambda: self._remote(key, fn))
+        return result, local_shared or remote_shared
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        (result, remote_shared), local_shared = await super().ado(key, lambda: self._aremote(key, fn))
+        return result, local_shared or remote_shared
+
+
+def build_singleflight(settings: Optional[Dict[str, Any]]) -> Optional[SingleFlight]:
+    """
+    Build a SingleFlight from the LLM_SINGLEFLIGHT setting in config.py.
+
+    Example:
+        LLM_SINGLEFLIGHT = {
+            "redis_url": "redis://localhost:6379/3",   # omit for in-process only
+            "lock_timeout": 60,
+            "poll_interval": 0.05,
+            "result_ttl": 30,
+        }
+    """
+    if not settings:
+        return None
+    if not settings.get("redis_url"):
+        return SingleFlight()
+
+    import redis
+    return RedisSingleFlight(
+        redis.Redis.from_url(settings["redis_url"]),
+        lock_timeout=settings.get("lock_timeout", 60.0),
+        poll_interval=settings.get("poll_interval", 0.05),
+        result_ttl=settings.get("result_ttl", 30.0),
+    )
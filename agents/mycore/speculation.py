@@ -0,0 +1,241 @@
+# agents/mycore/speculation.py
+"""
+Speculative branch execution while the intent is still being classified.
+
+TopController runs intent classification and the shared pre-analysis
+(protagonist, focus aspects) side by side; the branch (keypoints or
+synthesis) waits for both. When the pre-analysis finishes first, the
+Speculator starts the predicted branch right away:
+
+- intent agrees: the branch node takes the speculative result, saving the
+  time the speculation already ran;
+- intent disagrees: the speculation is cancelled (async) or abandoned and
+  discarded (sync: its thread finishes in the background); its tokens are
+  counted as wasted.
+
+The prediction is the most frequent task type over the last `window`
+requests (`prior` until anything was seen). Every request is scored
+against it, speculated or not, and speculation pauses while the miss rate
+over the window is above max_miss_rate; it resumes on its own once the
+traffic gets predictable again.
+
+stats() reports hit rate, latency saved and tokens wasted.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from agents.mycore.ledger import usage_meter
+
+
+class Speculation:
+    """Speculative run of the predicted branch for one request."""
+
+    def __init__(self, speculator: "Speculator", predicted: str, active: bool):
+        self.speculator = speculator
+        self.predicted = predicted
+        self.active = active
+        self.actual: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.usage: Dict[str, int] = {}
+        self.task = None            # concurrent.futures.Future or asyncio.Task
+        self._lock = threading.Lock()
+
+    # ---------------------------------------------------------
+    # Start
+    # ---------------------------------------------------------
+    def _claim(self) -> bool:
+        """Whether to start now: active, and the intent is not known yet."""
+        with self._lock:
+            if not self.active or self.actual is not None or self.task is not None:
+                return False
+            self.started = time.monotonic()
+            return True
+
+    def _metered_run(self, fn: Callable[[], Any]) -> Any:
+        try:
+            with usage_meter() as self.usage:
+                return fn()
+        finally:
+            self.finished = time.monotonic()
+
+    async def _ametered_run(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            with usage_meter() as self.usage:
+                return await fn()
+        finally:
+            self.finished = time.monotonic()
+
+    def start(self, fn: Callable[[], Any]) -> bool:
+        """Run fn() (the predicted branch) in the background. False if not speculating."""
+        if not self._claim():
+            return False
+        context = contextvars.copy_context()
+        task = self.speculator.executor().submit(context.run, self._metered_run, fn)
+        self._started(task)
+        return True
+
+    def astart(self, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """Async twin of start(); fn() returns an awaitable."""
+        if not self._claim():
+            return False
+        self._started(asyncio.get_running_loop().create_task(self._ametered_run(fn)))
+        return True
+
+    def _started(self, task) -> None:
+        with self._lock:
+            self.task = task
+            mismatch = self.actual is not None and self.actual != self.predicted
+        self.speculator._count("speculated")
+        if mismatch:
+            # The intent arrived while the task was being created
+            self._discard()
+
+    # ---------------------------------------------------------
+    # Resolve
+    # ---------------------------------------------------------
+    def resolve(self, actual: str) -> None:
+        """Record the classified intent; a wrong speculation is cancelled."""
+        with self._lock:
+            if self.actual is not None:
+                return
+            self.actual = actual
+            task = self.task
+        self.speculator._observe(actual, self.predicted == actual)
+        if task is not None and actual != self.predicted:
+            self._discard()
+
+    def _discard(self) -> None:
+        self.speculator._count("misses")
+        if self.task.cancel():
+            self.speculator._count("cancelled")
+        self.task.add_done_callback(lambda _: self.speculator._waste(self.usage))
+
+    # ---------------------------------------------------------
+    # Take
+    # ---------------------------------------------------------
+    def _takes(self, task_type: str) -> bool:
+        return self.task is not None and task_type == self.predicted == self.actual
+
+    def _hit(self) -> None:
+        now = time.monotonic()
+        saved = min(now, self.finished or now) - self.started
+        self.speculator._count("hits")
+        self.speculator._count("latency_saved", saved)
+
+    def take(self, task_type: str) -> Optional[Any]:
+        """The speculative result for branch task_type, or None to run it normally."""
+        if not self._takes(task_type):
+            return None
+        try:
+            result = self.task.result()
+        except Exception:
+            self.speculator._count("errors")
+            return None
+        self._hit()
+        return result
+
+    async def atake(self, task_type: str) -> Optional[Any]:
+        if not self._takes(task_type):
+            return None
+        try:
+            result = await self.task
+        except Exception:
+            self.speculator._count("errors")
+            return None
+        self._hit()
+        return result
+
+
+class Speculator:
+    """Predicts each request's task type and tracks how well speculation pays off."""
+
+    def __init__(
+        self,
+        prior: str = "SYNTHESIS",
+        window: int = 100,
+        min_samples: int = 10,
+        max_miss_rate: float = 0.3,
+        max_workers: int = 8,
+    ):
+        self.prior = prior
+        self.min_samples = min_samples
+        self.max_miss_rate = max_miss_rate
+        self.max_workers = max_workers
+
+        self._lock = threading.Lock()
+        self._intents: deque = deque(maxlen=window)
+        self._outcomes: deque = deque(maxlen=window)     # True: prediction was right
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {
+            "requests": 0, "speculated": 0, "hits": 0, "misses": 0, "cancelled": 0, "errors": 0,
+            "latency_saved": 0.0, "tokens_wasted": 0, "paused_requests": 0,
+        }
+
+    def _count(self, field: str, amount=1) -> None:
+        with self._lock:
+            self._stats[field] += amount
+
+    def _waste(self, usage: Dict[str, int]) -> None:
+        self._count("tokens_wasted", usage.get("tokens_in", 0) + usage.get("tokens_out", 0))
+
+    def _observe(self, task_type: str, hit: bool) -> None:
+        with self._lock:
+            self._intents.append(task_type)
+            self._outcomes.append(hit)
+
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="speculation")
+            return self._executor
+
+    # ---------------------------------------------------------
+    # Prediction
+    # ---------------------------------------------------------
+    def predict(self) -> str:
+        with self._lock:
+            if not self._intents:
+                return self.prior
+            return max(set(self._intents), key=lambda t: (self._intents.count(t), t == self.prior))
+
+    def miss_rate(self) -> float:
+        with self._lock:
+            return 1 - sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def enabled(self) -> bool:
+        """False while the miss rate over the window is above max_miss_rate."""
+        with self._lock:
+            samples = len(self._outcomes)
+        return samples < self.min_samples or self.miss_rate() <= self.max_miss_rate
+
+    def begin(self) -> Speculation:
+        """A request's speculation handle (inactive while speculation is paused)."""
+        active = self.enabled()
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["paused_requests"] += 0 if active else 1
+        return Speculation(self, self.predict(), active)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters plus hit rate (of speculated requests), mean latency saved per hit and the current miss rate."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hit_rate"] = stats["hits"] / stats["speculated"] if stats["speculated"] else 0.0
+        stats["mean_latency_saved"] = stats["latency_saved"] / stats["hits"] if stats["hits"] else 0.0
+        stats["miss_rate"] = self.miss_rate()
+        stats["enabled"] = self.enabled()
+        stats["predicted"] = self.predict()
+        return stats
+
+
+def build_speculator(settings: Optional[Dict[str, Any]]) -> Optional[Speculator]:
+    """Build a Speculator from the SPECULATION setting in config.py (None disables speculation)."""
+    if not settings:
+        return None
+    return Speculator(**settings)
@@ -0,0 +1,389 @@
+# agents/mycore/stub_server.py
+"""
+Deterministic OpenAI-compatible chat-completions server for tests and
+benchmarks - no API key or network needed.
+
+- Responses follow the request's response_format: a schema-valid JSON
+  instance for json_schema (classification_result, keypoints_only,
+  synth_payload_only, ...), plain text otherwise. Streaming is supported.
+- Latency, 429 / 500 rates, hangs (client timeouts) and finish_reason
+  "length" truncations are configurable.
+- Prompt caching is simulated like the provider's: a request whose leading
+  messages (>= prompt_cache_min_tokens) were seen before reports them as
+  usage.prompt_tokens_details.cached_tokens and answers faster.
+- Every decision is drawn from an RNG seeded by (seed, request hash, how
+  often that request was seen), so a run replays identically, and a retried
+  request gets a fresh draw (a 429 is not permanent).
+
+Run standalone and point the client at it:
+    python -m agents.mycore.stub_server --port 8765 --rate-429 0.05 --latency-median 0.5
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 python -m agents.top_controller.test_integration
+
+Or in-process:
+    with StubServer({"rate_429": 0.1}) as server:
+        client = LLMClient("stub", default_config, base_url=server.base_url)
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from agents.mycore.tokens import estimate_tokens, estimate_messages_tokens
+
+DEFAULT_STUB_CONFIG = {
+    "seed": 0,
+    # Latency before the first byte: {"distribution": "fixed", "value": s}
+    # | {"distribution": "uniform", "low": s, "high": s}
+    # | {"distribution": "lognormal", "median": s, "sigma": float}
+    "latency": {"distribution": "lognormal", "median": 0.3, "sigma": 0.5},
+    "seconds_per_output_token": 0.0,   # added on top of latency (also paces streams)
+    "rate_429": 0.0,
+    "rate_500": 0.0,
+    "rate_length": 0.0,                # finish_reason "length" with truncated content
+    "rate_hang": 0.0,                  # sleep hang_seconds before answering (client timeouts)
+    "hang_seconds": 600.0,
+    "retry_after": 1.0,                # seconds, sent with 429s
+    "max_array_items": 3,              # cap for arrays without a small maxItems
+    "prompt_cache_min_tokens": 1024,   # None disables the prompt cache simulation
+    "prompt_cache_latency_saving": 0.5,  # latency cut when the whole prompt is cached
+}
+
+
+# =========================================================
+# Schema-valid JSON generation
+# =========================================================
+def _sample_string(schema: Dict[str, Any], rng: random.Random, source: str) -> str:
+    min_len = schema.get("minLength", 1)
+    max_len = schema.get("maxLength", max(min_len, 40))
+    length = rng.randint(min_len, max(min_len, min(max_len, 40)))
+    if not source:
+        source = "stub"
+    start = rng.randrange(len(source))
+    text = (source[start:] + source)[:length]
+    return text.ljust(min_len, "x")
+
+
+def generate_from_schema(schema: Dict[str, Any], rng: random.Random, source: str = "", max_items: int = 3) -> Any:
+    """Return an instance valid for the (JSON Schema subset used by structured outputs) schema."""
+    if "const" in schema:
+        return schema["const"]
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    for key in ("anyOf", "oneOf"):
+        if key in schema:
+            return generate_from_schema(schema[key][0], rng, source, max_items)
+
+    kind = schema.get("type", "object")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+
+    if kind == "object":
+        properties = schema.get("properties", {})
+        required = schema.get("required", list(properties))
+        return {
+            name: generate_from_schema(properties[name], rng, source, max_items)
+            for name in properties if name in required
+        }
+    if kind == "array":
+        low = schema.get("minItems", 0)
+        high = min(schema.get("maxItems", low + max_items), max(low, max_items))
+        items = schema.get("items", {"type": "string"})
+        # Like a model answering the prompt, fill optional arrays with at least one item
+        count = rng.randint(max(low, min(1, high)), max(low, high))
+        return [generate_from_schema(items, rng, source, max_items) for _ in range(count)]
+    if kind == "string":
+        return _sample_string(schema, rng, source)
+    if kind == "integer":
+        return rng.randint(schema.get("minimum", 0), schema.get("maximum", 100))
+    if kind == "number":
+        return round(rng.uniform(schema.get("minimum", 0.0), schema.get("maximum", 1.0)), 4)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def _sample_latency(latency: Dict[str, Any], rng: random.Random) -> float:
+    distribution = latency.get("distribution", "fixed")
+    if distribution == "uniform":
+        return rng.uniform(latency.get("low", 0.0), latency.get("high", 0.0))
+    if distribution == "lognormal":
+        return rng.lognormvariate(math.log(latency.get("median", 0.3)), latency.get("sigma", 0.5))
+    return float(latency.get("value", 0.0))
+
+
+# =========================================================
+# Server
+# =========================================================
+class StubServer:
+    """OpenAI-compatible /v1/chat/completions on a background thread."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = {**DEFAULT_STUB_CONFIG, **(config or {})}
+        self.host = host
+        self.port = port
+        self._seen: Dict[str, int] = {}
+        self._prefixes = set()
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0, "ok": 0, "429": 0, "500": 0, "length": 0, "hang": 0, "stream": 0,
+            "prompt_tokens": 0, "cached_tokens": 0,
+        }
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._stats[field] += amount
+
+    def _cached_prefix_tokens(self, body: Dict[str, Any]) -> int:
+        """Tokens of the longest leading run of messages seen before (prompt cache simulation)."""
+        min_tokens = self.config["prompt_cache_min_tokens"]
+        if min_tokens is None:
+            return 0
+        messages = body.get("messages", [])
+        digest = hashlib.sha256(str(body.get("model")).encode("utf-8"))
+        cached = 0
+        with self._lock:
+            for i, message in enumerate(messages[:-1]):
+                digest.update(json.dumps(message, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+                key = digest.copy().hexdigest()
+                tokens = estimate_messages_tokens(messages[:i + 1])
+                if key in self._prefixes and tokens >= min_tokens:
+                    cached = tokens
+                self._prefixes.add(key)
+        return cached - cached % 128
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+    def _rng_for(self, body: Dict[str, Any]) -> random.Random:
+        canonical = json.dumps(body, sort_keys=True, ensure_ascii=False)
+        key = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        with self._lock:
+            occurrence = self._seen.get(key, 0)
+            self._seen[key] = occurrence + 1
+        return random.Random(f"{self.config['seed']}:{key}:{occurrence}")
+
+    def plan(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Decide the outcome of one request: status, delay, content, finish_reason, usage."""
+        rng = self._rng_for(body)
+        self._count("requests")
+        delay = _sample_latency(self.config["latency"], rng)
+
+        roll = rng.random()
+        if roll < self.config["rate_429"]:
+            self._count("429")
+            return {"status": 429, "delay": delay, "error": "Rate limit reached (stub)", "type": "rate_limit_error"}
+        roll -= self.config["rate_429"]
+        if roll < self.config["rate_500"]:
+            self._count("500")
+            return {"status": 500, "delay": delay, "error": "Internal server error (stub)", "type": "server_error"}
+        roll -= self.config["rate_500"]
+        if roll < self.config["rate_hang"]:
+            self._count("hang")
+            delay = self.config["hang_seconds"]
+
+        messages = body.get("messages", [])
+        source = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        response_format = body.get("response_format") or {"type": "text"}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"].get("schema", {})
+            value = generate_from_schema(schema, rng, source, self.config["max_array_items"])
+            content = json.dumps(value, ensure_ascii=False)
+        elif response_format.get("type") == "json_object":
+            content = json.dumps({"result": source[:40]}, ensure_ascii=False)
+        else:
+            content = f"Stub response: {source[:80]}"
+
+        prompt_tokens = estimate_messages_tokens(messages)
+        cached_tokens = self._cached_prefix_tokens(body)
+        self._count("prompt_tokens", prompt_tokens)
+        self._count("cached_tokens", cached_tokens)
+        delay *= 1 - self.config["prompt_cache_latency_saving"] * cached_tokens / max(1, prompt_tokens)
+
+        finish_reason = "stop"
+        completion_tokens = estimate_tokens(content)
+        if rng.random() < self.config["rate_length"]:
+            self._count("length")
+            finish_reason = "length"
+            content = content[: max(1, len(content) // 2)]
+            completion_tokens = int(body.get("max_completion_tokens") or completion_tokens)
+        else:
+            self._count("ok")
+
+        return {
+            "status": 200,
+            "delay": delay + completion_tokens * self.config["seconds_per_output_token"],
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            },
+        }
+
+    # ---------------------------------------------------------
+    # Lifecycle
+    # ---------------------------------------------------------
+    def start(self) -> "StubServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def client(self, default_config: Optional[Dict[str, Any]] = None, **kwargs):
+        """An LLMClient on this server, marked synthetic (its answers are not a model's)."""
+        from agents.mycore.LLMclient import LLMClient
+        return LLMClient("stub", default_config or {"model": "gpt-5-nano"}, base_url=self.base_url, synthetic=True, **kwargs)
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _make_handler(server: StubServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+
+        def log_message(self, *args) -> None:
+            pass
+
+        def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/").endswith("/stats"):
+                self._send_json(200, server.stats())
+            else:
+                self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found", "type": "invalid_request_error"}})
+                return
+
+            plan = server.plan(body)
+            if plan["status"] != 200:
+                time.sleep(min(plan["delay"], 1.0))
+                headers = {"retry-after": str(server.config["retry_after"])} if plan["status"] == 429 else None
+                self._send_json(plan["status"], {"error": {"message": plan["error"], "type": plan["type"]}}, headers)
+                return
+
+            if body.get("stream"):
+                self._stream(body, plan)
+                return
+
+            time.sleep(plan["delay"])
+            self._send_json(200, {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": plan["content"], "refusal": None},
+                    "finish_reason": plan["finish_reason"],
+                }],
+                "usage": plan["usage"],
+            })
+
+        def _stream(self, body: dict, plan: dict) -> None:
+            server._count("stream")
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+
+            def emit(choices: list, usage: Optional[dict] = None) -> None:
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": body.get("model", "stub"),
+                    "choices": choices,
+                }
+                if usage is not None:
+                    chunk["usage"] = usage
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            content = plan["content"]
+            pieces = [content[i:i + 8] for i in range(0, len(content), 8)] or [""]
+            per_piece = server.config["seconds_per_output_token"] * plan["usage"]["completion_tokens"] / len(pieces)
+            time.sleep(max(0.0, plan["delay"] - per_piece * len(pieces)))
+            for piece in pieces:
+                emit([{"index": 0, "delta": {"content": piece}, "finish_reason": None}])
+                time.sleep(per_piece)
+            emit([{"index": 0, "delta": {}, "finish_reason": plan["finish_reason"]}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                emit([], plan["usage"])
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic OpenAI-compatible stub server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency-median", type=float, default=0.3, help="lognormal median (seconds)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--seconds-per-output-token", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-500", type=float, default=0.0)
+    parser.add_argument("--rate-length", type=float, default=0.0)
+    parser.add_argument("--rate-hang", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubServer({
+        "seed": args.seed,
+        "latency": {"distribution": "lognormal", "median": args.latency_median, "sigma": args.latency_sigma},
+        "seconds_per_output_token": args.seconds_per_output_token,
+        "rate_429": args.rate_429,
+        "rate_500": args.rate_500,
+        "rate_length": args.rate_length,
+        "rate_hang": args.rate_hang,
+    }, host=args.host, port=args.port).start()
+    print(f"Stub OpenAI server on {server.base_url} (stats: {server.base_url}/stats)")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
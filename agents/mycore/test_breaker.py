@@ -0,0 +1,79 @@
+# agents/mycore/test_breaker.py
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.breaker import CircuitBreaker, OPEN, CLOSED
+
+
+class _FlakyCompletions:
+    """Models listed in `down` fail with a connection error; the others answer."""
+
+    def __init__(self, down):
+        self.down = set(down)
+        self.models = []
+
+    def create(self, **request):
+        self.models.append(request["model"])
+        if request["model"] in self.down:
+            raise openai.APIConnectionError(request=httpx.Request("POST", "http://test/v1/chat/completions"))
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+        )
+
+
+def _client(completions, breaker):
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, breaker=breaker)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client
+
+
+def test_breaker_opens_and_fails_fast():
+    completions = _FlakyCompletions(down={"gpt-5-nano"})
+    breaker = CircuitBreaker(min_calls=4, error_rate=0.5, open_seconds=60)
+    client = _client(completions, breaker)
+
+    errors = []
+    for _ in range(10):
+        try:
+            client.invoke("doc", "sys", {})
+        except Exception as e:
+            errors.append(str(e))
+
+    assert len(completions.models) == 4          # calls after the 4th failure never reach the API
+    assert "circuit open" in errors[-1]
+    stats = breaker.stats()["default|gpt-5-nano"]
+    assert stats["state"] == OPEN and stats["rejected"] == 6
+    print("Test passed!")
+
+
+def test_fallback_while_open_and_half_open_recovery():
+    completions = _FlakyCompletions(down={"gpt-5-nano"})
+    breaker = CircuitBreaker(min_calls=4, open_seconds=0.2, fallbacks={"gpt-5-nano": {"model": "gpt-5-mini"}})
+    client = _client(completions, breaker)
+
+    for _ in range(4):
+        try:
+            client.invoke("doc", "sys", {})
+        except Exception:
+            pass
+    assert client.invoke("doc", "sys", {})["content"] == "ok"
+    assert completions.models[-1] == "gpt-5-mini"
+
+    # Provider recovers; after open_seconds one probe closes the breaker
+    completions.down.clear()
+    time.sleep(0.25)
+    client.invoke("doc", "sys", {})
+    assert completions.models[-1] == "gpt-5-nano"
+    stats = breaker.stats()["default|gpt-5-nano"]
+    assert stats["state"] == CLOSED and stats["probes"] == 1 and stats["fallbacks"] == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_breaker_opens_and_fails_fast()
+    test_fallback_while_open_and_half_open_recovery()
@@ -0,0 +1,121 @@
+# agents/mycore/test_cache.py
+import os
+import tempfile
+import time
+
+from agents.mycore.cache import (
+    MemoryLRUCache,
+    SQLiteCache,
+    TieredCache,
+    make_request_key,
+    is_cacheable,
+)
+
+
+def _request(user_text: str, **overrides) -> dict:
+    request = {
+        "model": "gpt-5-nano",
+        "temperature": 1,
+        "messages": [
+            {"role": "system", "content": "Identify the protagonist."},
+            {"role": "user", "content": user_text},
+        ],
+        "response_format": {"type": "text"},
+    }
+    request.update(overrides)
+    return request
+
+
+def test_request_key_is_content_addressed():
+    assert make_request_key(_request("a")) == make_request_key(_request("a"))
+    assert make_request_key(_request("a")) != make_request_key(_request("b"))
+    assert make_request_key(_request("a")) != make_request_key(_request("a", model="gpt-5.1"))
+    print("Test passed!")
+
+
+def test_cacheable_is_opt_in_for_non_deterministic_configs():
+    assert not is_cacheable({"temperature": 1})
+    assert not is_cacheable({})
+    assert is_cacheable({"temperature": 0})
+    assert is_cacheable({"cache": True})
+    assert not is_cacheable({"temperature": 0, "cache": False})
+    print("Test passed!")
+
+
+def test_memory_lru_evicts_least_recently_used():
+    lru = MemoryLRUCache(max_entries=2)
+    lru.set("a", {"content": "1"})
+    lru.set("b", {"content": "2"})
+    lru.get("a")
+    lru.set("c", {"content": "3"})
+
+    assert lru.get("a") is not None
+    assert lru.get("b") is None
+    assert len(lru) == 2
+    print("Test passed!")
+
+
+def test_sqlite_ttl_and_size_eviction():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = SQLiteCache(os.path.join(tmp, "cache.sqlite3"), max_entries=2, ttl_seconds=0.2)
+        db.set("a", {"content": "1"})
+        db.set("b", {"content": "2"})
+        db.set("c", {"content": "3"})
+        assert len(db) == 2
+        assert db.get("a") is None
+
+        time.sleep(0.3)
+        assert db.get("c") is None
+    print("Test passed!")
+
+
+def test_tiered_cache_backfills_and_counts():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryLRUCache(max_entries=8)
+        disk = SQLiteCache(os.path.join(tmp, "cache.sqlite3"))
+        cache = TieredCache([memory, disk])
+
+        key = make_request_key(_request("a"))
+        assert cache.get(key) is None
+
+        disk.set(key, {"content": "cached"})
+        assert cache.get(key) == {"content": "cached"}
+        assert memory.get(key) == {"content": "cached"}   # backfilled
+        assert cache.get(key) == {"content": "cached"}
+
+        stats = cache.stats()
+        print(stats)
+        assert stats["hits"] == {"memory": 1, "sqlite": 1}
+        assert stats["misses"] == 1
+    print("Test passed!")
+
+
+def test_backfilled_entries_expire_with_the_original():
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = MemoryLRUCache(max_entries=8, ttl_seconds=0.3)
+        disk = SQLiteCache(os.path.join(tmp, "cache.sqlite3"), ttl_seconds=0.3)
+        cache = TieredCache([memory, disk])
+
+        disk.set("a", {"content": "old"})
+        time.sleep(0.2)
+        assert cache.get("a") == {"content": "old"}   # backfilled into memory
+
+        # Past the TTL of the stored response, not of the copy: gone from both tiers
+        time.sleep(0.15)
+        assert memory.get("a") is None
+        assert cache.get("a") is None
+
+        memory.set("b", {"content": "fresh"})
+        assert memory.get("b") == {"content": "fresh"}
+        time.sleep(0.35)
+        assert memory.get("b") is None and len(memory) == 0
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_request_key_is_content_addressed()
+    test_cacheable_is_opt_in_for_non_deterministic_configs()
+    test_memory_lru_evicts_least_recently_used()
+    test_sqlite_ttl_and_size_eviction()
+    test_tiered_cache_backfills_and_counts()
+    test_backfilled_entries_expire_with_the_original()
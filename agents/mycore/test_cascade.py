@@ -0,0 +1,83 @@
+# agents/mycore/test_cascade.py
+import json
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.cascade import validate_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "protagonist": {"type": "string", "minLength": 1, "maxLength": 20},
+        "keypoints": {"type": "array", "minItems": 1, "maxItems": 3, "items": {"type": "string"}},
+    },
+    "required": ["protagonist", "keypoints"],
+    "additionalProperties": False,
+}
+CONFIG = {
+    "model": "gpt-5-nano",
+    "response_format": {"type": "json_schema", "json_schema": {"name": "keypoints_only", "strict": True, "schema": SCHEMA}},
+    "cascade": {"models": ["gpt-5-nano", "gpt-5-mini"], "reject": {"protagonist": ["Unknown"]}},
+}
+
+
+class _PerModelCompletions:
+    """Answers with the scripted content for each model and records which models were called."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.models = []
+
+    def create(self, **request):
+        self.models.append(request["model"])
+        content = json.dumps(self.answers[request["model"]], ensure_ascii=False)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+def _client(answers):
+    completions = _PerModelCompletions(answers)
+    client = LLMClient("test-key", {"model": "gpt-5-nano"})
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_validate_schema_reports_violations():
+    assert validate_schema({"protagonist": "台南市政府", "keypoints": ["a"]}, SCHEMA) == []
+    problems = validate_schema({"protagonist": "x" * 30, "keypoints": [], "extra": 1}, SCHEMA)
+    assert len(problems) == 3
+    print("Test passed!")
+
+
+def test_cascade_escalates_only_when_needed():
+    good = {"protagonist": "台南市政府", "keypoints": ["市府宣布新政策。"]}
+    client, completions = _client({"gpt-5-nano": good, "gpt-5-mini": good})
+    assert client.invoke_json("doc", "sys", CONFIG) == good
+    assert completions.models == ["gpt-5-nano"]
+
+    unsure = {"protagonist": "Unknown", "keypoints": ["..."]}
+    client, completions = _client({"gpt-5-nano": unsure, "gpt-5-mini": good})
+    assert client.invoke_json("doc", "sys", CONFIG) == good
+    assert completions.models == ["gpt-5-nano", "gpt-5-mini"]
+
+    stats = client.cascade.stats()["keypoints_only"]
+    assert stats["calls"] == 1 and stats["escalation_rate"] == 1.0
+    assert stats["models"]["gpt-5-nano"]["acceptance_rate"] == 0.0
+    assert stats["escalation_tokens"] == 120
+    print("Test passed!")
+
+
+def test_cascade_returns_last_parsed_answer_when_all_fail():
+    unsure = {"protagonist": "Unknown", "keypoints": ["..."]}
+    client, completions = _client({"gpt-5-nano": unsure, "gpt-5-mini": unsure})
+    assert client.invoke_json("doc", "sys", CONFIG) == unsure
+    assert client.cascade.stats()["keypoints_only"]["failures"] == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_validate_schema_reports_violations()
+    test_cascade_escalates_only_when_needed()
+    test_cascade_returns_last_parsed_answer_when_all_fail()
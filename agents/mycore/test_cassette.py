@@ -0,0 +1,85 @@
+# agents/mycore/test_cassette.py
+import os
+import tempfile
+import time
+
+from openai.types.chat import ChatCompletion
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.cassette import Cassette
+from agents.mycore.stub_server import StubServer
+from agents.top_controller.controller import TopController
+
+STATE = {"input_text": "23歲陳姓女垃圾車隨車人員在台南市安平區收取垃圾時被撞。", "selected_task_type": ""}
+
+
+def test_pipeline_replays_offline():
+    path = os.path.join(tempfile.mkdtemp(), "cassette.jsonl")
+
+    with StubServer({"latency": {"distribution": "fixed", "value": 0.05}, "seed": 3}) as server:
+        client = server.client({"model": "gpt-5-nano"}, cassette=Cassette(path, mode="record"))
+        recorded = TopController(client).compile().invoke(dict(STATE))
+        calls = server.stats()["requests"]
+
+    # Server is gone: every call must come from the cassette
+    cassette = Cassette(path, mode="replay")
+    client = LLMClient("stub", {"model": "gpt-5-nano"}, base_url="http://127.0.0.1:9/v1", cassette=cassette)
+    started = time.monotonic()
+    replayed = TopController(client).compile().invoke(dict(STATE))
+    elapsed = time.monotonic() - started
+
+    assert replayed["final_result_text"] == recorded["final_result_text"]
+    stats = cassette.stats()
+    assert stats["replayed"] == calls and stats["misses"] == 0
+    assert stats["skipped_latency"] >= 0.05 * calls
+    print(f"replayed {calls} calls in {elapsed:.3f}s, skipped {stats['skipped_latency']:.3f}s of model latency")
+    print("Test passed!")
+
+
+def test_replay_miss_is_an_error():
+    path = os.path.join(tempfile.mkdtemp(), "empty.jsonl")
+    client = LLMClient("stub", {"model": "gpt-5-nano"}, base_url="http://127.0.0.1:9/v1", cassette=Cassette(path))
+    try:
+        client.invoke("hello", "sys", {})
+        error = ""
+    except Exception as e:
+        error = str(e)
+    assert "no recording" in error
+    print("Test passed!")
+
+
+def _completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "c", "object": "chat.completion", "created": 0, "model": "gpt-5-nano",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    })
+
+
+def test_recorders_append_to_one_file():
+    path = os.path.join(tempfile.mkdtemp(), "shared.jsonl")
+    first, second = Cassette(path, mode="record"), Cassette(path, mode="record")
+    request = lambda text: {"model": "gpt-5-nano", "messages": [{"role": "user", "content": text}]}
+
+    # Two recorders (e.g. two workers) writing into the same cassette keep each other's takes
+    first.play(request("a"), lambda: _completion("A1"))
+    second.play(request("b"), lambda: _completion("B"))
+    first.play(request("a"), lambda: _completion("A2"))
+    with open(path, "r", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3   # one appended line per recording
+
+    replay = Cassette(path)
+    assert [replay.play(request("a"), None).choices[0].message.content for _ in range(2)] == ["A1", "A2"]
+    assert replay.play(request("b"), None).choices[0].message.content == "B"
+
+    # A later session re-recording a request replaces its older takes
+    Cassette(path, mode="record").play(request("a"), lambda: _completion("A3"))
+    replay = Cassette(path)
+    assert [replay.play(request("a"), None).choices[0].message.content for _ in range(2)] == ["A3", "A3"]
+    assert replay.play(request("b"), None).choices[0].message.content == "B"
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_pipeline_replays_offline()
+    test_replay_miss_is_an_error()
+    test_recorders_append_to_one_file()
@@ -0,0 +1,135 @@
+# agents/mycore/test_endpoint_pool.py
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.breaker import CircuitBreaker, OPEN
+from agents.mycore.endpoint_pool import Endpoint, EndpointPool, LlamaCppBackend, register_backend
+
+
+class _FakeBackend(LlamaCppBackend):
+    """Serves every endpoint from memory; endpoints named in `down` and models in `down_models` fail."""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.down = set()
+        self.down_models = set()
+        self.sent = []
+        self._lock = threading.Lock()
+
+    def create_client(self, endpoint, http_client, is_async, max_retries):
+        def create(**request):
+            with self._lock:
+                self.sent.append((endpoint.name, request))
+            time.sleep(self.latency)
+            if endpoint.name in self.down or request["model"] in self.down_models:
+                raise openai.APIConnectionError(request=httpx.Request("POST", "http://test/v1/chat/completions"))
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=endpoint.name), finish_reason="stop")],
+                usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+            )
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+
+def _client(backend, strategy="least_outstanding", breaker=None):
+    register_backend("fake", backend)
+    pool = EndpointPool(
+        [
+            Endpoint("key-a", backend="fake"),
+            Endpoint("key-b", backend="fake"),
+            Endpoint("local", backend="fake", groups=["local"], model_map={"gpt-5-nano": "qwen2.5-7b-instruct"}),
+        ],
+        strategy=strategy,
+        failure_threshold=2,
+        cooldown=60,
+    )
+    return LLMClient("unused", {"model": "gpt-5-nano"}, pool=pool, breaker=breaker), pool
+
+
+def test_concurrent_calls_spread_over_keys():
+    backend = _FakeBackend()
+    client, pool = _client(backend)
+
+    threads = [threading.Thread(target=client.invoke, args=("doc", "sys", {})) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    stats = pool.stats()
+    assert stats["key-a"]["calls"] == 4 and stats["key-b"]["calls"] == 4
+    assert stats["local"]["calls"] == 0            # other group
+    print("Test passed!")
+
+
+def test_unhealthy_endpoint_leaves_rotation():
+    backend = _FakeBackend(latency=0.0)
+    client, pool = _client(backend, strategy="latency_weighted")
+    backend.down.add("key-a")
+
+    answers = []
+    for _ in range(10):
+        try:
+            answers.append(client.invoke("doc", "sys", {})["content"])
+        except Exception:
+            pass
+    assert pool.stats()["key-a"]["healthy"] is False
+    assert pool.stats()["key-a"]["calls"] == 2     # failure_threshold, then cooldown
+    assert answers[-1] == "key-b"
+    print("Test passed!")
+
+
+def test_route_sends_step_to_its_group():
+    backend = _FakeBackend(latency=0.0)
+    client, _ = _client(backend)
+
+    assert client.invoke("doc", "sys", {"route": "local", "prompt_cache_key": True})["content"] == "local"
+    name, request = backend.sent[-1]
+    assert request["model"] == "qwen2.5-7b-instruct"
+    assert "max_tokens" in request and "max_completion_tokens" not in request and "prompt_cache_key" not in request
+    print("Test passed!")
+
+
+def test_open_breakers_fall_back_within_the_pool():
+    backend = _FakeBackend(latency=0.0)
+    breaker = CircuitBreaker(min_calls=2, open_seconds=60, fallbacks={"gpt-5-nano": {"model": "gpt-5-mini"}})
+    client, pool = _client(backend, breaker=breaker)
+    backend.down_models.add("gpt-5-nano")
+
+    for _ in range(4):
+        try:
+            client.invoke("doc", "sys", {})
+        except Exception:
+            pass
+    assert breaker.stats()["key-a|gpt-5-nano"]["state"] == OPEN
+    assert breaker.stats()["key-b|gpt-5-nano"]["state"] == OPEN
+
+    # Every endpoint's breaker is open: the fallback model is served by the pool
+    assert client.invoke("doc", "sys", {})["content"] in ("key-a", "key-b")
+    assert backend.sent[-1][1]["model"] == "gpt-5-mini"
+    assert all(e["outstanding"] == 0 for e in pool.stats().values())
+
+    # A backend that fails while adapting the request does not leak the reservation
+    class _Broken(_FakeBackend):
+        def adapt(self, request, endpoint):
+            raise ValueError("cannot adapt")
+
+    register_backend("broken", _Broken())
+    broken = EndpointPool([Endpoint("broken", backend="broken")])
+    try:
+        LLMClient("unused", {"model": "gpt-5-nano"}, pool=broken, breaker=CircuitBreaker()).invoke("doc", "sys", {})
+    except Exception as e:
+        assert "cannot adapt" in str(e)
+    assert broken.stats()["broken"]["outstanding"] == 0
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_spread_over_keys()
+    test_unhealthy_endpoint_leaves_rotation()
+    test_route_sends_step_to_its_group()
+    test_open_breakers_fall_back_within_the_pool()
@@ -0,0 +1,91 @@
+# agents/mycore/test_hedging.py
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.hedging import Hedger
+
+
+class _SlowEveryNth:
+    """Completions endpoint: every nth request takes `slow` seconds, the rest `fast`."""
+
+    def __init__(self, n: int, fast: float = 0.01, slow: float = 1.0):
+        self.n, self.fast, self.slow = n, fast, slow
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _latency(self) -> float:
+        with self._lock:
+            self.calls += 1
+            return self.slow if self.calls % self.n == 0 else self.fast
+
+    @staticmethod
+    def _response():
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="ok"), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10),
+        )
+
+    def create(self, **request):
+        time.sleep(self._latency())
+        return self._response()
+
+    async def acreate(self, **request):
+        await asyncio.sleep(self._latency())
+        return self._response()
+
+
+def _client(completions, hedger):
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, hedger=hedger)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=completions.acreate)))
+    return client
+
+
+def test_slow_call_is_hedged_within_budget():
+    completions = _SlowEveryNth(n=25)
+    hedger = Hedger(quantile=0.9, budget_fraction=0.1, min_samples=10)
+    client = _client(completions, hedger)
+
+    worst = 0.0
+    for _ in range(60):
+        started = time.monotonic()
+        client.invoke("doc", "sys", {})
+        worst = max(worst, time.monotonic() - started)
+    time.sleep(1.1)     # abandoned primaries finish in the background
+
+    stats = hedger.stats()
+    step = stats["steps"]["-|gpt-5-nano"]
+    assert stats["hedges"] <= 0.1 * stats["calls"]
+    assert step["hedged"] >= 1 and step["hedge_wins"] >= 1
+    assert worst < 0.5          # the 1s outliers were cut short by a hedge
+    assert step["p99_reduction"] > 0.5
+    print(stats)
+    print("Test passed!")
+
+
+def test_async_hedge_cancels_loser():
+    completions = _SlowEveryNth(n=15)
+    hedger = Hedger(quantile=0.9, budget_fraction=0.2, min_samples=10)
+    client = _client(completions, hedger)
+
+    async def run():
+        for _ in range(30):
+            await client.ainvoke("doc", "sys", {})
+
+    started = time.monotonic()
+    asyncio.run(run())
+    assert time.monotonic() - started < 1.5
+    step = hedger.stats()["steps"]["-|gpt-5-nano"]
+    assert step["hedge_wins"] >= 1
+    assert step["extra_tokens"] >= 100     # cancelled primaries still sent their prompt
+    # Only completed primaries count toward the threshold / p99_unhedged
+    assert hedger.primary.count("-|gpt-5-nano") == step["calls"] - step["hedge_wins"]
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_slow_call_is_hedged_within_budget()
+    test_async_hedge_cancels_loser()
@@ -0,0 +1,49 @@
+# agents/mycore/test_json_stream.py
+import json
+
+from agents.mycore.json_stream import IncrementalJSONParser, stream_json_fields
+
+PAYLOAD = {
+    "synthesis": "說明 \"F = dp/dt\" 的意義",
+    "added_context": [],
+    "examples": ["例子一"],
+    "takeaways": ["重點一", "重點二"],
+}
+
+
+def _deltas(text: str, size: int) -> list:
+    events = [{"type": "delta", "content": text[i:i + size]} for i in range(0, len(text), size)]
+    return events + [{"type": "final", "tokens_in": 10, "tokens_out": 20, "time_to_first_token": 0.1}]
+
+
+def test_fields_are_emitted_as_soon_as_they_close():
+    text = json.dumps(PAYLOAD, ensure_ascii=False)
+    parser = IncrementalJSONParser()
+
+    first_events = parser.feed(text[:text.index('"added_context"')])
+    assert first_events == [(("synthesis",), PAYLOAD["synthesis"])]
+
+    rest = parser.feed(text[text.index('"added_context"'):])
+    assert (("takeaways", 1), "重點二") in rest
+    assert parser.done and parser.result == PAYLOAD
+    print("Test passed!")
+
+
+def test_stream_json_fields_any_chunking():
+    text = json.dumps(PAYLOAD, ensure_ascii=False, indent=2)
+    for size in (1, 3, 7, len(text)):
+        events = list(stream_json_fields(_deltas(text, size)))
+        fields = [e["field"] for e in events if e["type"] == "field"]
+        assert fields == [
+            "synthesis", "added_context", "examples[0]", "examples",
+            "takeaways[0]", "takeaways[1]", "takeaways",
+        ]
+        final = events[-1]
+        assert final["type"] == "final" and final["value"] == PAYLOAD
+        assert final["time_to_first_field"] is not None
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_fields_are_emitted_as_soon_as_they_close()
+    test_stream_json_fields_any_chunking()
@@ -0,0 +1,134 @@
+# agents/mycore/test_ledger.py
+import asyncio
+import os
+import tempfile
+import time
+
+from agents.mycore.ledger import TokenLedger, ledger_tags
+from agents.mycore.stub_server import StubServer
+from agents.keypoint_agents.tool import KeypointAgentTool
+from api import UnifyAPI
+
+FAST = {"latency": {"distribution": "fixed", "value": 0.0}}
+TEXT = "23歲陳姓女垃圾車隨車人員在台南市安平區收取垃圾時，被酒駕男子駕車衝撞死亡。"
+
+
+def test_ledger_tags_pipeline_calls_per_step():
+    path = os.path.join(tempfile.mkdtemp(), "ledger.sqlite3")
+    ledger = TokenLedger(sqlite_path=path, prices={"gpt-5-nano": {"input": 0.05, "output": 0.40}})
+    with StubServer(FAST) as server:
+        client = server.client({"model": "gpt-5-nano"}, ledger=ledger)
+        app = UnifyAPI(client)
+        assert app.process(TEXT, user_id="U123", request_id="req-1")["success"]
+        assert asyncio.run(app.aprocess(TEXT, user_id="U123", request_id="req-2"))["success"]
+
+    rows = ledger.summary()
+    steps = {row["step"] for row in rows}
+    assert "IntentAgentTool.classify" in steps
+    assert all(row["graph"] and row["node"] and row["step"] for row in rows)
+    assert all(row["tokens_in"] > 0 and row["cost_usd"] > 0 for row in rows)
+
+    by_request = ledger.query(by=("user", "request_id"))
+    assert {(r["user"], r["request_id"]) for r in by_request} == {("U123", "req-1"), ("U123", "req-2")}
+    assert sum(r["calls"] for r in by_request) == sum(r["calls"] for r in rows)
+    print("Test passed!")
+
+
+def test_cache_hits_and_errors_are_not_billed():
+    ledger = TokenLedger()
+    with ledger_tags(step="manual"):
+        ledger.record_call("gpt-5-nano", {"content": "x", "tokens_in": 10, "tokens_out": 5, "cache_hit": True}, 0.01)
+        ledger.record_call("gpt-5-nano", None, 0.5)
+    row = ledger.summary(by=("step",))[0]
+    assert row["step"] == "manual"
+    assert row["calls"] == 2 and row["cache_hits"] == 1 and row["errors"] == 1
+    assert row["tokens_in"] == 0 and row["api_calls"] == 0
+    print("Test passed!")
+
+
+def test_steps_share_cached_prompt_prefix():
+    document = "台南市安平區今日發生垃圾車遭酒駕轎車追撞事故，隨車人員送醫不治。" * 60
+    ledger = TokenLedger()
+    with StubServer(FAST) as server:
+        client = server.client({"model": "gpt-5-nano"}, ledger=ledger)
+        tool = KeypointAgentTool(client)
+        requests = [
+            tool.protagonist_request(document),
+            tool.focus_aspects_request(document, "垃圾車隨車人員"),
+            tool.keypoints_request(document, "垃圾車隨車人員", ["事故經過"]),
+        ]
+        bodies = [client.prepare_request(*request) for request in requests]
+        # System prompt + document are identical across steps; only the last message differs
+        assert all(body["messages"][:2] == bodies[0]["messages"][:2] for body in bodies)
+        assert len({body["prompt_cache_key"] for body in bodies}) == 1
+
+        cached = [client.invoke(*request)["cached_tokens"] for request in requests]
+        assert cached[0] == 0 and cached[1] > 0 and cached[2] > 0
+    assert ledger.summary(by=("model",))[0]["cached_share"] > 0.5
+    print("Test passed!")
+
+
+def test_pipeline_final_step_hits_preanalysis_prefix():
+    # Pre-analysis and both branches share one system prompt, so the final step reuses the cached prefix
+    ledger = TokenLedger()
+    with StubServer(FAST) as server:
+        client = server.client({"model": "gpt-5-nano"}, ledger=ledger)
+        app = UnifyAPI(client)
+        for task_type in ("KEYPOINT", "SYNTHESIS"):
+            document = f"{task_type}：台南市安平區今日發生垃圾車遭酒駕轎車追撞事故，隨車人員送醫不治。" * 60
+            assert app.process(document, task_type=task_type)["success"]
+
+    rows = {row["step"]: row for row in ledger.summary(by=("step",))}
+    assert rows["PreanalysisAgentTool.get_protagonist"]["cached_tokens"] == 0
+    for step in ("KeypointAgentTool.get_keypoints", "SynthesisAgentTool.get_synthesis_payload"):
+        assert rows[step]["cached_tokens"] > 0 and rows[step]["cached_share"] > 0.5, rows[step]
+    print("Test passed!")
+
+
+def test_streaming_steps_are_tagged():
+    ledger = TokenLedger()
+    with StubServer(FAST) as server:
+        client = server.client({"model": "gpt-5-nano"}, ledger=ledger)
+        tool = KeypointAgentTool(client)
+        events = list(tool.stream_keypoints(TEXT, "陳姓女", ["事故經過"]))
+
+        async def consume():
+            return [event async for event in tool.astream_keypoints(TEXT, "陳姓女", ["事故經過"])]
+        aevents = asyncio.run(consume())
+    assert events and aevents
+    steps = {row["step"] for row in ledger.summary(by=("step",))}
+    assert steps == {"KeypointAgentTool.stream_keypoints", "KeypointAgentTool.astream_keypoints"}, steps
+    print("Test passed!")
+
+
+def test_failed_sqlite_flush_keeps_records_and_never_blocks_callers():
+    directory = tempfile.mkdtemp()
+    # A directory cannot be opened as a database: every SQLite write fails
+    ledger = TokenLedger(sqlite_path=directory, flush_every=1, flush_interval=3600)
+    with ledger_tags(step="manual"):
+        ledger.record_call("gpt-5-nano", {"content": "x", "tokens_in": 10, "tokens_out": 5}, 0.01)
+        ledger.record_call("gpt-5-nano", {"content": "y", "tokens_in": 10, "tokens_out": 5}, 0.01)
+    assert ledger.flush() == 0
+    assert ledger.summary(by=("step",))[0]["calls"] == 2
+
+    # A slow write holds the flush; record() still returns at once
+    with ledger._flush_lock:
+        started = time.monotonic()
+        with ledger_tags(step="manual"):
+            ledger.record_call("gpt-5-nano", {"content": "z", "tokens_in": 10, "tokens_out": 5}, 0.01)
+        assert time.monotonic() - started < 0.5
+
+    # Nothing was lost while the database was unavailable
+    ledger.sqlite_path = os.path.join(directory, "ledger.sqlite3")
+    rows = ledger.query(by=("step",))
+    assert rows[0]["calls"] == 3 and rows[0]["tokens_in"] == 30
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_ledger_tags_pipeline_calls_per_step()
+    test_cache_hits_and_errors_are_not_billed()
+    test_steps_share_cached_prompt_prefix()
+    test_pipeline_final_step_hits_preanalysis_prefix()
+    test_streaming_steps_are_tagged()
+    test_failed_sqlite_flush_keeps_records_and_never_blocks_callers()
@@ -0,0 +1,149 @@
+# agents/mycore/test_micro_batch.py
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.cache import MemoryLRUCache, TieredCache
+from agents.mycore.ledger import TokenLedger, ledger_tags
+from agents.mycore.micro_batch import MicroBatcher
+
+CONFIG = {
+    "model": "gpt-5-nano",
+    "micro_batch": True,
+    "response_format": {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "classification_result",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {"task_type": {"type": "string", "enum": ["KEYPOINT", "SYNTHESIS"]}},
+                "required": ["task_type"],
+                "additionalProperties": False,
+            },
+        },
+    },
+}
+
+
+class _Classifier:
+    """Answers "KEYPOINT" for texts containing "news"; batch requests get one result per item."""
+
+    def __init__(self, broken_item=None):
+        self.requests = []
+        self.broken_item = broken_item
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _label(text):
+        return "KEYPOINT" if "news" in text else "SYNTHESIS"
+
+    def _content(self, request):
+        user = request["messages"][-1]["content"]
+        if not request["response_format"]["json_schema"]["name"].endswith("_batch"):
+            return json.dumps({"task_type": self._label(user)})
+        items = re.split(r"### Item (\d+)\n", user)[1:]
+        results = [
+            {"id": int(i), "task_type": "MAYBE" if int(i) == self.broken_item else self._label(text)}
+            for i, text in zip(items[0::2], items[1::2])
+        ]
+        return json.dumps({"results": results})
+
+    def _response(self, request):
+        with self._lock:
+            self.requests.append(request)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self._content(request)), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=1000, completion_tokens=10),
+        )
+
+    def create(self, **request):
+        return self._response(request)
+
+    async def acreate(self, **request):
+        await asyncio.sleep(0.01)
+        return self._response(request)
+
+
+def _client(completions, **kwargs):
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, batcher=MicroBatcher(window=0.05, max_batch=16), **kwargs)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=completions.acreate)))
+    return client
+
+
+def test_concurrent_calls_share_one_request():
+    completions = _Classifier()
+    client = _client(completions)
+    texts = [f"{'news' if i % 2 else 'lecture'} #{i}" for i in range(8)]
+    answers = [None] * len(texts)
+
+    def classify(i):
+        answers[i] = client.invoke_json(f"Classify: {texts[i]}", "sys", CONFIG)["task_type"]
+
+    threads = [threading.Thread(target=classify, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(completions.requests) == 1
+    assert answers == [completions._label(t) for t in texts]
+    assert client.batcher.stats()["batched_items"] == 8
+    print("Test passed!")
+
+
+def test_invalid_item_falls_back_to_single_call():
+    completions = _Classifier(broken_item=2)
+    client = _client(completions)
+    texts = [f"news #{i}" for i in range(4)]
+
+    async def run():
+        return await asyncio.gather(*(client.ainvoke_json(f"Classify: {t}", "sys", CONFIG) for t in texts))
+
+    answers = asyncio.run(run())
+    assert [a["task_type"] for a in answers] == ["KEYPOINT"] * 4
+    assert len(completions.requests) == 2          # the batch + one single call for item 2
+    stats = client.batcher.stats()
+    assert stats["batched_items"] == 3 and stats["fallbacks"] == 1
+    print("Test passed!")
+
+
+def test_batch_is_metered_per_caller():
+    completions = _Classifier()
+    memory = MemoryLRUCache()
+    ledger = TokenLedger(sqlite_path=os.path.join(tempfile.mkdtemp(), "ledger.sqlite3"))
+    client = _client(completions, cache=TieredCache([memory]), ledger=ledger)
+    config = {**CONFIG, "cache": True}
+
+    def classify(i):
+        with ledger_tags(user=f"U{i}", request_id=f"req-{i}"):
+            client.invoke_json(f"Classify: news #{i}", "sys", config)
+
+    threads = [threading.Thread(target=classify, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(completions.requests) == 1
+
+    # One entry per caller under its own tags, the batch's 1000 prompt tokens split between them
+    rows = ledger.query(by=("user", "request_id"))
+    assert {(r["user"], r["request_id"]) for r in rows} == {(f"U{i}", f"req-{i}") for i in range(8)}
+    assert all(r["calls"] == 1 and r["tokens_in"] == 125 for r in rows)
+    assert sum(r["tokens_out"] for r in rows) == 10 and sum(r["api_calls"] for r in rows) == 1
+
+    # Batched answers are not cached as zero-token single calls
+    assert len(memory) == 0
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_request()
+    test_invalid_item_falls_back_to_single_call()
+    test_batch_is_metered_per_caller()
@@ -0,0 +1,61 @@
+# agents/mycore/test_near_duplicate.py
+from agents.mycore.near_duplicate import NearDuplicateIndex, normalize_text
+
+ARTICLE = (
+    "23歲陳姓女垃圾車隨車人員16日在台南市安平區收取垃圾時，"
+    "被48歲鄭姓男子駕駛賓士車自後高速衝撞，閃避不及死亡。"
+    "警方發現鄭男酒測值高達每公升0.95毫克。"
+    "檢方認為犯罪嫌疑重大、有逃亡之虞，向法院聲請羈押獲准。"
+    "市府環保局表示，將全面檢討清潔隊員夜間收運的安全措施，並加裝警示燈號。"
+)
+OTHER = (
+    "牛頓第二定律表明，施加於物體的外力等於此物體動量的時變率：F = dp/dt。"
+    "其中 p 是動量，t 是時間。若質量固定，則可改寫為 F = ma，"
+    "也就是物體的加速度與所受淨力成正比、與質量成反比。"
+)
+RESULT = {"selected_task_type": "KEYPOINT", "final_result_text": "{\"keypoints\": []}"}
+
+
+def test_normalize_drops_whitespace_urls_and_footer():
+    forwarded = "  台南 安平區\n\n垃圾車  事故\n分享自 LINE TODAY https://today.line.me/abc"
+    assert normalize_text(forwarded) == "台南安平區垃圾車事故"
+    print("Test passed!")
+
+
+def test_near_duplicates_reuse_stored_result():
+    index = NearDuplicateIndex(threshold=0.8)
+    assert index.add(ARTICLE, RESULT)
+
+    variants = [
+        ARTICLE.replace("，", "， "),                                  # whitespace
+        ARTICLE + "\n\n分享自 LINE TODAY https://today.line.me/xyz",   # share footer
+        ARTICLE[: int(len(ARTICLE) * 0.9)],                            # truncated tail
+    ]
+    for variant in variants:
+        match = index.lookup(variant)
+        print(None if match is None else round(match["similarity"], 3))
+        assert match is not None and match["result"] == RESULT
+
+    assert index.lookup(OTHER) is None
+    metrics = index.metrics()
+    print(metrics)
+    assert metrics["hits"] == 3 and metrics["misses"] == 1
+    print("Test passed!")
+
+
+def test_index_is_bounded():
+    index = NearDuplicateIndex(max_entries=1)
+    index.add(ARTICLE, RESULT)
+    index.add(OTHER, RESULT)
+
+    assert len(index) == 1
+    assert index.lookup(ARTICLE) is None
+    assert index.lookup(OTHER) is not None
+    assert index.metrics()["evictions"] == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_normalize_drops_whitespace_urls_and_footer()
+    test_near_duplicates_reuse_stored_result()
+    test_index_is_bounded()
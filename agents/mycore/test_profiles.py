@@ -0,0 +1,64 @@
+# agents/mycore/test_profiles.py
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.keypoint_agents.tool import KeypointAgentTool
+
+
+class _Recorder:
+    """Answers each keypoint step with a fixed JSON object and keeps the requests."""
+
+    def __init__(self):
+        self.requests = []
+
+    ANSWERS = {
+        "protagonist_only": '{"protagonist": "台南市政府"}',
+        "keypoints_only": '{"keypoints": ["市府宣布新政策。"]}',
+    }
+
+    def create(self, **request):
+        self.requests.append(request)
+        content = self.ANSWERS[request["response_format"]["json_schema"]["name"]]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+def _client():
+    completions = _Recorder()
+    client = LLMClient("test-key", {"model": "gpt-5-nano"})
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_steps_use_their_profiles():
+    client, completions = _client()
+    tool = KeypointAgentTool(client)
+    tool.get_protagonist("市府宣布新政策。")
+    tool.get_keypoints("市府宣布新政策。", "台南市政府", ["政策"])
+
+    protagonist, keypoints = completions.requests
+    assert protagonist["reasoning_effort"] == "minimal" and protagonist["max_completion_tokens"] == 2000
+    assert keypoints["reasoning_effort"] == "low" and keypoints["max_completion_tokens"] == 6000
+
+    stats = client.profiles.stats()
+    assert stats["fast"]["calls"] == 1 and stats["balanced"]["calls"] == 1
+    print("Test passed!")
+
+
+def test_forced_profile_applies_to_every_step():
+    client, completions = _client()
+    client.profiles.force("fast")
+    KeypointAgentTool(client).get_keypoints("市府宣布新政策。", "台南市政府", ["政策"])
+    assert completions.requests[-1]["reasoning_effort"] == "minimal"
+
+    client.profiles.force(None)
+    KeypointAgentTool(client).get_keypoints("市府宣布新政策。", "台南市政府", ["政策"])
+    assert completions.requests[-1]["reasoning_effort"] == "low"
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_steps_use_their_profiles()
+    test_forced_profile_applies_to_every_step()
@@ -0,0 +1,134 @@
+# agents/mycore/test_scheduler.py
+import asyncio
+import time
+
+import httpx
+import openai
+
+from agents.mycore.scheduler import LLMScheduler, TokenBucket, AdaptiveConcurrency
+
+REQUEST = {
+    "model": "gpt-5-nano",
+    "max_completion_tokens": 100,
+    "messages": [{"role": "user", "content": "hello"}],
+}
+
+
+def _rate_limit_error(retry_after: str = "0") -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": retry_after}, request=request)
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def test_token_bucket_reports_wait():
+    bucket = TokenBucket(rate_per_minute=60)     # 1 per second
+    assert bucket.take(60) == 0.0
+    wait = bucket.take(1)
+    print(wait)
+    assert 0.5 < wait <= 1.0
+    print("Test passed!")
+
+
+def test_tpm_wait_does_not_spend_rpm():
+    scheduler = LLMScheduler({"limits": {"default": {"rpm": 10, "tpm": 100}}})
+    rpm, tpm = scheduler._buckets_for("gpt-5-nano")
+    tpm.take(100)                                # token budget exhausted
+    for _ in range(20):
+        assert scheduler._throttle_wait(REQUEST) > 0
+    assert rpm.tokens > 9.9                      # every request slot was given back
+    print("Test passed!")
+
+
+def test_aimd_halves_on_congestion_and_grows_back():
+    limiter = AdaptiveConcurrency(initial=8, minimum=1, maximum=16, latency_target=1.0)
+    limiter.on_congestion()
+    assert int(limiter.limit) == 4
+    for _ in range(20):
+        limiter.on_success(0.1)
+    assert 4 < limiter.limit <= 16
+    limiter.on_success(5.0)                      # slow call counts as congestion
+    assert limiter.limit < 8
+    print("Test passed!")
+
+
+def test_retries_rate_limit_then_succeeds():
+    scheduler = LLMScheduler({"backoff_base": 0.01, "max_retries": 3})
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _rate_limit_error()
+        return "ok"
+
+    assert scheduler.run(REQUEST, call) == "ok"
+    stats = scheduler.stats()
+    print(stats)
+    assert stats["calls"] == 3 and stats["retries"] == 2 and stats["rate_limited"] == 2
+    assert stats["in_flight"] == 0
+    print("Test passed!")
+
+
+def test_async_gives_up_after_max_retries():
+    scheduler = LLMScheduler({"backoff_base": 0.01, "max_retries": 1})
+
+    async def call():
+        raise _rate_limit_error()
+
+    try:
+        asyncio.run(scheduler.arun(REQUEST, call))
+        assert False, "expected RateLimitError"
+    except openai.RateLimitError:
+        pass
+    assert scheduler.stats()["calls"] == 2
+    print("Test passed!")
+
+
+def test_backoff_releases_the_concurrency_slot():
+    scheduler = LLMScheduler({"backoff_base": 0.01, "max_retries": 3, "initial_concurrency": 1})
+    in_flight = []
+
+    def call():
+        in_flight.append(scheduler.stats()["in_flight"])
+        if len(in_flight) < 3:
+            raise _rate_limit_error("0.2")
+        return "ok"
+
+    sleeps = []
+    original_sleep = time.sleep
+
+    def sleep(seconds):
+        sleeps.append(scheduler.stats()["in_flight"])
+        original_sleep(min(seconds, 0.01))
+
+    time.sleep = sleep
+    try:
+        assert scheduler.run(REQUEST, call) == "ok"
+    finally:
+        time.sleep = original_sleep
+    # Each attempt holds the slot; nothing is held while a retry backs off
+    assert in_flight == [1, 1, 1] and sleeps == [0, 0]
+
+    async def acall():
+        in_flight.append(scheduler.stats()["in_flight"])
+        if len(in_flight) < 5:
+            raise _rate_limit_error("0.1")
+        return "ok"
+
+    async def main():
+        task = asyncio.ensure_future(scheduler.arun(REQUEST, acall))
+        await asyncio.sleep(0.02)       # first attempt failed, retry is backing off for 0.1s
+        backing_off = scheduler.stats()["in_flight"]
+        return await task, backing_off
+
+    assert asyncio.run(main()) == ("ok", 0)
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_token_bucket_reports_wait()
+    test_tpm_wait_does_not_spend_rpm()
+    test_aimd_halves_on_congestion_and_grows_back()
+    test_retries_rate_limit_then_succeeds()
+    test_async_gives_up_after_max_retries()
+    test_backoff_releases_the_concurrency_slot()
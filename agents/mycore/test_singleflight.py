@@ -0,0 +1,62 @@
+# agents/mycore/test_singleflight.py
+import threading
+import time
+
+from agents.mycore.singleflight import SingleFlight
+
+
+def _run_concurrently(flight: SingleFlight, fn, n: int = 5) -> list:
+    results = []
+    barrier = threading.Barrier(n)
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(flight.do("same-request", fn))
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"content": "leader result"}
+
+    results = _run_concurrently(flight, fn)
+    assert len(calls) == 1
+    assert all(result == {"content": "leader result"} for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert flight.stats() == {"leaders": 1, "followers": 4}
+
+    # Nothing is retained once the leader finishes
+    flight.do("same-request", fn)
+    assert len(calls) == 2
+    print("Test passed!")
+
+
+def test_followers_receive_leader_error():
+    flight = SingleFlight()
+
+    def fn():
+        time.sleep(0.2)
+        raise RuntimeError("API down")
+
+    results = _run_concurrently(flight, fn, n=3)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_calls_share_one_execution()
+    test_followers_receive_leader_error()
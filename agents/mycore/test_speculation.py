@@ -0,0 +1,115 @@
+# agents/mycore/test_speculation.py
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.speculation import Speculator
+from agents.top_controller.controller import TopController
+
+DELAY = 0.1
+
+
+class _Model:
+    """Answers every step after DELAY seconds; intent classification takes 3 * DELAY."""
+
+    def __init__(self, task_type: str):
+        self.answers = {
+            "classification_result": json.dumps({"task_type": task_type}),
+            "protagonist_only": '{"protagonist": "牛頓第二定律"}',
+            "focus_aspects_only": '{"focus_aspects": ["符號意義", "應用"]}',
+            "synth_protagonist_only": '{"protagonist": "牛頓第二定律"}',
+            "synth_focus_aspects_only": '{"focus_aspects": ["符號意義", "應用"]}',
+            "keypoints_only": '{"keypoints": ["外力等於動量的時變率。"]}',
+            "synth_payload_only": json.dumps({
+                "synthesis": "外力等於動量的時變率。", "added_context": [], "examples": [], "takeaways": ["F = dp/dt"],
+            }, ensure_ascii=False),
+        }
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def _reply(self, request):
+        name = request["response_format"]["json_schema"]["name"]
+        with self._lock:
+            self.steps.append(name)
+        delay = 3 * DELAY if name == "classification_result" else DELAY
+        content = self.answers[name]
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+        return delay, response
+
+    def create(self, **request):
+        delay, response = self._reply(request)
+        time.sleep(delay)
+        return response
+
+    async def acreate(self, **request):
+        delay, response = self._reply(request)
+        await asyncio.sleep(delay)
+        return response
+
+
+def _graph(task_type: str, speculator: Speculator):
+    model = _Model(task_type)
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=model))
+    client.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=model.acreate)))
+    return TopController(client, speculator=speculator).compile(), model
+
+
+# Not decided by the intent rules, so classification goes to the (slow) model
+STATE = {"input_text": "牛頓第二運動定律描述物體受力後運動狀態如何改變。", "selected_task_type": ""}
+
+
+def test_hit_saves_the_branch_latency():
+    speculator = Speculator(prior="SYNTHESIS")
+    graph, model = _graph("SYNTHESIS", speculator)
+
+    started = time.monotonic()
+    out = graph.invoke(dict(STATE))
+    elapsed = time.monotonic() - started
+
+    # Synthesis starts when the pre-analysis is done (2 * DELAY), not after the intent (3 * DELAY)
+    assert elapsed < 3.8 * DELAY, elapsed
+    assert model.steps.count("synth_payload_only") == 1
+    # The pre-analysis was asked with the predicted branch's prompts and is reused as is
+    assert sorted(model.steps) == ["classification_result", "synth_focus_aspects_only", "synth_payload_only", "synth_protagonist_only"]
+    assert json.loads(out["final_result_text"])["protagonist"] == "牛頓第二定律"
+    assert out["speculation"] is None
+
+    stats = speculator.stats()
+    assert stats["speculated"] == 1 and stats["hits"] == 1 and stats["hit_rate"] == 1.0
+    assert stats["latency_saved"] > 0.5 * DELAY
+    print("Test passed!")
+
+
+def test_miss_is_cancelled_and_speculation_pauses():
+    speculator = Speculator(prior="SYNTHESIS", min_samples=2, max_miss_rate=0.3)
+    graph, model = _graph("KEYPOINT", speculator)
+
+    out = asyncio.run(graph.ainvoke(dict(STATE)))
+    assert out["selected_task_type"] == "KEYPOINT"
+    assert "keypoints" in json.loads(out["final_result_text"])
+    # The synthesis-prompted pre-analysis is not handed to the keypoint branch
+    assert model.steps.count("protagonist_only") == 1 and model.steps.count("focus_aspects_only") == 1
+
+    stats = speculator.stats()
+    assert stats["speculated"] == 1 and stats["misses"] == 1 and stats["cancelled"] == 1
+    assert stats["hits"] == 0 and stats["predicted"] == "KEYPOINT"
+
+    # The intent flips again: every prediction in the window missed, so speculation turns itself off
+    graph, model = _graph("SYNTHESIS", speculator)
+    graph.invoke(dict(STATE))
+    assert not speculator.enabled()
+    assert speculator.begin().active is False
+    assert speculator.stats()["paused_requests"] == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_hit_saves_the_branch_latency()
+    test_miss_is_cancelled_and_speculation_pauses()
@@ -0,0 +1,110 @@
+# agents/mycore/test_stub_server.py
+import asyncio
+import json
+import random
+import time
+
+from agents.mycore.scheduler import LLMScheduler
+from agents.mycore.stub_server import StubServer, generate_from_schema
+from agents.top_controller.controller import TopController
+from api import UnifyAPI
+
+FAST = {"latency": {"distribution": "fixed", "value": 0.0}}
+
+
+def test_generate_from_schema_respects_constraints():
+    schema = {
+        "type": "object",
+        "properties": {
+            "task_type": {"type": "string", "enum": ["KEYPOINT", "SYNTHESIS"]},
+            "keypoints": {"type": "array", "minItems": 2, "maxItems": 4, "items": {"type": "string", "maxLength": 10}},
+        },
+        "required": ["task_type", "keypoints"],
+        "additionalProperties": False,
+    }
+    first = generate_from_schema(schema, random.Random(1), "台南市安平區垃圾車事故")
+    assert first == generate_from_schema(schema, random.Random(1), "台南市安平區垃圾車事故")
+    assert first["task_type"] in ("KEYPOINT", "SYNTHESIS")
+    assert 2 <= len(first["keypoints"]) <= 4
+    assert all(0 < len(k) <= 10 for k in first["keypoints"])
+    print("Test passed!")
+
+
+def test_pipeline_runs_offline_with_injected_429s():
+    with StubServer({**FAST, "rate_429": 0.3, "retry_after": 0.01, "seed": 7}) as server:
+        scheduler = LLMScheduler({"limits": {"default": {"rpm": 10000, "tpm": 10000000}}, "max_retries": 8, "backoff_base": 0.01})
+        client = server.client({"model": "gpt-5-nano"}, scheduler=scheduler)
+
+        # Several documents, so at rate_429 0.3 some request draws a 429 whatever the prompts hash to
+        graph = TopController(client).compile()
+        for place in ("台南市安平區", "高雄市前鎮區", "新竹市東區"):
+            out = graph.invoke({"input_text": f"23歲陳姓女垃圾車隨車人員在{place}收取垃圾時被撞。", "selected_task_type": ""})
+            assert out["selected_task_type"] in ("KEYPOINT", "SYNTHESIS")
+            assert json.loads(out["final_result_text"])
+
+        stats = server.stats()
+        print(stats, scheduler.stats())
+        assert stats["429"] > 0 and stats["ok"] > 0
+        # Every injected 429 was absorbed by a scheduler retry
+        assert stats["requests"] == stats["ok"] + stats["429"]
+        assert scheduler.stats()["rate_limited"] == stats["429"]
+    print("Test passed!")
+
+
+def test_stream_and_length_truncation():
+    with StubServer(FAST) as server:
+        client = server.client({"model": "gpt-5-nano"})
+        events = list(client.invoke_stream("hello stub server", "Reply in text.", {}))
+        assert events[-1]["type"] == "final"
+        assert "".join(e["content"] for e in events if e["type"] == "delta") == events[-1]["content"]
+
+    with StubServer({**FAST, "rate_length": 1.0}) as server:
+        client = server.client({"model": "gpt-5-nano", "max_completion_tokens": 50})
+        error = None
+        try:
+            list(client.invoke_stream("hello stub server", "Reply in text.", {}))
+        except Exception as e:
+            error = str(e)
+        assert error and "incomplete: length" in error
+        assert server.stats()["length"] == 1
+    print("Test passed!")
+
+
+def test_async_pipeline_runs_documents_concurrently():
+    latency = 0.2
+    with StubServer({"latency": {"distribution": "fixed", "value": latency}}) as server:
+        client = server.client({"model": "gpt-5-nano"})
+
+        result = asyncio.run(UnifyAPI(client).aprocess("23歲陳姓女垃圾車隨車人員在台南市安平區收取垃圾時被撞。"))
+        assert result["success"] and json.loads(result["data"]["final_result_text"])
+
+        graph = TopController(client).compile()
+        places = ["高雄市前鎮區", "新竹市東區", "花蓮縣吉安鄉", "嘉義市西區", "基隆市仁愛區", "台中市西屯區"]
+
+        states = [{"input_text": f"垃圾車隨車人員在{place}收取垃圾時被撞。", "selected_task_type": ""} for place in places]
+
+        # The same documents one after another: their round trips (a SYNTHESIS intent after the
+        # default keypoint pre-analysis takes two more) plus this machine's per-document overhead
+        started = time.monotonic()
+        for state in states:
+            asyncio.run(graph.ainvoke(dict(state)))
+        serial = time.monotonic() - started
+
+        async def run_all():
+            return await asyncio.gather(*(graph.ainvoke(dict(state)) for state in states))
+
+        started = time.monotonic()
+        outs = asyncio.run(run_all())
+        elapsed = time.monotonic() - started
+        assert all(out["selected_task_type"] in ("KEYPOINT", "SYNTHESIS") and json.loads(out["final_result_text"]) for out in outs)
+
+        assert elapsed < serial / 2, (elapsed, serial)
+        assert server.stats()["ok"] >= 4 * (2 * len(places) + 1)
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_generate_from_schema_respects_constraints()
+    test_pipeline_runs_offline_with_injected_429s()
+    test_async_pipeline_runs_documents_concurrently()
+    test_stream_and_length_truncation()
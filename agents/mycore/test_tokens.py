@@ -0,0 +1,121 @@
+# agents/mycore/test_tokens.py
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.tokens import (
+    TokenBudget,
+    PromptTooLargeError,
+    estimate_tokens,
+    trim_to_tokens,
+)
+
+
+class _ScriptedCompletions:
+    """Returns the scripted (content, finish_reason) pairs in order and records requests."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []
+
+    def create(self, **request):
+        self.requests.append(request)
+        content, finish_reason = self.script.pop(0)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=50),
+        )
+
+
+def _client(script, budget=None):
+    completions = _ScriptedCompletions(script)
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, budget=budget)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return client, completions
+
+
+def test_estimate_mixed_chinese_english():
+    assert estimate_tokens("") == 0
+    chinese = estimate_tokens("台南市安平區垃圾車事故")          # 11 Han characters
+    assert 11 <= chinese <= 16
+    english = estimate_tokens("hello world, this is a test.")
+    assert 6 <= english <= 10
+    mixed = "台南市 hello 2024年"
+    assert estimate_tokens(mixed) < len(mixed)
+    print("Test passed!")
+
+
+def test_trim_respects_budget():
+    text = "第一段內容。" * 200 + "\n\n" + "second paragraph words " * 200
+    assert estimate_tokens(trim_to_tokens(text, 100)) <= 100
+    assert trim_to_tokens(text, 10 ** 6) == text
+    print("Test passed!")
+
+
+def test_preflight_trims_or_rejects_oversized_prompt():
+    budget = TokenBudget(context_windows={"tiny": 1000})
+    request = {
+        "model": "tiny-model",
+        "max_completion_tokens": 200,
+        "messages": [
+            {"role": "system", "content": "Summarize."},
+            {"role": "user", "content": "Input:\n\n" + "很長的文章。" * 1000},
+        ],
+    }
+    trimmed = budget.preflight(request)
+    assert trimmed["messages"][0] == request["messages"][0]
+    assert trimmed["messages"][1]["content"].startswith("Input:\n\n")
+    assert len(trimmed["messages"][1]["content"]) < len(request["messages"][1]["content"])
+
+    try:
+        budget.preflight(request, {"overflow": "reject"})
+        assert False, "expected PromptTooLargeError"
+    except PromptTooLargeError:
+        pass
+    stats = budget.stats()
+    assert stats["trimmed"] == 1 and stats["rejected"] == 1
+    # Trimmed input is counted apart: dropping part of the document saves nothing
+    assert stats["prompt_tokens_trimmed"] > 0
+    assert stats["wasted_tokens_avoided"] == stats["prompt_tokens_rejected"] > 0
+    print("Test passed!")
+
+
+def test_length_finish_continues_text_response():
+    client, completions = _client([("前半段", "length"), ("後半段", "stop")])
+    result = client.invoke("text", "system", {})
+
+    assert result["content"] == "前半段後半段"
+    assert result["tokens_out"] == 100
+    assert completions.requests[1]["messages"][-2] == {"role": "assistant", "content": "前半段"}
+    assert client.budget.stats()["completion_tokens_reused"] == 50
+    print("Test passed!")
+
+
+def test_length_finish_retries_structured_response_with_larger_cap():
+    json_format = {"type": "json_schema", "json_schema": {"name": "x", "strict": True, "schema": {}}}
+    client, completions = _client([("", "length"), ('{"ok": true}', "stop")])
+    result = client.invoke("text", "system", {"max_completion_tokens": 500, "response_format": json_format})
+
+    assert result["content"] == '{"ok": true}'
+    assert [r["max_completion_tokens"] for r in completions.requests] == [500, 1500]
+    assert client.budget.stats()["length_recovered"] == 1
+    print("Test passed!")
+
+
+def test_length_gives_up_after_retries():
+    client, _ = _client([("a", "length")] * 3, budget=TokenBudget(length_retries=2))
+    try:
+        client.invoke("text", "system", {})
+        assert False, "expected failure"
+    except Exception as e:
+        assert "incomplete: length" in str(e)
+    assert client.budget.stats()["length_failed"] == 1
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_estimate_mixed_chinese_english()
+    test_trim_respects_budget()
+    test_preflight_trims_or_rejects_oversized_prompt()
+    test_length_finish_continues_text_response()
+    test_length_finish_retries_structured_response_with_larger_cap()
+    test_length_gives_up_after_retries()
@@ -0,0 +1,73 @@
+# agents/mycore/test_transport.py
+import gc
+import os
+import weakref
+
+from agents.mycore import transport
+from agents.mycore.stub_server import StubServer
+from agents.mycore.transport import TransportPool, shared_transport_pool
+
+
+def test_warm_up_opens_connections_and_can_be_disabled():
+    pool = TransportPool({"warmup_connections": 0})
+    # No executor, no request: nothing to fail in the Celery worker_process_init hook
+    assert pool.warm_up("http://127.0.0.1:9/v1") == 0
+
+    with StubServer() as server:
+        assert pool.warm_up(server.base_url, connections=2) == 2
+    print("Test passed!")
+
+
+def test_forked_child_gets_fresh_clients():
+    pool = TransportPool()
+    parent_client = pool.get_client()
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        # Child: the inherited client was dropped by the at-fork hook and a new one is built
+        try:
+            dropped = pool._client is None
+            fresh = pool.get_client() is not parent_client
+            os.write(write_fd, b"ok" if dropped and fresh and not parent_client.is_closed else b"stale")
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd, "rb") as f:
+        assert f.read() == b"ok"
+
+    # The parent keeps using its own client
+    assert pool.get_client() is parent_client and not parent_client.is_closed
+    print("Test passed!")
+
+
+def test_pools_are_not_kept_alive_by_the_fork_hook():
+    ref = weakref.ref(TransportPool())
+    gc.collect()
+    assert ref() is None
+    print("Test passed!")
+
+
+def test_shared_pool_refuses_a_different_config():
+    saved = transport._shared_pool
+    transport._shared_pool = None
+    try:
+        pool = shared_transport_pool({"max_connections": 8})
+        assert shared_transport_pool() is pool
+        assert shared_transport_pool({"max_connections": 8}) is pool
+        try:
+            shared_transport_pool({"max_connections": 50})
+            assert False, "a different config should not be dropped silently"
+        except ValueError as e:
+            assert "max_connections" in str(e)
+    finally:
+        transport._shared_pool = saved
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_warm_up_opens_connections_and_can_be_disabled()
+    test_forked_child_gets_fresh_clients()
+    test_pools_are_not_kept_alive_by_the_fork_hook()
+    test_shared_pool_refuses_a_different_config()
@@ -0,0 +1,227 @@
+# agents/mycore/tokens.py
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+# =========================================================
+# Estimation
+# =========================================================
+# Heuristics for o200k-style tokenizers on mixed Chinese / English text.
+# Deliberately a little pessimistic: over-estimating only trims earlier.
+CJK_TOKENS_PER_CHAR = 1.2       # common Han chars are 1 token, rarer ones 2+
+LATIN_CHARS_PER_TOKEN = 5.0     # common English words are one token; long ones split
+DIGITS_PER_TOKEN = 3.0          # numbers are split into groups of up to 3 digits
+MESSAGE_OVERHEAD_TOKENS = 4     # role + separators per chat message
+REQUEST_OVERHEAD_TOKENS = 3
+
+_PIECE_RE = re.compile(
+    r"(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])"
+    r"|(?P<latin>[A-Za-z]+)"
+    r"|(?P<digits>[0-9]+)"
+    r"|(?P<space>\s+)"
+    r"|(?P<other>.)",
+    re.DOTALL,
+)
+
+
+def _piece_cost(match: "re.Match") -> float:
+    kind = match.lastgroup
+    length = match.end() - match.start()
+    if kind == "cjk":
+        return CJK_TOKENS_PER_CHAR
+    if kind == "latin":
+        return math.ceil(length / LATIN_CHARS_PER_TOKEN)
+    if kind == "digits":
+        return math.ceil(length / DIGITS_PER_TOKEN)
+    if kind == "space":
+        # Single spaces merge into the next word; runs of newlines/indent cost a token
+        return 0 if length == 1 else 1
+    return 1    # punctuation, full-width symbols, emoji, ...
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of text (CJK-aware, no tokenizer download needed)."""
+    if not text:
+        return 0
+    return math.ceil(sum(_piece_cost(m) for m in _PIECE_RE.finditer(text)))
+
+
+def estimate_messages_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Estimate the prompt tokens of a chat request's messages."""
+    return REQUEST_OVERHEAD_TOKENS + sum(
+        MESSAGE_OVERHEAD_TOKENS + estimate_tokens(m.get("content") or "") for m in messages
+    )
+
+
+def trim_to_tokens(text: str, max_tokens: int) -> str:
+    """Longest prefix of text estimated to fit in max_tokens (single pass, stops early)."""
+    used = 0.0
+    for m in _PIECE_RE.finditer(text):
+        used += _piece_cost(m)
+        if used > max_tokens:
+            return text[:m.start()]
+    return text
+
+
+# =========================================================
+# Budget: pre-flight check and finish_reason == "length" recovery
+# =========================================================
+# Total context (prompt + completion) per model prefix; longest prefix wins
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "o3": 200000,
+    "o4-mini": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 128000
+
+CONTINUE_PROMPT = "Continue exactly where you stopped. Do not repeat any text."
+TRUNCATION_MARKER = "\n\n[...truncated]"
+
+
+class PromptTooLargeError(Exception):
+    """Raised by the pre-flight check when a prompt cannot fit and overflow == "reject"."""
+
+
+class TokenBudget:
+    """
+    Token accounting around LLMClient calls.
+
+    Pre-flight (before any API call):
+      The estimated prompt plus max_completion_tokens must fit the model's
+      context window (minus a safety margin). Otherwise, per the "overflow"
+      policy (constructor default, or "overflow" in the call config):
+        - "trim":   cut the tail of the longest user message (the document) to
+                    fit; the cut is printed and counted in prompt_tokens_trimmed.
+        - "reject": raise PromptTooLargeError without calling the API.
+
+    finish_reason == "length":
+      - Plain-text responses are continued: the partial answer is sent back
+        as an assistant message and the model is asked to go on, so the
+        paid tokens are kept.
+      - Structured (json_schema) responses cannot be resumed, so the call is
+        retried with max_completion_tokens doubled (up to max_completion_cap).
+      At most length_retries extra calls are made before giving up.
+    """
+
+    def __init__(
+        self,
+        context_windows: Optional[Dict[str, int]] = None,
+        safety_margin: float = 0.05,
+        overflow: str = "trim",
+        length_retries: int = 2,
+        max_completion_cap: int = 32000,
+    ):
+        self.context_windows = {**MODEL_CONTEXT_WINDOWS, **(context_windows or {})}
+        self.safety_margin = safety_margin
+        self.overflow = overflow
+        self.length_retries = length_retries
+        self.max_completion_cap = max_completion_cap
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "preflight_checks": 0, "trimmed": 0, "rejected": 0,
+            "prompt_tokens_trimmed": 0, "prompt_tokens_rejected": 0,
+            "length_finishes": 0, "continued": 0, "retried_larger": 0,
+            "length_recovered": 0, "length_failed": 0,
+            "completion_tokens_reused": 0, "completion_tokens_discarded": 0,
+        }
+
+    def _record(self, **amounts) -> None:
+        with self._lock:
+            for field, amount in amounts.items():
+                self._stats[field] += amount
+
+    def context_window(self, model: str, config: Optional[Dict[str, Any]] = None) -> int:
+        if config and config.get("context_window"):
+            return int(config["context_window"])
+        matches = [prefix for prefix in self.context_windows if model.startswith(prefix)]
+        return self.context_windows[max(matches, key=len)] if matches else DEFAULT_CONTEXT_WINDOW
+
+    # ---------------------------------------------------------
+    # Pre-flight
+    # ---------------------------------------------------------
+    def preflight(self, request: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Return the request unchanged if it fits, a trimmed copy, or raise PromptTooLargeError."""
+        self._record(preflight_checks=1)
+        window = self.context_window(request["model"], config)
+        available = int(window * (1 - self.safety_margin)) - int(request.get("max_completion_tokens") or 0)
+        prompt_tokens = estimate_messages_tokens(request["messages"])
+        if prompt_tokens <= available:
+            return request
+
+        excess = prompt_tokens - available
+        policy = (config or {}).get("overflow", self.overflow)
+        if policy != "trim":
+            self._record(rejected=1, prompt_tokens_rejected=prompt_tokens)
+            raise PromptTooLargeError(
+                f"Prompt too large: ~{prompt_tokens} tokens, {available} available for {request['model']}"
+            )
+
+        messages = [dict(m) for m in request["messages"]]
+        users = [m for m in messages if m["role"] == "user"]
+        target = max(users, key=lambda m: len(m["content"] or ""), default=None)
+        if target is None:
+            raise PromptTooLargeError(f"Prompt too large: ~{prompt_tokens} tokens and no user message to trim")
+        keep = estimate_tokens(target["content"]) - excess - estimate_tokens(TRUNCATION_MARKER)
+        if keep <= 0:
+            self._record(rejected=1, prompt_tokens_rejected=prompt_tokens)
+            raise PromptTooLargeError(
+                f"Prompt too large: ~{prompt_tokens} tokens even without the user input ({available} available)"
+            )
+        target["content"] = trim_to_tokens(target["content"], keep) + TRUNCATION_MARKER
+        self._record(trimmed=1, prompt_tokens_trimmed=excess)
+        # The answer is based on part of the document only: make that visible
+        print(
+            f"LLM prompt truncated for {request['model']}: ~{prompt_tokens} tokens, {available} available, "
+            f"~{excess} tokens cut from the end of the user input"
+        )
+        return {**request, "messages": messages}
+
+    # ---------------------------------------------------------
+    # finish_reason == "length"
+    # ---------------------------------------------------------
+    def next_after_length(self, request: Dict[str, Any], partial: str, completion_tokens: int) -> Optional[tuple]:
+        """
+        Plan the follow-up call after a truncated completion.
+        Returns (next_request, keep_partial) or None when no recovery is possible.
+        """
+        self._record(length_finishes=1)
+        response_format = (request.get("response_format") or {}).get("type", "text")
+
+        if response_format == "text" and partial:
+            messages = request["messages"] + [
+                {"role": "assistant", "content": partial},
+                {"role": "user", "content": CONTINUE_PROMPT},
+            ]
+            self._record(continued=1, completion_tokens_reused=completion_tokens)
+            return {**request, "messages": messages}, True
+
+        current = int(request.get("max_completion_tokens") or 0)
+        raised = min(self.max_completion_cap, max(current * 2, current + 1000))
+        if raised <= current:
+            return None
+        self._record(retried_larger=1, completion_tokens_discarded=completion_tokens)
+        return {**request, "max_completion_tokens": raised}, False
+
+    def record_length_outcome(self, recovered: bool) -> None:
+        self._record(**({"length_recovered": 1} if recovered else {"length_failed": 1}))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters plus wasted_tokens_avoided: completion tokens kept by
+        continuation plus prompt tokens of rejected prompts, which would only
+        have bought a context-length error. Tokens cut by trimming are input
+        the model never saw, not savings: they are in prompt_tokens_trimmed.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wasted_tokens_avoided"] = stats["completion_tokens_reused"] + stats["prompt_tokens_rejected"]
+        return stats
+
+
+def build_token_budget(settings: Optional[Dict[str, Any]]) -> TokenBudget:
+    """Build a TokenBudget from the LLM_TOKEN_BUDGET setting in config.py (defaults if unset)."""
+    return TokenBudget(**(settings or {}))
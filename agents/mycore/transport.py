@@ -0,0 +1,159 @@
+# agents/mycore/transport.py
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import httpx
+from openai import DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+DEFAULT_TRANSPORT_CONFIG = {
+    "max_connections"           : 20,     # hard cap of open sockets per worker process
+    "max_keepalive_connections" : 10,     # idle sockets kept for reuse
+    "keepalive_expiry"          : 60.0,   # seconds an idle socket is kept alive
+    "connect_timeout"           : 10.0,
+    "read_timeout"              : 120.0,
+    "warmup_connections"        : 2,      # sockets opened by warm_up()
+}
+
+
+class TransportPool:
+    """
+    Process-level pool of HTTP connections shared by every LLMClient in a worker.
+
+    - One pooled httpx client per process (plus one async client per event loop),
+      so connection limits and keep-alive apply to the whole worker, not per client.
+    - Fork-safe: a child process never reuses a client (and its sockets) inherited
+      from the parent; the references are dropped after fork and rebuilt lazily.
+    - warm_up() opens connections ahead of time (DNS + TCP + TLS), meant to be
+      called from a worker-init hook right after the fork.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = {**DEFAULT_TRANSPORT_CONFIG, **(config or {})}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client: Optional[httpx.Client] = None
+        self._async_clients = weakref.WeakKeyDictionary()
+        _live_pools.add(self)
+
+    # =========================================================
+    # Fork safety
+    # =========================================================
+    def _reset_after_fork(self) -> None:
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _check_pid(self) -> None:
+        # Fallback for platforms without register_at_fork
+        if self._pid != os.getpid():
+            self._reset_after_fork()
+
+    # =========================================================
+    # Clients
+    # =========================================================
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.config["max_connections"],
+            max_keepalive_connections=self.config["max_keepalive_connections"],
+            keepalive_expiry=self.config["keepalive_expiry"],
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(self.config["read_timeout"], connect=self.config["connect_timeout"])
+
+    def get_client(self) -> httpx.Client:
+        """Return the pooled sync client of the current process."""
+        self._check_pid()
+        with self._lock:
+            if self._client is None or self._client.is_closed:
+                self._client = DefaultHttpxClient(limits=self._limits(), timeout=self._timeout())
+            return self._client
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        """
+        Return the pooled async client of the current process and event loop.
+        Async connections are bound to the loop that opened them, so each loop
+        gets its own pool.
+        """
+        self._check_pid()
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None or client.is_closed:
+                client = DefaultAsyncHttpxClient(limits=self._limits(), timeout=self._timeout())
+                self._async_clients[loop] = client
+            return client
+
+    # =========================================================
+    # Warm-up
+    # =========================================================
+    def warm_up(self, base_url: str, connections: Optional[int] = None) -> int:
+        """
+        Open keep-alive connections to base_url so the first real request skips
+        DNS + TLS setup. Any HTTP response (even 401/404) counts as warmed.
+
+        Returns:
+            int: number of connections successfully warmed.
+        """
+        n = self.config["warmup_connections"] if connections is None else connections
+        if n <= 0:
+            # Warm-up disabled ("warmup_connections": 0)
+            return 0
+        client = self.get_client()
+
+        def _touch(_):
+            try:
+                client.get(base_url)
+                return 1
+            except httpx.HTTPError:
+                return 0
+
+        # Concurrent requests force the pool to open n distinct sockets
+        with ThreadPoolExecutor(max_workers=n) as executor:
+            return sum(executor.map(_touch, range(n)))
+
+
+# Pools alive in this process. A single at-fork hook resets them all; a hook
+# per pool could never be unregistered and would keep every pool alive.
+_live_pools: "weakref.WeakSet[TransportPool]" = weakref.WeakSet()
+
+
+def _reset_pools_after_fork() -> None:
+    # Drop (never close) inherited clients in the child: closing would
+    # shut down sockets the parent process is still using.
+    for pool in list(_live_pools):
+        pool._reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_after_fork)
+
+
+_shared_pool: Optional[TransportPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_transport_pool(config: Optional[Dict[str, Any]] = None) -> TransportPool:
+    """
+    Return the process-wide TransportPool, creating it on first use.
+
+    config applies only when the pool is created. A later call with a
+    different config raises ValueError instead of silently keeping the first
+    one; pass None to get the pool as it is.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = TransportPool(config)
+        elif config is not None and {**DEFAULT_TRANSPORT_CONFIG, **config} != _shared_pool.config:
+            raise ValueError(
+                f"[shared_transport_pool] the shared pool was already created with {_shared_pool.config}; "
+                f"{config} cannot be applied (set LLM_TRANSPORT before the first LLMClient is built)"
+            )
+        return _shared_pool
@@ -0,0 +1 @@
+# agents/preanalysis_agent/__init__.py
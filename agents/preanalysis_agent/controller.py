@@ -0,0 +1,53 @@
+# agents/preanalysis_agent/controller.py
+from agents.mycore.base_graph import BaseGraph
+from agents.mycore.LLMclient import LLMClient
+
+from agents.preanalysis_agent.schema import PreanalysisAgentSchema
+from agents.preanalysis_agent.tool import PreanalysisAgentTool
+
+
+class PreanalysisAgent(BaseGraph):
+    """Protagonist and focus aspects of a document, shared by the keypoint and synthesis agents."""
+
+    def __init__(self, llm_client: LLMClient):
+        super().__init__(PreanalysisAgentSchema.state_type)
+
+        # --- import schema definitions ---
+        self.nodes = PreanalysisAgentSchema.nodes
+        self.conditional_edges = PreanalysisAgentSchema.conditional_edges
+        self.direct_edges = PreanalysisAgentSchema.direct_edges
+        self.state_mapping = PreanalysisAgentSchema.state_mapping
+
+        # --- load tools ---
+        self.tools = PreanalysisAgentTool(llm_client)
+
+    def identify_protagonist(self, state: dict) -> dict:
+        out = self.tools.get_protagonist(state.get("input_text"), state.get("task_type"))
+        return self.protagonist_update(out)
+
+    async def aidentify_protagonist(self, state: dict) -> dict:
+        out = await self.tools.aget_protagonist(state.get("input_text"), state.get("task_type"))
+        return self.protagonist_update(out)
+
+    def protagonist_update(self, out: dict) -> dict:
+        protagonist = (out.get("protagonist") or "Unknown").strip() or "Unknown"
+        return {"protagonist": protagonist}
+
+    def infer_focus_aspects(self, state: dict) -> dict:
+        out = self.tools.get_focus_aspects(state.get("input_text"), state.get("protagonist", "Unknown"), state.get("task_type"))
+        return self.focus_aspects_update(out)
+
+    async def ainfer_focus_aspects(self, state: dict) -> dict:
+        out = await self.tools.aget_focus_aspects(state.get("input_text"), state.get("protagonist", "Unknown"), state.get("task_type"))
+        return self.focus_aspects_update(out)
+
+    def focus_aspects_update(self, out: dict) -> dict:
+        focus_aspects = out.get("focus_aspects")
+        if not isinstance(focus_aspects, list):
+            focus_aspects = []
+        focus_aspects = [str(x).strip() for x in focus_aspects if str(x).strip()]
+        return {"focus_aspects": focus_aspects or ["Unclear"]}
+
+    def compile(self):
+        """Compile the PreanalysisAgent graph using BaseGraph logic."""
+        return super().compile()
@@ -0,0 +1,55 @@
+# agents/preanalysis_agent/schema.py
+from typing import TypedDict, List
+from agents.mycore.base_schema import BaseSchema
+from agents.mycore.common import END
+
+# ========================================================
+# State definition
+# ========================================================
+class PreanalysisAgentState(TypedDict):
+    input_text: str
+    task_type: str            # Branch whose prompts are used (see PreanalysisAgentTool)
+    protagonist: str
+    focus_aspects: List[str]
+
+# ========================================================
+# Node definition
+# ========================================================
+def identify_protagonist(state: PreanalysisAgentState) -> dict:
+    """Placeholder node for protagonist identification (Implement in controller)"""
+    return state
+
+def infer_focus_aspects(state: PreanalysisAgentState) -> dict:
+    """Placeholder node for focus aspect inference (Implement in controller)"""
+    return state
+
+# ========================================================
+# Schema Definition
+# ========================================================
+class PreanalysisAgentSchema(BaseSchema):
+    state_type = PreanalysisAgentState
+
+    state_mapping = {
+        "analyze_document": {
+            "input": {
+                "input_text": "input_text",
+                "preanalysis_task_type": "task_type"
+            },
+            "output": {
+                "protagonist": "protagonist",
+                "focus_aspects": "focus_aspects"
+            }
+        }
+    }
+
+    nodes = [
+        ("identify_protagonist", identify_protagonist),
+        ("infer_focus_aspects", infer_focus_aspects),
+    ]
+
+    conditional_edges = []
+
+    direct_edges = [
+        ("identify_protagonist", "infer_focus_aspects"),
+        ("infer_focus_aspects", END)
+    ]
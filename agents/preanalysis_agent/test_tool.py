@@ -0,0 +1,33 @@
+# agents/preanalysis_agent/test_tool.py
+import json
+from agents.preanalysis_agent.tool import PreanalysisAgentTool
+from __init__ import llm_client
+
+
+def test_preanalysis_short():
+    tool = PreanalysisAgentTool(llm_client)
+
+    text = (
+        "牛頓第二定律表明，施加於物體的外力等於此物體動量的時變率：F = dp/dt。"
+        "其中 p 是動量，t 是時間"
+    )
+
+    p = tool.get_protagonist(text)
+    a = tool.get_focus_aspects(text, p["protagonist"])
+
+    final_obj = {
+        "protagonist": p["protagonist"],
+        "focus_aspects": a["focus_aspects"],
+    }
+
+    print("\n=== final_obj ===")
+    print(json.dumps(final_obj, ensure_ascii=False, indent=2))
+
+    assert isinstance(final_obj["protagonist"], str) and final_obj["protagonist"].strip()
+    assert isinstance(final_obj["focus_aspects"], list) and len(final_obj["focus_aspects"]) >= 1
+
+    print("\nTest passed!")
+
+
+if __name__ == "__main__":
+    test_preanalysis_short()
@@ -0,0 +1,53 @@
+# agents/preanalysis_agent/tool.py
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.base_tool import BaseTool, auto_wrap_error
+from agents.keypoint_agents.tool import KeypointAgentTool
+from agents.synthesis_agents.tool import SynthesisAgentTool
+
+# Branch whose prompts are used when neither a preset nor a speculated task type is known
+DEFAULT_TASK_TYPE = "KEYPOINT"
+
+
+class PreanalysisAgentTool(BaseTool):
+    """
+    Protagonist and focus aspects before the task type is known.
+
+    The requests are those of the branch expected to run (task_type: preset
+    by the caller, else the speculator's prediction, else DEFAULT_TASK_TYPE),
+    with that branch's prompt rules and config.json (micro_batch, profiles,
+    cascade), so they share the system prompt + document prefix with the
+    final step. TopController does not hand them to the other branch.
+    """
+
+    def __init__(self, client: LLMClient):
+        super().__init__()
+        self.client = client
+        self.requests = {
+            "KEYPOINT": KeypointAgentTool(client),
+            "SYNTHESIS": SynthesisAgentTool(client),
+        }
+
+    def _builder(self, task_type: str):
+        return self.requests.get(task_type) or self.requests[DEFAULT_TASK_TYPE]
+
+    @auto_wrap_error
+    def get_protagonist(self, text: str, task_type: str = DEFAULT_TASK_TYPE) -> dict:
+        text = (text or "").strip()
+        if not text:
+            return {"protagonist": "Unknown"}
+        return self.client.invoke_json(*self._builder(task_type).protagonist_request(text))
+
+    @auto_wrap_error
+    async def aget_protagonist(self, text: str, task_type: str = DEFAULT_TASK_TYPE) -> dict:
+        text = (text or "").strip()
+        if not text:
+            return {"protagonist": "Unknown"}
+        return await self.client.ainvoke_json(*self._builder(task_type).protagonist_request(text))
+
+    @auto_wrap_error
+    def get_focus_aspects(self, text: str, protagonist: str, task_type: str = DEFAULT_TASK_TYPE) -> dict:
+        return self.client.invoke_json(*self._builder(task_type).focus_aspects_request(text, protagonist))
+
+    @auto_wrap_error
+    async def aget_focus_aspects(self, text: str, protagonist: str, task_type: str = DEFAULT_TASK_TYPE) -> dict:
+        return await self.client.ainvoke_json(*self._builder(task_type).focus_aspects_request(text, protagonist))
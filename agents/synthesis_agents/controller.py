@@ -26,17 +26,45 @@ class SynthesisAgent(BaseGraph):
         # --- load tools ---
         self.tools = SynthesisAgentTool(llm_client)
     
+    # identify_protagonist / infer_focus_aspects keep values prefilled by
+    # TopController's shared pre-analysis stage and only call the LLM without them
     def identify_protagonist(self, state: dict) -> dict:
+        if state.get("protagonist"):
+            return self.protagonist_update({"protagonist": state["protagonist"]})
         out = self.tools.get_protagonist(state.get("input_text"))
+        return self.protagonist_update(out)
+
+    async def aidentify_protagonist(self, state: dict) -> dict:
+        if state.get("protagonist"):
+            return self.protagonist_update({"protagonist": state["protagonist"]})
+        out = await self.tools.aget_protagonist(state.get("input_text"))
+        return self.protagonist_update(out)
+
+    def protagonist_update(self, out: dict) -> dict:
+        """State update for a protagonist answer (also used by batch_runner.py)."""
         protagonist = (out.get("protagonist") or "Unknown").strip() or "Unknown"
         return {"protagonist": protagonist}
     
     def infer_focus_aspects(self, state: dict) -> dict:
+        if state.get("focus_aspects"):
+            return self.focus_aspects_update({"focus_aspects": state["focus_aspects"]})
         out = self.tools.get_focus_aspects(
             state.get("input_text"),
             state.get("protagonist", "Unknown")
         )
+        return self.focus_aspects_update(out)
+
+    async def ainfer_focus_aspects(self, state: dict) -> dict:
+        if state.get("focus_aspects"):
+            return self.focus_aspects_update({"focus_aspects": state["focus_aspects"]})
+        out = await self.tools.aget_focus_aspects(
+            state.get("input_text"),
+            state.get("protagonist", "Unknown")
+        )
+        return self.focus_aspects_update(out)
 
+    def focus_aspects_update(self, out: dict) -> dict:
+        """State update for a focus-aspects answer."""
         focus_aspects = out.get("focus_aspects")
         if not isinstance(focus_aspects, list) or len(focus_aspects) == 0:
             focus_aspects = ["Unclear"]
@@ -54,7 +82,18 @@ class SynthesisAgent(BaseGraph):
             state.get("protagonist", "Unknown"),
             state.get("focus_aspects", ["Unclear"])
         )
+        return self.synthesis_update(state, payload)
+
+    async def asynthesize_content(self, state: dict) -> dict:
+        payload = await self.tools.aget_synthesis_payload(
+            state.get("input_text"),
+            state.get("protagonist", "Unknown"),
+            state.get("focus_aspects", ["Unclear"])
+        )
+        return self.synthesis_update(state, payload)
 
+    def synthesis_update(self, state: dict, payload: dict) -> dict:
+        """State update for a synthesis payload."""
         final_obj = {
             "protagonist": state.get("protagonist", "Unknown"),
             "focus_aspects": state.get("focus_aspects", ["Unclear"]),
@@ -35,7 +35,10 @@ class SynthesisAgentSchema(BaseSchema):
     state_mapping = {
         "synthesize_content": {
             "input": {
-                "input_text": "input_text"
+                "input_text": "input_text",
+                # Filled by the shared pre-analysis stage; computed here when absent
+                "protagonist": "protagonist",
+                "focus_aspects": "focus_aspects"
             },
             "output": {
                 "synthesis_result": "final_result_text"
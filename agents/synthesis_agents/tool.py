@@ -3,6 +3,9 @@ import json
 import os
 from agents.mycore.LLMclient import LLMClient
 from agents.mycore.base_tool import BaseTool, auto_wrap_error
+from agents.mycore.json_stream import stream_json_fields, astream_json_fields
+# Shared with the other document steps, so they all hit one cached prompt prefix
+from agents.mycore.prompts import DOCUMENT_SYSTEM_PROMPT as SYSTEM_PROMPT
 
 CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
 
@@ -32,23 +35,17 @@ class SynthesisAgentTool(BaseTool):
         }
         return cfg
     
-    def _invoke_and_parse(self, user_prompt: str, system_prompt: str, cfg: dict) -> dict:
-        response = self.client.invoke(user_prompt, system_prompt, cfg)
-        raw = (response.get("content") or "").strip()
-        if not raw:
-            raise Exception("LLM returned empty content")
-        return json.loads(raw)
+    def _invoke_and_parse(self, user_prompt: str, system_prompt: str, cfg: dict, document: str = None) -> dict:
+        # Parsed and validated (empty content, schema, reject rules); escalates along cfg["cascade"]["models"]
+        return self.client.invoke_json(user_prompt, system_prompt, cfg, document)
 
-    @auto_wrap_error
-    def get_protagonist(self, text: str) -> dict:
-        text = (text or "").strip()
-        if not text:
-            return {"protagonist": "Unknown"}
+    async def _ainvoke_and_parse(self, user_prompt: str, system_prompt: str, cfg: dict, document: str = None) -> dict:
+        return await self.client.ainvoke_json(user_prompt, system_prompt, cfg, document)
 
-        system_prompt = (
+    def protagonist_request(self, text: str) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the protagonist step."""
+        user_prompt = (
             "You identify the MAIN SUBJECT (the 'protagonist') of the input.\n"
-            "Return ONLY one JSON object using ONLY double quotes.\n"
-            "No extra text.\n"
             "Output format:\n"
             "{\"protagonist\":\"...\"}\n"
             "Rules:\n"
@@ -57,8 +54,6 @@ class SynthesisAgentTool(BaseTool):
             "- Keep it short.\n"
         )
 
-        user_prompt = "Input:\n\n" + text
-
         schema = {
             "type": "object",
             "properties": {
@@ -70,17 +65,29 @@ class SynthesisAgentTool(BaseTool):
 
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, "synth_protagonist_only", schema)
-        return self._invoke_and_parse(user_prompt, system_prompt, cfg)
-    
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
+
     @auto_wrap_error
-    def get_focus_aspects(self, text: str, protagonist: str) -> dict:
+    def get_protagonist(self, text: str) -> dict:
+        text = (text or "").strip()
+        if not text:
+            return {"protagonist": "Unknown"}
+        return self._invoke_and_parse(*self.protagonist_request(text))
+
+    @auto_wrap_error
+    async def aget_protagonist(self, text: str) -> dict:
+        text = (text or "").strip()
+        if not text:
+            return {"protagonist": "Unknown"}
+        return await self._ainvoke_and_parse(*self.protagonist_request(text))
+    
+    def focus_aspects_request(self, text: str, protagonist: str) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the focus-aspects step."""
         text = (text or "").strip()
         protagonist = (protagonist or "").strip() or "Unknown"
 
-        system_prompt = (
+        user_prompt = (
             "You infer what the reader should focus on.\n"
-            "Return ONLY one JSON object using ONLY double quotes.\n"
-            "No extra text.\n"
             "Output format:\n"
             "{\"focus_aspects\":[\"...\"]}\n"
             "\n"
@@ -100,11 +107,8 @@ class SynthesisAgentTool(BaseTool):
             "- Event: who, what happened, where/when, outcome, key actions/evidence.\n"
             "- Lecture/concept: definition, notation, interpretation, assumptions, application.\n"
             "- Literature: theme, tone, imagery/symbols, character intent, implied meaning.\n"
-        )
-
-        user_prompt = (
+            "\n"
             f"Protagonist: {protagonist}\n"
-            "Input:\n\n" + text
         )
 
         schema = {
@@ -123,15 +127,23 @@ class SynthesisAgentTool(BaseTool):
 
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, "synth_focus_aspects_only", schema)
-        return self._invoke_and_parse(user_prompt, system_prompt, cfg)
-    
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
+
     @auto_wrap_error
-    def get_synthesis_payload(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+    def get_focus_aspects(self, text: str, protagonist: str) -> dict:
+        return self._invoke_and_parse(*self.focus_aspects_request(text, protagonist))
+
+    @auto_wrap_error
+    async def aget_focus_aspects(self, text: str, protagonist: str) -> dict:
+        return await self._ainvoke_and_parse(*self.focus_aspects_request(text, protagonist))
+    
+    def synthesis_payload_request(self, text: str, protagonist: str, focus_aspects: list) -> tuple:
+        """(user_prompt, system_prompt, cfg, document) of the synthesis step."""
         text = (text or "").strip()
         protagonist = (protagonist or "").strip() or "Unknown"
         focus_aspects = focus_aspects or ["Unclear"]
 
-        system_prompt = (
+        user_prompt = (
             "You are a synthesis assistant.\n"
             "SYNTHESIS means: reduce understanding burden by explaining meaning and how to use the idea.\n"
             "\n"
@@ -157,15 +169,12 @@ class SynthesisAgentTool(BaseTool):
             "Anti-bloat constraints:\n"
             "- added_context: only include items that directly help understanding the main point.\n"
             "- examples: keep at most 1–2 short examples; only if it clarifies usage.\n"
-        )
-
-
-        user_prompt = (
+            "\n"
+            "Task: Provide a concise synthesis that reduces understanding burden. "
+            "Add only necessary context and minimal examples if they help.\n"
+            "\n"
             f"Protagonist: {protagonist}\n"
             f"Focus aspects: {focus_aspects}\n"
-            "Task: Provide a concise synthesis that reduces understanding burden. "
-            "Add only necessary context and minimal examples if they help.\n\n"
-            "Input:\n\n" + text
         )
 
         schema = {
@@ -197,14 +206,28 @@ class SynthesisAgentTool(BaseTool):
 
         base_cfg = self._readjson(CONFIG_PATH)
         cfg = self._with_schema(base_cfg, "synth_payload_only", schema)
-        return self._invoke_and_parse(user_prompt, system_prompt, cfg)
+        return user_prompt, SYSTEM_PROMPT, cfg, "Input:\n\n" + text
+
+    @auto_wrap_error
+    def get_synthesis_payload(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+        return self._invoke_and_parse(*self.synthesis_payload_request(text, protagonist, focus_aspects))
 
-        current_config = self._readjson(CONFIG_PATH)
-        response = self.client.invoke(user_prompt, system_prompt, current_config)
+    @auto_wrap_error
+    async def aget_synthesis_payload(self, text: str, protagonist: str, focus_aspects: list) -> dict:
+        return await self._ainvoke_and_parse(*self.synthesis_payload_request(text, protagonist, focus_aspects))
 
-        raw = response.get("content", None)
-        raw = "" if raw is None else str(raw).strip()
-        if not raw:
-            raise Exception("LLM returned empty content")
+    @auto_wrap_error
+    def stream_synthesis_payload(self, text: str, protagonist: str, focus_aspects: list):
+        """
+        Streaming get_synthesis_payload(): yields each field (synthesis,
+        takeaways[i], ...) as soon as it closes, then a "final" event with the
+        full payload and time_to_first_field. See stream_json_fields.
+        """
+        request = self.synthesis_payload_request(text, protagonist, focus_aspects)
+        yield from stream_json_fields(self.client.invoke_stream(*request))
 
-        return json.loads(raw)
+    @auto_wrap_error
+    async def astream_synthesis_payload(self, text: str, protagonist: str, focus_aspects: list):
+        request = self.synthesis_payload_request(text, protagonist, focus_aspects)
+        async for event in astream_json_fields(self.client.ainvoke_stream(*request)):
+            yield event
@@ -1,22 +1,33 @@
 # agents/top_controller/controller.py
+from typing import Optional
 from agents.mycore.base_graph import BaseGraph
 from agents.mycore.LLMclient import LLMClient
+from agents.mycore.speculation import Speculator
+from agents.preanalysis_agent.tool import DEFAULT_TASK_TYPE as DEFAULT_PREANALYSIS_TASK_TYPE
 from .schema import TopControllerSchema
 
 
 # dependent controller
 from agents.intent_agent.controller import IntentAgent
+from agents.preanalysis_agent.controller import PreanalysisAgent
 from agents.keypoint_agents.controller import KeypointAgent
 from agents.synthesis_agents.controller import SynthesisAgent
 # dependent schema
 from agents.intent_agent.schema import IntentAgentSchema
+from agents.preanalysis_agent.schema import PreanalysisAgentSchema
 from agents.keypoint_agents.schema import KeypointAgentSchema
 from agents.synthesis_agents.schema import SynthesisAgentSchema
 
 class TopController(BaseGraph):
     """Top-level orchestrator graph that coordinates subgraphs."""
 
-    def __init__(self,llm_client:LLMClient):
+    # selected_task_type -> (subgraph, scenario) of the branch
+    TASK_AGENTS = {
+        "KEYPOINT": ("keypoint_agent", "extract_keypoints"),
+        "SYNTHESIS": ("synthesis_agent", "synthesize_content"),
+    }
+
+    def __init__(self,llm_client:LLMClient, speculator: Optional[Speculator] = None):
         super().__init__(TopControllerSchema.state_type)
 
         # --- import schema definitions ---
@@ -26,6 +37,8 @@ class TopController(BaseGraph):
 
         self.subgraphs         = {}
         self.subgraph_mappings = {}
+        # Optional: start the predicted branch before the intent is known
+        self.speculator        = speculator
 
         # --- load dependent graphs and schemas ---
         DEPENDENT_GRAPHS_AND_SCHEMA = {
@@ -33,6 +46,10 @@ class TopController(BaseGraph):
                 "controller": IntentAgent,
                 "schema": IntentAgentSchema
             },
+            "preanalysis_agent": {
+                "controller": PreanalysisAgent,
+                "schema": PreanalysisAgentSchema
+            },
             "keypoint_agent": {
                 "controller": KeypointAgent,
                 "schema": KeypointAgentSchema
@@ -48,6 +65,20 @@ class TopController(BaseGraph):
             self.subgraphs[k] = subgraph_instance.compile()
             self.subgraph_mappings[k] = v["schema"].state_mapping
 
+    def prepare_request(self, state: dict) -> dict:
+        """
+        Create the request's speculation handle, shared by the intent and
+        pre-analysis nodes, and pick the branch whose prompts the pre-analysis uses.
+        """
+        # Nothing to speculate on when the caller preset the task type
+        if state.get("selected_task_type") in self.TASK_AGENTS:
+            return {"preanalysis_task_type": state["selected_task_type"]}
+        if self.speculator is None:
+            return {"preanalysis_task_type": DEFAULT_PREANALYSIS_TASK_TYPE}
+        speculation = self.speculator.begin()
+        predicted = speculation.predicted if speculation.predicted in self.TASK_AGENTS else DEFAULT_PREANALYSIS_TASK_TYPE
+        return {"speculation": speculation, "preanalysis_task_type": predicted}
+
     def call_intent_agent(self, state: dict) -> dict:
         """Invoke intent agent graph with automatic state mapping."""
         
@@ -69,9 +100,33 @@ class TopController(BaseGraph):
         # Step 4: Map output: subgraph state -> parent state
         parent_update = self._map_output_state(result_state, mapping["output"])
         
+        return self._resolve_speculation(state, parent_update)
+    def call_preanalysis_agent(self, state: dict) -> dict:
+        """Invoke the shared pre-analysis graph (runs in parallel with call_intent_agent)."""
+        scenario = "analyze_document"
+
+        graphmapping = self.subgraph_mappings["preanalysis_agent"]
+        mapping = graphmapping.get(scenario)
+
+        if not mapping:
+            raise ValueError(f"Scenario '{scenario}' not found in preanalysis_agent state_mapping")
+
+        subgraph_input = self._map_input_state(state, mapping["input"])
+
+        result_state = self.subgraphs["preanalysis_agent"].invoke(subgraph_input)
+
+        parent_update = self._map_output_state(result_state, mapping["output"])
+
+        speculation = self._speculation_target(state)
+        if speculation is not None:
+            speculation.start(lambda: self._call_subgraph(*self.TASK_AGENTS[speculation.predicted], {**state, **parent_update}))
         return parent_update
     def call_keypoint_agent(self, state: dict) -> dict:
         """Invoke keypoint agent graph with automatic state mapping."""
+        speculative = self._take_speculation(state, "KEYPOINT")
+        if speculative is not None:
+            return self._task_update(state, speculative)
+
         scenario = "extract_keypoints"
 
         graphmapping = self.subgraph_mappings["keypoint_agent"]
@@ -80,15 +135,19 @@ class TopController(BaseGraph):
         if not mapping:
             raise ValueError(f"Scenario '{scenario}' not found in keypoint_agent state_mapping")
 
-        subgraph_input = self._map_input_state(state, mapping["input"])
+        subgraph_input = self._map_input_state(self._branch_state(state, "KEYPOINT"), mapping["input"])
         
         result_state = self.subgraphs["keypoint_agent"].invoke(subgraph_input)
 
         parent_update = self._map_output_state(result_state, mapping["output"])
         
-        return parent_update
+        return self._task_update(state, parent_update)
     def call_synthesis_agent(self, state: dict) -> dict:
         """Invoke synthesis agent graph with automatic state mapping."""
+        speculative = self._take_speculation(state, "SYNTHESIS")
+        if speculative is not None:
+            return self._task_update(state, speculative)
+
         scenario = "synthesize_content"
 
         graphmapping = self.subgraph_mappings["synthesis_agent"]
@@ -97,13 +156,107 @@ class TopController(BaseGraph):
         if not mapping:
             raise ValueError(f"Scenario '{scenario}' not found in synthesis_agent state_mapping")
 
-        subgraph_input = self._map_input_state(state, mapping["input"])
+        subgraph_input = self._map_input_state(self._branch_state(state, "SYNTHESIS"), mapping["input"])
         
         result_state = self.subgraphs["synthesis_agent"].invoke(subgraph_input)
 
         parent_update = self._map_output_state(result_state, mapping["output"])
         
+        return self._task_update(state, parent_update)
+
+    def _branch_state(self, state: dict, task_type: str) -> dict:
+        """
+        State handed to a branch. A pre-analysis asked with the other branch's
+        prompts is dropped, so the branch computes protagonist and focus
+        aspects with its own rules.
+        """
+        if state.get("preanalysis_task_type") in (None, task_type):
+            return state
+        return {k: v for k, v in state.items() if k not in ("protagonist", "focus_aspects")}
+
+    def _call_subgraph(self, graph_key: str, scenario: str, state: dict) -> dict:
+        """Invoke a subgraph with its state mapping (used by the speculative branch)."""
+        mapping = self.subgraph_mappings[graph_key].get(scenario)
+
+        if not mapping:
+            raise ValueError(f"Scenario '{scenario}' not found in {graph_key} state_mapping")
+
+        subgraph_input = self._map_input_state(state, mapping["input"])
+
+        result_state = self.subgraphs[graph_key].invoke(subgraph_input)
+
+        return self._map_output_state(result_state, mapping["output"])
+
+    # =========================================================
+    # Speculation (see agents/mycore/speculation.py)
+    # =========================================================
+    def _speculation_target(self, state: dict):
+        """The request's speculation handle if its predicted branch is known."""
+        speculation = state.get("speculation")
+        if speculation is None or speculation.predicted not in self.TASK_AGENTS:
+            return None
+        return speculation
+
+    def _resolve_speculation(self, state: dict, parent_update: dict) -> dict:
+        speculation = state.get("speculation")
+        if speculation is not None:
+            speculation.resolve(parent_update.get("selected_task_type"))
+        return parent_update
+
+    def _take_speculation(self, state: dict, task_type: str) -> Optional[dict]:
+        speculation = state.get("speculation")
+        return speculation.take(task_type) if speculation is not None else None
+
+    async def _atake_speculation(self, state: dict, task_type: str) -> Optional[dict]:
+        speculation = state.get("speculation")
+        return await speculation.atake(task_type) if speculation is not None else None
+
+    def _task_update(self, state: dict, parent_update: dict) -> dict:
+        # Drop the handle so the final state stays serializable
+        if state.get("speculation") is not None:
+            return {**parent_update, "speculation": None}
         return parent_update
+
+    # =========================================================
+    # Async twins (used by graph.ainvoke)
+    # =========================================================
+    async def _acall_subgraph(self, graph_key: str, scenario: str, state: dict) -> dict:
+        """Await a subgraph through ainvoke with the same state mapping as the sync nodes."""
+        graphmapping = self.subgraph_mappings[graph_key]
+        mapping = graphmapping.get(scenario)
+
+        if not mapping:
+            raise ValueError(f"Scenario '{scenario}' not found in {graph_key} state_mapping")
+
+        subgraph_input = self._map_input_state(state, mapping["input"])
+
+        result_state = await self.subgraphs[graph_key].ainvoke(subgraph_input)
+
+        return self._map_output_state(result_state, mapping["output"])
+
+    async def acall_intent_agent(self, state: dict) -> dict:
+        parent_update = await self._acall_subgraph("intent_agent", "check_input_intent", state)
+        return self._resolve_speculation(state, parent_update)
+
+    async def acall_preanalysis_agent(self, state: dict) -> dict:
+        parent_update = await self._acall_subgraph("preanalysis_agent", "analyze_document", state)
+        speculation = self._speculation_target(state)
+        if speculation is not None:
+            speculation.astart(lambda: self._acall_subgraph(*self.TASK_AGENTS[speculation.predicted], {**state, **parent_update}))
+        return parent_update
+
+    async def _acall_task_agent(self, task_type: str, state: dict) -> dict:
+        parent_update = await self._atake_speculation(state, task_type)
+        if parent_update is None:
+            parent_update = await self._acall_subgraph(*self.TASK_AGENTS[task_type], self._branch_state(state, task_type))
+        return self._task_update(state, parent_update)
+
+    async def acall_keypoint_agent(self, state: dict) -> dict:
+        return await self._acall_task_agent("KEYPOINT", state)
+
+    async def acall_synthesis_agent(self, state: dict) -> dict:
+        return await self._acall_task_agent("SYNTHESIS", state)
+
     def compile(self):
         """Compile the TopController graph using BaseGraph logic."""
         return super().compile()
\ No newline at end of file
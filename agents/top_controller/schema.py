@@ -1,5 +1,5 @@
 # agents/top_controller/schema.py
-from typing import TypedDict
+from typing import TypedDict, List, Any, Optional
 from agents.mycore.base_schema import BaseSchema
 from agents.mycore.common import END
 # ========================================================
@@ -7,7 +7,12 @@ from agents.mycore.common import END
 # ========================================================
 class TopControllerState(TypedDict):
     input_text           : str
-    selected_task_type   : str
+    input_pages          : Optional[int] # Page count of an uploaded file, for the intent excerpt
+    selected_task_type   : str       # Empty: classified by the intent agent; preset by the caller otherwise
+    preanalysis_task_type: str       # Branch whose prompts the pre-analysis used (preset, speculated or default)
+    protagonist          : str       # Shared pre-analysis, computed alongside the intent
+    focus_aspects        : List[str] # Same
+    speculation          : Any       # Speculation handle of the request (None when speculation is off)
     final_result_text    : str # Final processed result from keypoint or synthesis agent
 
 # ========================================================
@@ -16,9 +21,18 @@ class TopControllerState(TypedDict):
 def passthrough(state: TopControllerState) -> dict:
     return state
 
+def prepare_request(state: TopControllerState) -> dict:
+    """Entry node: per-request setup shared by the parallel nodes below (Implement in controller)"""
+    return {}
 def call_intent_agent(state: TopControllerState) -> dict:
     """Placeholder node for invoking subgraph at runtime.(Implement in controller)"""
     return state
+def call_preanalysis_agent(state: TopControllerState) -> dict:
+    """Placeholder node for invoking subgraph at runtime.(Implement in controller)"""
+    return state
+def dispatch_task_agent(state: TopControllerState) -> dict:
+    """Join point: waits for both intent and pre-analysis before routing."""
+    return {}
 def call_keypoint_agent(state: TopControllerState) -> dict:
     """Placeholder node for invoking subgraph at runtime.(Implement in controller)"""
     return state
@@ -28,6 +42,21 @@ def call_synthesis_agent(state: TopControllerState) -> dict:
 # ========================================================
 # Edge definition
 # ========================================================
+TASK_TYPES = ("KEYPOINT", "SYNTHESIS")
+
+def is_preset(state: TopControllerState) -> bool:
+    """The caller chose the task type (e.g. LINE "/重點"), so the intent agent is skipped."""
+    return state.get("selected_task_type") in TASK_TYPES
+
+def route_from_entry(state: TopControllerState) -> list:
+    if is_preset(state):
+        return ["call_preanalysis_agent"]
+    return ["call_intent_agent", "call_preanalysis_agent"]
+
+def route_after_preanalysis(state: TopControllerState) -> list:
+    # Without a preset, the join below waits for the intent as well
+    return ["dispatch_task_agent"] if is_preset(state) else []
+
 def route_to_task_agent(state: TopControllerState) -> str:
     return state.get("selected_task_type")
 
@@ -54,14 +83,20 @@ class TopControllerSchema(BaseSchema):
     state_type = TopControllerState
 
     nodes = [
+        ("prepare_request", prepare_request),
         ("call_intent_agent", call_intent_agent),
+        ("call_preanalysis_agent", call_preanalysis_agent),
+        ("dispatch_task_agent", dispatch_task_agent),
         ("call_keypoint_agent", call_keypoint_agent),
         ("call_synthesis_agent", call_synthesis_agent),
     ]
 
     conditional_edges = [
+        # A preset task type skips call_intent_agent (one LLM call less)
+        ("prepare_request", route_from_entry, ["call_intent_agent", "call_preanalysis_agent"]),
+        ("call_preanalysis_agent", route_after_preanalysis, ["dispatch_task_agent"]),
         (
-            "call_intent_agent",
+            "dispatch_task_agent",
             route_to_task_agent,
             {
                 "KEYPOINT": "call_keypoint_agent",  # Placeholder,should replace corespond Agent
@@ -70,7 +105,9 @@ class TopControllerSchema(BaseSchema):
         ),
     ]
 
+    # Intent classification and pre-analysis start together (fan-out from prepare_request)
     direct_edges = [
+        (["call_intent_agent", "call_preanalysis_agent"], "dispatch_task_agent"),
         ("call_keypoint_agent", END),
         ("call_synthesis_agent", END),
     ]
\ No newline at end of file
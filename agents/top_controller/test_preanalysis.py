@@ -0,0 +1,88 @@
+# agents/top_controller/test_preanalysis.py
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.top_controller.controller import TopController
+
+DELAY = 0.2
+
+
+class _SlowModel:
+    """Answers every step after DELAY seconds and records the step names in call order."""
+
+    ANSWERS = {
+        "classification_result": '{"task_type": "KEYPOINT"}',
+        "protagonist_only": '{"protagonist": "鄭姓男子"}',
+        "focus_aspects_only": '{"focus_aspects": ["酒駕", "羈押"]}',
+        "keypoints_only": '{"keypoints": ["鄭男酒駕撞死隨車人員，遭聲押獲准。"]}',
+        "synth_protagonist_only": '{"protagonist": "酒駕致死案"}',
+        "synth_focus_aspects_only": '{"focus_aspects": ["刑責", "羈押要件"]}',
+        "synth_payload_only": '{"synthesis": "酒駕致死可能構成不能安全駕駛致死罪。", "added_context": [], "examples": [], "takeaways": ["羈押"]}',
+    }
+
+    def __init__(self, task_type: str = "KEYPOINT"):
+        self.answers = {**self.ANSWERS, "classification_result": '{"task_type": "%s"}' % task_type}
+        self.steps = []
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def create(self, **request):
+        name = request["response_format"]["json_schema"]["name"]
+        with self._lock:
+            self.steps.append(name)
+            self.requests[name] = request
+        time.sleep(DELAY)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.answers[name]), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+
+def _graph(model: _SlowModel):
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=model))
+    return TopController(client).compile()
+
+
+def test_preanalysis_runs_alongside_intent():
+    model = _SlowModel()
+    graph = _graph(model)
+
+    started = time.monotonic()
+    out = graph.invoke({"input_text": "鄭姓男子酒駕撞死垃圾車隨車人員，檢方聲押獲准。", "selected_task_type": ""})
+    elapsed = time.monotonic() - started
+
+    # The keypoint agent reuses the shared results instead of asking again
+    assert sorted(model.steps) == ["classification_result", "focus_aspects_only", "keypoints_only", "protagonist_only"], model.steps
+    assert model.steps[-1] == "keypoints_only"
+    assert "鄭姓男子" in json.dumps(model.requests["keypoints_only"]["messages"], ensure_ascii=False)
+
+    # intent || (protagonist -> focus aspects), then keypoints: 3 round trips instead of 4
+    assert elapsed < 3.7 * DELAY, elapsed
+    result = json.loads(out["final_result_text"])
+    assert result["protagonist"] == "鄭姓男子" and result["focus_aspects"] == ["酒駕", "羈押"]
+    print("Test passed!")
+
+
+def test_synthesis_keeps_its_own_prompts():
+    # Preset: the pre-analysis uses the synthesis prompts and the branch reuses it
+    model = _SlowModel()
+    out = _graph(model).invoke({"input_text": "鄭姓男子酒駕撞死垃圾車隨車人員，檢方聲押獲准。", "selected_task_type": "SYNTHESIS"})
+    assert sorted(model.steps) == ["synth_focus_aspects_only", "synth_payload_only", "synth_protagonist_only"], model.steps
+    assert json.loads(out["final_result_text"])["focus_aspects"] == ["刑責", "羈押要件"]
+
+    # Classified as SYNTHESIS after a keypoint-prompted pre-analysis: the branch asks with its own rules
+    model = _SlowModel("SYNTHESIS")
+    out = _graph(model).invoke({"input_text": "鄭姓男子酒駕撞死垃圾車隨車人員，檢方聲押獲准。", "selected_task_type": ""})
+    assert model.steps.count("synth_protagonist_only") == 1 and model.steps.count("synth_focus_aspects_only") == 1
+    result = json.loads(out["final_result_text"])
+    assert result["protagonist"] == "酒駕致死案" and result["focus_aspects"] == ["刑責", "羈押要件"]
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_preanalysis_runs_alongside_intent()
+    test_synthesis_keeps_its_own_prompts()
@@ -0,0 +1,111 @@
+# agents/top_controller/test_preset_task_type.py
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.speculation import Speculator
+from agents.top_controller.controller import TopController
+from api import UnifyAPI
+from line_bot.modes import ModePreferences, parse_command
+
+TEXT = "鄭姓男子酒駕撞死垃圾車隨車人員，檢方聲押獲准。"
+
+
+class _Model:
+    """Answers every step and records the step names."""
+
+    ANSWERS = {
+        "classification_result": '{"task_type": "KEYPOINT"}',
+        "protagonist_only": '{"protagonist": "鄭姓男子"}',
+        "focus_aspects_only": '{"focus_aspects": ["酒駕", "羈押"]}',
+        "synth_protagonist_only": '{"protagonist": "鄭姓男子"}',
+        "synth_focus_aspects_only": '{"focus_aspects": ["酒駕", "羈押"]}',
+        "keypoints_only": '{"keypoints": ["鄭男酒駕撞死隨車人員，遭聲押獲准。"]}',
+    }
+
+    def __init__(self):
+        self.steps = []
+        self._lock = threading.Lock()
+
+    def _reply(self, request):
+        name = request["response_format"]["json_schema"]["name"]
+        with self._lock:
+            self.steps.append(name)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.ANSWERS[name]), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20),
+        )
+
+    def create(self, **request):
+        return self._reply(request)
+
+    async def acreate(self, **request):
+        return self._reply(request)
+
+
+def _client(model: _Model) -> LLMClient:
+    client = LLMClient("test-key", {"model": "gpt-5-nano"}, synthetic=True)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=model))
+    client.async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=model.acreate)))
+    return client
+
+
+def test_preset_task_type_skips_the_intent_agent():
+    model = _Model()
+    speculator = Speculator(prior="SYNTHESIS")
+    graph = TopController(_client(model), speculator=speculator).compile()
+
+    out = graph.invoke({"input_text": TEXT, "selected_task_type": "KEYPOINT"})
+    assert "classification_result" not in model.steps
+    assert sorted(model.steps) == ["focus_aspects_only", "keypoints_only", "protagonist_only"]
+    assert out["selected_task_type"] == "KEYPOINT"
+    assert json.loads(out["final_result_text"])["protagonist"] == "鄭姓男子"
+
+    model.steps.clear()
+    out = asyncio.run(graph.ainvoke({"input_text": TEXT + "（非同步）", "selected_task_type": "KEYPOINT"}))
+    assert "classification_result" not in model.steps and "keypoints" in json.loads(out["final_result_text"])
+
+    # Nothing to speculate on; an empty task type still goes through the classifier
+    assert speculator.stats()["requests"] == 0
+    model.steps.clear()
+    graph.invoke({"input_text": TEXT + "（自動）", "selected_task_type": ""})
+    assert "classification_result" in model.steps
+    print("Test passed!")
+
+
+def test_process_takes_the_users_mode():
+    assert parse_command("/重點 " + TEXT) == ("/重點", "KEYPOINT", TEXT)
+    assert parse_command("/解析") == ("/解析", "SYNTHESIS", "")
+    assert parse_command("/自動") == ("/自動", None, "")
+    assert parse_command("/重點看看") == (None, None, "/重點看看")
+
+    class _RedisDown:
+        def __getattr__(self, name):
+            def fail(*args):
+                raise ConnectionError("redis down")
+            return fail
+
+    # A Redis outage turns into a reply, not an error inside the webhook handler
+    preferences = ModePreferences(_RedisDown())
+    assert preferences.set("U1", "KEYPOINT") is False and preferences.set("U1", None) is False
+    assert preferences.get("U1") is None
+
+    model = _Model()
+    api = UnifyAPI(_client(model))
+    result = api.process(TEXT, task_type=parse_command("/重點 " + TEXT)[1])
+    assert result["success"] and result["data"]["selected_task_type"] == "KEYPOINT"
+    assert "classification_result" not in model.steps
+
+    result = asyncio.run(api.aprocess(TEXT + "（非同步）", task_type="KEYPOINT"))
+    assert result["success"] and "classification_result" not in model.steps
+
+    result = api.process(TEXT, task_type="SUMMARY")
+    assert not result["success"] and "unknown task_type" in result["error"]
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_preset_task_type_skips_the_intent_agent()
+    test_process_takes_the_users_mode()
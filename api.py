@@ -2,28 +2,119 @@
 from agents.top_controller.controller import TopController
 from agents.mycore.LLMclient import LLMClient
 from agents.mycore.error_formatter import format_error_path
+from agents.mycore.near_duplicate import NearDuplicateIndex
+from agents.mycore.speculation import Speculator
+from agents.mycore.ledger import ledger_tags
+from typing import Optional
+import uuid
 class UnifyAPI:
-    def __init__(self,llm_client:LLMClient):
-        self.top_graph = TopController(llm_client)
+    def __init__(self,llm_client:LLMClient, dedup_index: Optional[NearDuplicateIndex] = None, speculator: Optional[Speculator] = None):
+        self.top_graph = TopController(llm_client, speculator=speculator)
         self.runnable = self.top_graph.compile()
+        # Optional: reuse results of near-duplicate documents processed earlier
+        self.dedup_index = dedup_index
+
+    def _initial_state(self, input_text: str, task_type: Optional[str], pages: Optional[int] = None) -> dict:
+        """Graph input; a preset task_type skips intent classification."""
+        if task_type and task_type not in TopController.TASK_AGENTS:
+            raise ValueError(f"[UnifyAPI.process] unknown task_type {task_type!r}, expected one of {list(TopController.TASK_AGENTS)}")
+        state = {
+            "input_text"           : input_text,
+            "selected_task_type"   : task_type or "",
+        }
+        if pages:
+            state["input_pages"] = pages
+        return state
+
+    def _reuse_near_duplicate(self, input_text: str, task_type: Optional[str] = None) -> Optional[dict]:
+        """Return a stored result for a near-duplicate input, adapted to the new input."""
+        if self.dedup_index is None:
+            return None
+        match = self.dedup_index.lookup(input_text)
+        if match is None:
+            return None
+        if task_type and match["result"].get("selected_task_type") != task_type:
+            # Stored for the other mode than the one asked for
+            return None
+        return {**match["result"], "input_text": input_text}
+
+    def _remember(self, input_text: str, result: dict) -> None:
+        if self.dedup_index is not None:
+            # The input itself is not stored; it is replaced on reuse
+            stored = {k: v for k, v in result.items() if k != "input_text"}
+            self.dedup_index.add(input_text, stored)
         
-    def process(self, input_text: str) -> dict:
+    def process(self, input_text: str, user_id: Optional[str] = None, request_id: Optional[str] = None, task_type: Optional[str] = None, pages: Optional[int] = None) -> dict:
         """
         input and return result
         
         Args:
             input_text: target context 
+            user_id: caller (e.g. LINE user ID), tags LLM calls in the token ledger
+            request_id: tags LLM calls in the token ledger (random if omitted)
+            task_type: "KEYPOINT" or "SYNTHESIS" to skip intent classification (classified if omitted)
+            pages: page count of an uploaded file (shown to the intent classifier)
             
         Returns:
             dict: return as format {"success": bool, "data": dict, "error": str}
         """
         try:
-            state = {
-                "input_text"           : input_text,
-                "selected_task_type"   : "",
+            state = self._initial_state(input_text, task_type, pages)
+
+            reused = self._reuse_near_duplicate(input_text, task_type)
+            if reused is not None:
+                return {
+                    "success": True,
+                    "data": reused,
+                    "error": None
+                }
+            
+            with ledger_tags(user=user_id, request_id=request_id or uuid.uuid4().hex):
+                result = self.runnable.invoke(state)
+            self._remember(input_text, result)
+            return {
+                "success": True,
+                "data": result,      
+                "error": None
+            }
+            
+        except Exception as e:
+            formatted_error = format_error_path(str(e))
+            return {
+                "success": False,
+                "data": None,
+                "error": formatted_error
             }
+
+    async def aprocess(self, input_text: str, user_id: Optional[str] = None, request_id: Optional[str] = None, task_type: Optional[str] = None, pages: Optional[int] = None) -> dict:
+        """
+        Async twin of process(): runs the compiled graph through ainvoke so
+        every LLM call awaits AsyncOpenAI instead of blocking the worker.
+        
+        Args:
+            input_text: target context 
+            user_id: caller (e.g. LINE user ID), tags LLM calls in the token ledger
+            request_id: tags LLM calls in the token ledger (random if omitted)
+            task_type: "KEYPOINT" or "SYNTHESIS" to skip intent classification (classified if omitted)
+            pages: page count of an uploaded file (shown to the intent classifier)
+            
+        Returns:
+            dict: return as format {"success": bool, "data": dict, "error": str}
+        """
+        try:
+            state = self._initial_state(input_text, task_type, pages)
+
+            reused = self._reuse_near_duplicate(input_text, task_type)
+            if reused is not None:
+                return {
+                    "success": True,
+                    "data": reused,
+                    "error": None
+                }
             
-            result = self.runnable.invoke(state)
+            with ledger_tags(user=user_id, request_id=request_id or uuid.uuid4().hex):
+                result = await self.runnable.ainvoke(state)
+            self._remember(input_text, result)
             return {
                 "success": True,
                 "data": result,      
@@ -0,0 +1,464 @@
+# batch_runner.py
+"""
+Offline bulk processing through the OpenAI Batch API.
+
+Documents get the same requests as UnifyAPI.process, one stage per round:
+
+    round 1: intent                      (every document)
+    round 2: keypoint.protagonist / synthesis.protagonist
+    round 3: keypoint.focus_aspects / synthesis.focus_aspects
+    round 4: keypoint.keypoints / synthesis.payload
+
+Each round writes the stage requests as Batch API JSONL (built by the
+agents' own request builders), submits them, and joins the results back into
+the per-document state with the KeypointAgent / SynthesisAgent update logic.
+The intent is known before round 2, so protagonist and focus aspects are
+asked with the classified branch's prompts: the requests the graph's
+pre-analysis sends when its expected branch is right (a mismatch makes the
+graph re-ask them with the same branch prompts).
+Progress is checkpointed after every step, so an interrupted run picks up
+the batches already submitted and never redoes finished stages.
+
+Usage:
+    python batch_runner.py archive/ --output results.jsonl
+    python batch_runner.py docs.jsonl --output results.jsonl --submitter local --workers 8
+    python batch_runner.py docs.jsonl --output results.jsonl --retry-failed
+
+Input: a directory of .txt files (id = relative path) or a JSONL file with
+{"id": ..., "text": ...} per line (id defaults to the line number).
+Output: one {"id", "success", "data", "error"} line per document, the same
+shape as UnifyAPI.process().
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from agents.mycore.LLMclient import LLMClient
+from agents.intent_agent.tool import IntentAgentTool
+from agents.keypoint_agents.controller import KeypointAgent
+from agents.keypoint_agents.schema import KeypointAgentSchema
+from agents.synthesis_agents.controller import SynthesisAgent
+from agents.synthesis_agents.schema import SynthesisAgentSchema
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+MAX_REQUESTS_PER_FILE = 50000            # Batch API limit per input file
+MAX_BYTES_PER_FILE = 190 * 1024 * 1024   # limit is 200 MB
+MAX_ATTEMPTS_PER_STAGE = 3               # rounds a stage may come back without a result
+
+
+# =========================================================
+# Pipeline stages
+# =========================================================
+class PipelineStages:
+    """
+    Request builders and state updates for every LLM step, taken from the
+    agents themselves so batch results match what the graph would produce.
+    """
+
+    def __init__(self, llm_client: LLMClient):
+        intent = IntentAgentTool(llm_client)
+        keypoint = KeypointAgent(llm_client)
+        synthesis = SynthesisAgent(llm_client)
+        kp, syn = keypoint.tools, synthesis.tools
+
+        # stage -> (build(text, state) -> (user, system, cfg), update(state, out) -> dict)
+        self.stages = {
+            "intent": (
+                lambda text, s: intent.classify_request(text),
+                lambda s, out: {"selected_task_type": out["task_type"]},
+            ),
+            "keypoint.protagonist": (
+                lambda text, s: kp.protagonist_request(text),
+                lambda s, out: {"protagonist": out["protagonist"]},
+            ),
+            "keypoint.focus_aspects": (
+                lambda text, s: kp.focus_aspects_request(text, s.get("protagonist")),
+                lambda s, out: {"focus_aspects": out["focus_aspects"]},
+            ),
+            "keypoint.keypoints": (
+                lambda text, s: kp.keypoints_request(text, s.get("protagonist"), s.get("focus_aspects", [])),
+                keypoint.keypoints_update,
+            ),
+            "synthesis.protagonist": (
+                lambda text, s: syn.protagonist_request(text),
+                lambda s, out: synthesis.protagonist_update(out),
+            ),
+            "synthesis.focus_aspects": (
+                lambda text, s: syn.focus_aspects_request(text, s.get("protagonist", "Unknown")),
+                lambda s, out: synthesis.focus_aspects_update(out),
+            ),
+            "synthesis.payload": (
+                lambda text, s: syn.synthesis_payload_request(
+                    text, s.get("protagonist", "Unknown"), s.get("focus_aspects", ["Unclear"])
+                ),
+                synthesis.synthesis_update,
+            ),
+        }
+        self.pipelines = {
+            "KEYPOINT": ["keypoint.protagonist", "keypoint.focus_aspects", "keypoint.keypoints"],
+            "SYNTHESIS": ["synthesis.protagonist", "synthesis.focus_aspects", "synthesis.payload"],
+        }
+        # agent state -> TopController state, as in the schemas' state_mapping
+        self.result_mappings = {
+            "KEYPOINT": KeypointAgentSchema.state_mapping["extract_keypoints"]["output"],
+            "SYNTHESIS": SynthesisAgentSchema.state_mapping["synthesize_content"]["output"],
+        }
+
+    def next_stage(self, record: dict) -> Optional[str]:
+        task_type = record["state"].get("selected_task_type")
+        if not task_type:
+            return "intent"
+        if task_type not in self.pipelines:
+            raise ValueError(f"Unknown task type: {task_type}")
+        return next((s for s in self.pipelines[task_type] if s not in record["completed"]), None)
+
+    def final_data(self, record: dict) -> dict:
+        state = record["state"]
+        mapping = self.result_mappings[state["selected_task_type"]]
+        data = {"selected_task_type": state["selected_task_type"]}
+        data.update({parent_key: state[agent_key] for agent_key, parent_key in mapping.items()})
+        return data
+
+
+# =========================================================
+# Submitters
+# =========================================================
+class OpenAIBatchSubmitter:
+    """Upload a JSONL file to the Batch API and poll until the batch ends."""
+
+    def __init__(self, openai_client, poll_interval: float = 60.0, completion_window: str = "24h"):
+        self.client = openai_client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+
+    def submit(self, path: str) -> str:
+        with open(path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def wait(self, handle: str) -> List[dict]:
+        while True:
+            batch = self.client.batches.retrieve(handle)
+            if batch.status in ("completed", "failed", "expired", "cancelled"):
+                break
+            counts = batch.request_counts
+            print(f"  batch {handle}: {batch.status} ({counts.completed}/{counts.total})")
+            time.sleep(self.poll_interval)
+
+        lines = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = self.client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        return lines
+
+
+class LocalBatchSubmitter:
+    """
+    Local stand-in for the Batch API: sends each request of a batch file
+    through LLMClient's transport and scheduler, writing Batch-format output
+    lines next to the file. Finished lines survive an interruption.
+    """
+
+    def __init__(self, llm_client: LLMClient, workers: int = 8):
+        self.llm_client = llm_client
+        self.workers = workers
+
+    def submit(self, path: str) -> str:
+        # Output left over from an earlier run with the same file name is stale
+        if os.path.exists(path + ".output.jsonl"):
+            os.remove(path + ".output.jsonl")
+        return path
+
+    def _run_line(self, request_line: dict) -> dict:
+        try:
+            response = self.llm_client.submit_request(request_line["body"])
+            body = response.model_dump() if hasattr(response, "model_dump") else response
+            return {"custom_id": request_line["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+        except Exception as e:
+            return {"custom_id": request_line["custom_id"], "response": None, "error": {"message": str(e)}}
+
+    def wait(self, handle: str) -> List[dict]:
+        output_path = handle + ".output.jsonl"
+        done = _read_jsonl(output_path) if os.path.exists(output_path) else []
+        finished = {line["custom_id"] for line in done}
+        todo = [line for line in _read_jsonl(handle) if line["custom_id"] not in finished]
+
+        with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(self.workers) as pool:
+            for line in pool.map(self._run_line, todo):
+                out.write(json.dumps(line, ensure_ascii=False) + "\n")
+                out.flush()
+                done.append(line)
+        return done
+
+
+# =========================================================
+# Helpers
+# =========================================================
+def _read_jsonl(path: str) -> List[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_documents(path: str) -> Dict[str, str]:
+    """{doc_id: text} from a directory of .txt files or a JSONL file."""
+    documents = {}
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.endswith(".txt"):
+                    full = os.path.join(root, name)
+                    with open(full, "r", encoding="utf-8") as f:
+                        documents[os.path.relpath(full, path)] = f.read()
+        return documents
+
+    for i, item in enumerate(_read_jsonl(path)):
+        documents[str(item.get("id", i))] = item["text"]
+    return documents
+
+
+def parse_output_line(line: dict) -> tuple:
+    """(content, usage) of one Batch API output line; raises on errors and truncation."""
+    if line.get("error"):
+        raise Exception(line["error"].get("message") or str(line["error"]))
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    if response.get("status_code") != 200:
+        message = (body.get("error") or {}).get("message", "")
+        raise Exception(f"HTTP {response.get('status_code')}: {message}")
+    choice = body["choices"][0]
+    if choice["finish_reason"] != "stop":
+        raise Exception(f"LLM response incomplete: {choice['finish_reason']}")
+    return choice["message"]["content"], body.get("usage") or {}
+
+
+# =========================================================
+# Runner
+# =========================================================
+class BatchRunner:
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        submitter,
+        documents: Dict[str, str],
+        checkpoint_path: str,
+        work_dir: str,
+    ):
+        self.llm_client = llm_client
+        self.submitter = submitter
+        self.documents = documents
+        self.checkpoint_path = checkpoint_path
+        self.work_dir = work_dir
+        self.stages = PipelineStages(llm_client)
+        self.checkpoint = self._load_checkpoint()
+        os.makedirs(work_dir, exist_ok=True)
+
+    # --- checkpoint ---
+    def _load_checkpoint(self) -> dict:
+        checkpoint = {"round": 0, "pending": None, "docs": {}}
+        if os.path.exists(self.checkpoint_path):
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        for doc_id, text in self.documents.items():
+            if doc_id not in checkpoint["docs"]:
+                checkpoint["docs"][doc_id] = {
+                    "status": "pending" if text.strip() else "failed",
+                    "state": {}, "completed": [], "attempts": {},
+                    "error": None if text.strip() else "[BatchRunner] empty input",
+                    "tokens_in": 0, "tokens_out": 0,
+                }
+        return checkpoint
+
+    def _save(self) -> None:
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.checkpoint, f, ensure_ascii=False)
+        os.replace(tmp, self.checkpoint_path)
+
+    def retry_failed(self) -> int:
+        """Give failed documents another try from the stage that failed."""
+        count = 0
+        for doc_id, record in self.checkpoint["docs"].items():
+            if record["status"] == "failed" and self.documents.get(doc_id, "").strip():
+                record.update(status="pending", error=None, attempts={})
+                count += 1
+        self._save()
+        return count
+
+    # --- rounds ---
+    def _round_requests(self) -> List[dict]:
+        lines = []
+        for doc_id, record in self.checkpoint["docs"].items():
+            if record["status"] != "pending" or doc_id not in self.documents:
+                continue
+            try:
+                stage = self.stages.next_stage(record)
+                build, _ = self.stages.stages[stage]
+                body = self.llm_client.prepare_request(*build(self.documents[doc_id], record["state"]))
+            except Exception as e:
+                record.update(status="failed", error=f"[BatchRunner.build] {e}")
+                continue
+            lines.append({"custom_id": f"{stage}|{doc_id}", "method": "POST", "url": BATCH_ENDPOINT, "body": body})
+        return lines
+
+    def _write_batch_files(self, round_no: int, lines: List[dict]) -> List[dict]:
+        """Write one or more JSONL files (one model per file, within Batch API size limits)."""
+        by_model: Dict[str, List[str]] = {}
+        for line in lines:
+            by_model.setdefault(line["body"]["model"], []).append(json.dumps(line, ensure_ascii=False))
+
+        files = []
+        for model, encoded in by_model.items():
+            chunks, chunk, size = [], [], 0
+            for item in encoded:
+                item_size = len(item.encode("utf-8")) + 1
+                if chunk and (len(chunk) >= MAX_REQUESTS_PER_FILE or size + item_size > MAX_BYTES_PER_FILE):
+                    chunks.append(chunk)
+                    chunk, size = [], 0
+                chunk.append(item)
+                size += item_size
+            if chunk:
+                chunks.append(chunk)
+
+            for part, chunk in enumerate(chunks):
+                path = os.path.join(self.work_dir, f"round{round_no}_{model}_{part}.jsonl")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(chunk) + "\n")
+                files.append({"path": path, "handle": None})
+        return files
+
+    def _apply(self, output_lines: List[dict], expected: List[str]) -> None:
+        received = set()
+        for line in output_lines:
+            stage, doc_id = line["custom_id"].split("|", 1)
+            record = self.checkpoint["docs"].get(doc_id)
+            if record is None or record["status"] != "pending" or stage in record["completed"]:
+                continue
+            received.add(line["custom_id"])
+            try:
+                content, usage = parse_output_line(line)
+                record["tokens_in"] += usage.get("prompt_tokens", 0)
+                record["tokens_out"] += usage.get("completion_tokens", 0)
+                _, update = self.stages.stages[stage]
+                record["state"].update(update(record["state"], json.loads(content)))
+                record["completed"].append(stage)
+                if self.stages.next_stage(record) is None:
+                    record["status"] = "done"
+            except Exception as e:
+                record.update(status="failed", error=f"[BatchRunner.{stage}] {e}")
+
+        # Requests without a result (expired / cancelled batch) are retried next round
+        for custom_id in expected:
+            if custom_id in received:
+                continue
+            stage, doc_id = custom_id.split("|", 1)
+            record = self.checkpoint["docs"][doc_id]
+            record["attempts"][stage] = record["attempts"].get(stage, 0) + 1
+            if record["attempts"][stage] >= MAX_ATTEMPTS_PER_STAGE:
+                record.update(status="failed", error=f"[BatchRunner.{stage}] no result after {MAX_ATTEMPTS_PER_STAGE} batches")
+
+    def _collect_pending(self) -> None:
+        pending = self.checkpoint["pending"]
+        output_lines, expected = [], []
+        for batch_file in pending["files"]:
+            expected.extend(line["custom_id"] for line in _read_jsonl(batch_file["path"]))
+            if batch_file["handle"] is None:
+                batch_file["handle"] = self.submitter.submit(batch_file["path"])
+                self._save()
+            print(f"  waiting for {batch_file['handle']}")
+            output_lines.extend(self.submitter.wait(batch_file["handle"]))
+
+        self._apply(output_lines, expected)
+        self.checkpoint["pending"] = None
+        self._save()
+
+    def run(self) -> Dict[str, Any]:
+        while True:
+            if self.checkpoint["pending"]:
+                print(f"Round {self.checkpoint['pending']['round']}: collecting results")
+                self._collect_pending()
+
+            lines = self._round_requests()
+            if not lines:
+                self._save()
+                break
+
+            self.checkpoint["round"] += 1
+            round_no = self.checkpoint["round"]
+            files = self._write_batch_files(round_no, lines)
+            print(f"Round {round_no}: {len(lines)} requests in {len(files)} batch file(s)")
+            self.checkpoint["pending"] = {"round": round_no, "files": files}
+            self._save()
+        return self.summary()
+
+    # --- results ---
+    def write_results(self, output_path: str) -> None:
+        with open(output_path, "w", encoding="utf-8") as f:
+            for doc_id in self.documents:
+                record = self.checkpoint["docs"][doc_id]
+                done = record["status"] == "done"
+                f.write(json.dumps({
+                    "id": doc_id,
+                    "success": done,
+                    "data": self.stages.final_data(record) if done else None,
+                    "error": record["error"],
+                }, ensure_ascii=False) + "\n")
+
+    def summary(self) -> Dict[str, Any]:
+        records = [self.checkpoint["docs"][d] for d in self.documents]
+        return {
+            "documents": len(records),
+            "done": sum(r["status"] == "done" for r in records),
+            "failed": sum(r["status"] == "failed" for r in records),
+            "pending": sum(r["status"] == "pending" for r in records),
+            "rounds": self.checkpoint["round"],
+            "tokens_in": sum(r["tokens_in"] for r in records),
+            "tokens_out": sum(r["tokens_out"] for r in records),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="directory of .txt files or JSONL of {id, text}")
+    parser.add_argument("--output", required=True, help="results JSONL")
+    parser.add_argument("--checkpoint", help="defaults to <output>.checkpoint.json")
+    parser.add_argument("--work-dir", default="temp/batch", help="where batch JSONL files are written")
+    parser.add_argument("--submitter", choices=["openai", "local"], default="openai")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent calls for --submitter local")
+    parser.add_argument("--poll-interval", type=float, default=60.0)
+    parser.add_argument("--retry-failed", action="store_true", help="retry documents that failed in an earlier run")
+    args = parser.parse_args()
+
+    from __init__ import llm_client
+
+    if args.submitter == "openai":
+        submitter = OpenAIBatchSubmitter(llm_client.client, poll_interval=args.poll_interval)
+    else:
+        submitter = LocalBatchSubmitter(llm_client, workers=args.workers)
+
+    runner = BatchRunner(
+        llm_client,
+        submitter,
+        load_documents(args.input),
+        checkpoint_path=args.checkpoint or args.output + ".checkpoint.json",
+        work_dir=args.work_dir,
+    )
+    if args.retry_failed:
+        print(f"Retrying {runner.retry_failed()} failed document(s)")
+
+    summary = runner.run()
+    runner.write_results(args.output)
+    print("=== Summary ===")
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
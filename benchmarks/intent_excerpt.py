@@ -0,0 +1,148 @@
+# benchmarks/intent_excerpt.py
+"""
+Intent classification on a bounded excerpt vs. the full document.
+
+For every document the intent request is built twice or more: with the
+full text and with the excerpt of agents/intent_agent/excerpt.py at each
+budget. The report shows prompt tokens, excerpt build time and latency per
+variant, and, with --live, how often the excerpt gets the same task type
+as the full text.
+
+Offline (default) no API is called: prompt tokens are estimated after the
+client's pre-flight trimming, and latency is modelled as
+--base-latency + prompt tokens / 1000 * --prefill-per-1k. --live sends
+every request to the configured model (config.py, response cache off) and
+reports measured tokens, latency and agreement.
+
+Documents are synthetic by default: each line of the intent eval corpus
+opens a document that is padded to --pages pages with paragraphs of the
+same kind. --files classifies real documents through FileExtractor.
+
+Usage (from the repository root):
+    python -m benchmarks.intent_excerpt
+    python -m benchmarks.intent_excerpt --pages 300 --budgets 800,1500,3000
+    python -m benchmarks.intent_excerpt --files report.pdf notes.docx --live
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Any, Dict, List
+
+from agents.intent_agent.eval_rules import DEFAULT_CORPUS, load_corpus
+from agents.intent_agent.tool import IntentAgentTool
+from agents.mycore.ledger import usage_meter
+from agents.mycore.tokens import TokenBudget, estimate_messages_tokens
+
+CHARS_PER_PAGE = 1500
+
+
+def build_documents(pages: int, seed: int) -> List[Dict[str, Any]]:
+    """Long documents opened by each corpus text and padded with texts of the same label."""
+    rng = random.Random(seed)
+    corpus = load_corpus(DEFAULT_CORPUS)
+    documents = []
+    for index, row in enumerate(corpus):
+        fillers = [r["text"] for r in corpus if r["label"] == row["label"] and r is not row]
+        page_texts = []
+        for page in range(pages):
+            lines = [f"第{page + 1}節" if row["label"] == "SYNTHESIS" else f"更新 {page + 1}"]
+            while sum(len(line) for line in lines) < CHARS_PER_PAGE:
+                lines.append(rng.choice(fillers))
+            page_texts.append("\n".join(lines))
+        page_texts[0] = row["text"] + "\n" + page_texts[0]
+        documents.append({"name": f"corpus-{index}", "text": "\n".join(page_texts), "pages": pages, "label": row["label"]})
+    return documents
+
+
+def load_files(paths: List[str]) -> List[Dict[str, Any]]:
+    from line_bot.file_extractor import FileExtractor
+    return [
+        {"name": path, "text": FileExtractor.extract(path), "pages": FileExtractor.count_pages(path), "label": None}
+        for path in paths
+    ]
+
+
+def run_offline(tool: IntentAgentTool, documents: List[Dict[str, Any]], variants: Dict[str, dict], args) -> Dict[str, Dict[str, list]]:
+    budget = TokenBudget()
+    results = {name: {"tokens": [], "build_ms": [], "latency": [], "labels": []} for name in variants}
+    for document in documents:
+        for name, excerpt in variants.items():
+            started = time.perf_counter()
+            user_prompt, system_prompt, config = tool.classify_request(document["text"], excerpt=excerpt, pages=document["pages"])
+            build = time.perf_counter() - started
+            request = budget.preflight({
+                "model": config["model"],
+                "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+                "max_completion_tokens": config.get("max_completion_tokens"),
+            })
+            tokens = estimate_messages_tokens(request["messages"])
+            results[name]["tokens"].append(tokens)
+            results[name]["build_ms"].append(build * 1000)
+            results[name]["latency"].append(args.base_latency + tokens / 1000 * args.prefill_per_1k)
+    return results
+
+
+def run_live(tool: IntentAgentTool, documents: List[Dict[str, Any]], variants: Dict[str, dict]) -> Dict[str, Dict[str, list]]:
+    from __init__ import llm_client
+
+    results = {name: {"tokens": [], "build_ms": [], "latency": [], "labels": []} for name in variants}
+    for document in documents:
+        for name, excerpt in variants.items():
+            started = time.perf_counter()
+            user_prompt, system_prompt, config = tool.classify_request(document["text"], excerpt=excerpt, pages=document["pages"])
+            build = time.perf_counter() - started
+            with usage_meter() as meter:
+                answer = llm_client.invoke_json(user_prompt, system_prompt, {**config, "cache": False})
+            results[name]["tokens"].append(meter["tokens_in"])
+            results[name]["build_ms"].append(build * 1000)
+            results[name]["latency"].append(time.perf_counter() - started)
+            results[name]["labels"].append(answer.get("task_type"))
+    return results
+
+
+def report(results: Dict[str, Dict[str, list]], live: bool) -> None:
+    full = results["full"]
+    print(f"{'variant':<14} {'tokens':>9} {'saved':>7} {'build':>8} {'latency':>9} {'agreement':>10}")
+    for name, row in results.items():
+        tokens = statistics.mean(row["tokens"])
+        saved = 1 - sum(row["tokens"]) / max(1, sum(full["tokens"]))
+        agreement = "-"
+        if live:
+            same = sum(a == b for a, b in zip(row["labels"], full["labels"]))
+            agreement = f"{same / len(row['labels']):.1%}"
+        print(
+            f"{name:<14} {tokens:>9.0f} {saved:>7.1%} {statistics.mean(row['build_ms']):>6.2f}ms "
+            f"{statistics.mean(row['latency']):>8.2f}s {agreement:>10}"
+        )
+    if not live:
+        print("(latency modelled; run with --live for measured latency and agreement with full-text classification)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", nargs="*", help="classify these documents instead of synthetic ones")
+    parser.add_argument("--pages", type=int, default=50, help="pages per synthetic document")
+    parser.add_argument("--budgets", default="800,1500,3000", help="excerpt max_tokens to compare")
+    parser.add_argument("--middle-samples", type=int, default=4)
+    parser.add_argument("--live", action="store_true", help="call the configured model (needs config.py)")
+    parser.add_argument("--base-latency", type=float, default=0.6, help="modelled seconds per call")
+    parser.add_argument("--prefill-per-1k", type=float, default=0.08, help="modelled seconds per 1k prompt tokens")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    documents = load_files(args.files) if args.files else build_documents(args.pages, args.seed)
+    variants = {"full": {"enabled": False}}
+    for budget in (int(b) for b in args.budgets.split(",")):
+        variants[f"excerpt@{budget}"] = {"max_tokens": budget, "middle_samples": args.middle_samples}
+
+    characters = statistics.mean(len(d["text"]) for d in documents)
+    print(f"{len(documents)} documents, {characters:,.0f} characters on average")
+
+    tool = IntentAgentTool(client=None)
+    results = run_live(tool, documents, variants) if args.live else run_offline(tool, documents, variants, args)
+    report(results, args.live)
+
+
+if __name__ == "__main__":
+    main()
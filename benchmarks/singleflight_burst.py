@@ -0,0 +1,159 @@
+# benchmarks/singleflight_burst.py
+"""
+Replay a burst of documents through LLMClient with and without singleflight
+and report how many API calls were saved.
+
+Each document runs the 4-step chain (intent → protagonist → focus →
+keypoints) as sequential invoke() calls. The API is simulated with a fixed
+latency so no key or network is needed; the response cache is disabled so
+only coalescing is measured.
+
+Usage (from the repository root):
+    python -m benchmarks.singleflight_burst
+    python -m benchmarks.singleflight_burst --docs 300 --articles 15 --window 1.0
+    python -m benchmarks.singleflight_burst --trace burst.jsonl      # {"t": 0.12, "text": "..."} per line
+    python -m benchmarks.singleflight_burst --redis-url redis://localhost:6379/3 --processes 4
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.singleflight import SingleFlight, RedisSingleFlight
+
+CHAIN = [
+    "Classify the task type of the input.",
+    "Identify the protagonist of the article.",
+    "Infer the focus aspects of the article.",
+    "Extract the keypoints of the article.",
+]
+
+
+class SimulatedCompletions:
+    """Chat completions endpoint with fixed latency that counts calls."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def create(self, **request):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        message = SimpleNamespace(content='{"ok": true}')
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=message, finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=len(request["messages"][1]["content"]) // 3, completion_tokens=20),
+        )
+
+
+def build_trace(docs: int, articles: int, window: float, seed: int) -> list:
+    """Zipf-like popularity: a few viral articles account for most of the burst."""
+    rng = random.Random(seed)
+    texts = [f"Article {i}: " + "新聞內容" * 200 + str(i) for i in range(articles)]
+    weights = [1.0 / (rank + 1) for rank in range(articles)]
+    trace = [{"t": rng.uniform(0, window), "text": rng.choices(texts, weights)[0]} for _ in range(docs)]
+    return sorted(trace, key=lambda item: item["t"])
+
+
+def load_trace(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        trace = [json.loads(line) for line in f if line.strip()]
+    return sorted(trace, key=lambda item: item["t"])
+
+
+def make_singleflight(mode: str, redis_url: str):
+    if mode == "off":
+        return None
+    if redis_url:
+        import redis
+        return RedisSingleFlight(redis.Redis.from_url(redis_url))
+    return SingleFlight()
+
+
+def run_trace(trace: list, mode: str, latency: float, workers: int, redis_url: str = None) -> dict:
+    """Replay trace in this process; returns API calls and per-document latencies."""
+    completions = SimulatedCompletions(latency)
+    client = LLMClient(
+        api_key="benchmark",
+        default_config={"model": "gpt-5-nano", "max_completion_tokens": 200},
+        singleflight=make_singleflight(mode, redis_url),
+    )
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+    def run_document(item: dict, start: float) -> float:
+        time.sleep(max(0.0, start + item["t"] - time.monotonic()))
+        began = time.monotonic()
+        for system_prompt in CHAIN:
+            client.invoke(item["text"], system_prompt, {})
+        return time.monotonic() - began
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(lambda item: run_document(item, start), trace))
+    return {"api_calls": completions.calls, "latencies": latencies, "wall": time.monotonic() - start}
+
+
+def _run_shard(args: tuple) -> dict:
+    return run_trace(*args)
+
+
+def run(trace: list, mode: str, latency: float, workers: int, processes: int, redis_url: str) -> dict:
+    if processes <= 1:
+        return run_trace(trace, mode, latency, workers, redis_url)
+
+    # Round-robin shards keep every process busy for the whole window
+    shards = [trace[i::processes] for i in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        results = pool.map(_run_shard, [(s, mode, latency, workers, redis_url) for s in shards])
+    return {
+        "api_calls": sum(r["api_calls"] for r in results),
+        "latencies": [lat for r in results for lat in r["latencies"]],
+        "wall": max(r["wall"] for r in results),
+    }
+
+
+def report(name: str, result: dict, requests: int) -> None:
+    latencies = sorted(result["latencies"])
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{name:<14} api_calls={result['api_calls']:>5} / {requests:<5} "
+        f"p50={statistics.median(latencies):.2f}s p95={p95:.2f}s wall={result['wall']:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", help="JSONL burst to replay ({'t': seconds, 'text': str} per line)")
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--articles", type=int, default=20)
+    parser.add_argument("--window", type=float, default=1.0, help="burst length in seconds")
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated API latency in seconds")
+    parser.add_argument("--workers", type=int, default=64, help="threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="needs --redis-url to coalesce across processes")
+    parser.add_argument("--redis-url")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    trace = load_trace(args.trace) if args.trace else build_trace(args.docs, args.articles, args.window, args.seed)
+    requests = len(trace) * len(CHAIN)
+    print(f"{len(trace)} documents, {len({item['text'] for item in trace})} distinct, {requests} LLM requests")
+
+    baseline = run(trace, "off", args.latency, args.workers, args.processes, None)
+    coalesced = run(trace, "on", args.latency, args.workers, args.processes, args.redis_url)
+    report("no singleflight", baseline, requests)
+    report("singleflight", coalesced, requests)
+
+    saved = baseline["api_calls"] - coalesced["api_calls"]
+    print(f"API calls saved: {saved} ({saved / baseline['api_calls']:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 # line_bot/bot.py
 import os
+import redis
 from flask import Flask, request, abort
 from datetime import datetime
 
@@ -19,14 +20,17 @@ from linebot.v3.webhooks import (
     FileMessageContent
 )
 
-from config import LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET
+from config import LINE_CHANNEL_ACCESS_TOKEN, LINE_CHANNEL_SECRET, REDIS_HOST, REDIS_PORT
 from line_bot.file_extractor import FileExtractor
+from line_bot.modes import AUTO_COMMAND, MODE_NAMES, SHOW_COMMAND, ModePreferences, parse_command
 from line_bot.tasks import process_content_task
 
 app = Flask(__name__)
 
 configuration = Configuration(access_token=LINE_CHANNEL_ACCESS_TOKEN)
 handler = WebhookHandler(LINE_CHANNEL_SECRET)
+# Per-user default mode (/重點, /解析, /自動)
+mode_preferences = ModePreferences(redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0))
 
 # Temp directories
 # Get project root directory
@@ -57,11 +61,26 @@ def callback():
 def handle_text_message(event):
     """Handle text message from user"""
     user_id = event.source.user_id
-    text_content = event.message.text.strip()
+    command, task_type, text_content = parse_command(event.message.text)
+
+    # Mode commands without content only change / show the user's default
+    if command is not None and not text_content:
+        if command == SHOW_COMMAND:
+            reply_user(event.reply_token, f"目前模式：{MODE_NAMES[mode_preferences.get(user_id)]}")
+            return
+        if not mode_preferences.set(user_id, task_type):
+            reply_user(event.reply_token, "❌ 目前無法儲存模式設定，請稍後再試。\n\n也可以在訊息前加上 /重點 或 /解析 指定單次模式。")
+            return
+        reply_user(event.reply_token, f"✅ 預設模式已設為：{MODE_NAMES[task_type]}\n\n輸入 {AUTO_COMMAND} 可恢復自動判斷。")
+        return
     
     if not text_content:
         reply_user(event.reply_token, "請輸入有效的文字內容")
         return
+
+    # "/重點 <text>" applies to this message only; otherwise the user's default (None: classify)
+    if task_type is None and command != AUTO_COMMAND:
+        task_type = mode_preferences.get(user_id)
     
     # Reply immediately
     reply_user(event.reply_token, "📝 收到文字內容，開始處理中...\n\n處理完成後會自動傳送結果給您。")
@@ -70,7 +89,8 @@ def handle_text_message(event):
     process_content_task.delay(
         user_id=user_id,
         content=text_content,
-        access_token=LINE_CHANNEL_ACCESS_TOKEN
+        access_token=LINE_CHANNEL_ACCESS_TOKEN,
+        task_type=task_type
     )
 
 
@@ -124,7 +144,9 @@ def handle_file_message(event):
             user_id=user_id,
             content=content,
             access_token=LINE_CHANNEL_ACCESS_TOKEN,
-            file_path=file_path
+            file_path=file_path,
+            task_type=mode_preferences.get(user_id),
+            pages=FileExtractor.count_pages(file_path)
         )
         
     except Exception as e:
@@ -71,6 +71,27 @@ class FileExtractor:
         except Exception as e:
             raise Exception(f"檔案內容提取失敗：{str(e)}")
     
+    @staticmethod
+    def count_pages(file_path: str) -> Optional[int]:
+        """
+        Page count of a .pdf (pages) or .pptx (slides) file
+        
+        Returns:
+            Number of pages, or None for other formats or unreadable files
+        """
+        _, ext = os.path.splitext(file_path)
+        ext = ext.lower()
+        
+        try:
+            if ext == '.pdf':
+                with open(file_path, 'rb') as f:
+                    return len(PyPDF2.PdfReader(f).pages)
+            elif ext == '.pptx':
+                return len(Presentation(file_path).slides)
+        except Exception:
+            return None
+        return None
+    
     @staticmethod
     def _extract_txt(file_path: str) -> str:
         """Extract text from .txt file"""
@@ -0,0 +1,66 @@
+# line_bot/modes.py
+"""
+Explicit mode selection for LINE users who already know what they want.
+
+    /重點 <文字>     this message as KEYPOINT
+    /解析 <文字>     this message as SYNTHESIS
+    /重點 or /解析   (alone) make it the user's default, kept in Redis
+    /自動            back to automatic intent classification
+    /模式            show the current default
+
+The chosen task type is passed to UnifyAPI.process(task_type=...), which
+skips the intent agent (one LLM call less per request).
+"""
+from typing import Optional, Tuple
+
+COMMANDS = {
+    "/重點": "KEYPOINT",
+    "/解析": "SYNTHESIS",
+}
+AUTO_COMMAND = "/自動"
+SHOW_COMMAND = "/模式"
+
+MODE_NAMES = {"KEYPOINT": "重點", "SYNTHESIS": "解析", None: "自動判斷"}
+
+
+def parse_command(text: str) -> Tuple[Optional[str], Optional[str], str]:
+    """
+    Split a text message into (command, task_type, content).
+
+    command is None for plain messages, otherwise the command word
+    ("/重點", "/自動", ...); task_type is the mode the command selects.
+    """
+    text = (text or "").strip()
+    for command in (*COMMANDS, AUTO_COMMAND, SHOW_COMMAND):
+        if text == command or text.startswith(command + " ") or text.startswith(command + "\n"):
+            return command, COMMANDS.get(command), text[len(command):].strip()
+    return None, None, text
+
+
+class ModePreferences:
+    """Per-user default task type in Redis (no entry: automatic classification)."""
+
+    KEY_PREFIX = "line_bot:mode:"
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    def get(self, user_id: str) -> Optional[str]:
+        try:
+            raw = self.redis.get(self.KEY_PREFIX + user_id)
+        except Exception:
+            # Redis down: fall back to automatic classification
+            return None
+        value = raw.decode() if isinstance(raw, bytes) else raw
+        return value if value in MODE_NAMES else None
+
+    def set(self, user_id: str, task_type: Optional[str]) -> bool:
+        """Store the user's default (None clears it); False if Redis is unreachable."""
+        try:
+            if task_type is None:
+                self.redis.delete(self.KEY_PREFIX + user_id)
+            else:
+                self.redis.set(self.KEY_PREFIX + user_id, task_type)
+        except Exception:
+            return False
+        return True
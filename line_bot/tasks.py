@@ -2,6 +2,7 @@
 import os
 import json
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 from datetime import datetime, timedelta
 import markdown2
 from reportlab.lib.pagesizes import A4
@@ -13,7 +14,7 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.lib.enums import TA_LEFT
 
 from config import REDIS_HOST, REDIS_PORT
-from __init__ import app as agent_app
+from __init__ import app as agent_app, llm_client
 from line_bot.formatter import ResultFormatter
 from line_bot.file_extractor import FileExtractor
 
@@ -44,8 +45,29 @@ celery_app.conf.update(
 )
 
 
+@worker_process_init.connect
+def warm_llm_transport(**kwargs):
+    """
+    Pre-open LLM API connections in each freshly forked (prefork) child, so the
+    first task does not pay DNS + TLS setup. The transport pool already dropped
+    any socket inherited from the parent.
+    """
+    try:
+        llm_client.warm_up()
+    except Exception as e:
+        print(f"LLM transport warm-up failed: {e}")
+
+
+@worker_ready.connect
+def warm_llm_transport_solo(sender=None, **kwargs):
+    """--pool=solo runs tasks in the main process, which never fires worker_process_init."""
+    pool = getattr(sender, "pool", None)
+    if pool is not None and type(pool).__module__.endswith(".solo"):
+        warm_llm_transport()
+
+
 @celery_app.task(bind=True)
-def process_content_task(self, user_id: str, content: str, access_token: str, file_path: str = None):
+def process_content_task(self, user_id: str, content: str, access_token: str, file_path: str = None, task_type: str = None, pages: int = None):
     """
     Async task to process user content through Agent
     
@@ -54,10 +76,12 @@ def process_content_task(self, user_id: str, content: str, access_token: str, fi
         content: Text content to process
         access_token: LINE channel access token
         file_path: Optional file path if content was extracted from file
+        task_type: Optional "KEYPOINT" / "SYNTHESIS" chosen by the user (skips intent classification)
+        pages: Optional page count of the uploaded file (shown to the intent classifier)
     """
     try:
         # Step 1: Process through Agent
-        result = agent_app.process(content)
+        result = agent_app.process(content, user_id=user_id, request_id=self.request.id, task_type=task_type, pages=pages)
         
         if not result["success"]:
             error_msg = f"處理失敗\n\n{result['error']}"
@@ -0,0 +1,79 @@
+# test_batch_runner.py
+import json
+import os
+import tempfile
+
+from agents.mycore.LLMclient import LLMClient
+from agents.mycore.stub_server import StubServer
+from batch_runner import BatchRunner, LocalBatchSubmitter
+
+FAST = {"latency": {"distribution": "fixed", "value": 0.0}}
+DOCUMENTS = {
+    "accident": "23歲陳姓女垃圾車隨車人員在台南市安平區收取垃圾時被撞，肇事鄭姓男子酒駕遭聲押。",
+    "lecture": "第一章 熱力學第二定律\n熵的定義為 S = k ln W，其中 W 為系統的微觀狀態數。",
+    "empty": "   ",
+}
+
+
+class _Interrupted(Exception):
+    pass
+
+
+class _StopsAtRound(LocalBatchSubmitter):
+    """Local submitter that is interrupted when it is asked to wait for the given round."""
+
+    def __init__(self, llm_client: LLMClient, round_no: int):
+        super().__init__(llm_client, workers=2)
+        self.round_no = round_no
+
+    def wait(self, handle: str):
+        if os.path.basename(handle).startswith(f"round{self.round_no}_"):
+            raise _Interrupted(handle)
+        return super().wait(handle)
+
+
+def test_local_submitter_resumes_from_the_checkpoint():
+    with StubServer(FAST) as server, tempfile.TemporaryDirectory() as work_dir:
+        client = server.client({"model": "gpt-5-nano"})
+        checkpoint = os.path.join(work_dir, "run.checkpoint.json")
+
+        # Round 1 (intent) finishes, round 2 is submitted and then the run is interrupted
+        runner = BatchRunner(client, _StopsAtRound(client, 2), DOCUMENTS, checkpoint, work_dir)
+        try:
+            runner.run()
+            assert False, "the run should have been interrupted"
+        except _Interrupted:
+            pass
+        assert server.stats()["requests"] == 2
+
+        with open(checkpoint, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        assert saved["pending"]["round"] == 2 and saved["pending"]["files"][0]["handle"]
+        assert saved["docs"]["empty"]["status"] == "failed"
+        assert all(saved["docs"][d]["completed"] == ["intent"] for d in ("accident", "lecture"))
+
+        # A new runner picks up the submitted round and never resends the intent requests
+        runner = BatchRunner(client, LocalBatchSubmitter(client, workers=2), DOCUMENTS, checkpoint, work_dir)
+        summary = runner.run()
+        assert summary["done"] == 2 and summary["failed"] == 1 and summary["pending"] == 0
+        assert summary["rounds"] == 4 and summary["tokens_in"] > 0
+        assert server.stats()["requests"] == 2 * 4
+
+        output = os.path.join(work_dir, "results.jsonl")
+        runner.write_results(output)
+        with open(output, "r", encoding="utf-8") as f:
+            results = {line["id"]: line for line in map(json.loads, f)}
+        for doc_id in ("accident", "lecture"):
+            data = results[doc_id]["data"]
+            assert results[doc_id]["success"] and data["selected_task_type"] in ("KEYPOINT", "SYNTHESIS")
+            assert json.loads(data["final_result_text"])["protagonist"]
+        assert not results["empty"]["success"] and "empty input" in results["empty"]["error"]
+
+        # Nothing left to do: running again sends no requests
+        BatchRunner(client, LocalBatchSubmitter(client), DOCUMENTS, checkpoint, work_dir).run()
+        assert server.stats()["requests"] == 2 * 4
+    print("Test passed!")
+
+
+if __name__ == "__main__":
+    test_local_submitter_resumes_from_the_checkpoint()